@@ -0,0 +1,33 @@
+"""add live_class_messages keyset index
+
+Revision ID: 5c1e7a9d3f20
+Revises: 74eea57744e4
+Create Date: 2026-10-18 09:12:41.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d3f20'
+down_revision: Union[str, Sequence[str], None] = '74eea57744e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_live_class_messages_live_class_id_id',
+        'live_class_messages',
+        ['live_class_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_live_class_messages_live_class_id_id', table_name='live_class_messages')
@@ -0,0 +1,40 @@
+"""add listing keyset indexes
+
+Revision ID: 8b2d4f6a1c37
+Revises: 5c1e7a9d3f20
+Create Date: 2026-10-18 11:03:27.914602
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d4f6a1c37'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a9d3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_live_classes_course_id_id',
+        'live_classes',
+        ['course_id', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_homework_submissions_homework_id_id',
+        'homework_submissions',
+        ['homework_id', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_homework_submissions_homework_id_id', table_name='homework_submissions')
+    op.drop_index('ix_live_classes_course_id_id', table_name='live_classes')
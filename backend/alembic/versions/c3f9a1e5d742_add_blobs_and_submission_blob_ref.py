@@ -0,0 +1,50 @@
+"""add blobs and submission blob reference
+
+Revision ID: c3f9a1e5d742
+Revises: 8b2d4f6a1c37
+Create Date: 2026-10-18 13:41:08.226519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1e5d742'
+down_revision: Union[str, Sequence[str], None] = '8b2d4f6a1c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_blobs_ref_count_last_seen_at', 'blobs', ['ref_count', 'last_seen_at'], unique=False)
+    op.add_column('homework_submissions', sa.Column('filename', sa.String(), nullable=True))
+    op.add_column('homework_submissions', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_homework_submissions_blob_sha256'), 'homework_submissions', ['blob_sha256'], unique=False)
+    op.create_foreign_key(
+        'homework_submissions_blob_sha256_fkey',
+        'homework_submissions', 'blobs',
+        ['blob_sha256'], ['sha256'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('homework_submissions_blob_sha256_fkey', 'homework_submissions', type_='foreignkey')
+    op.drop_index(op.f('ix_homework_submissions_blob_sha256'), table_name='homework_submissions')
+    op.drop_column('homework_submissions', 'blob_sha256')
+    op.drop_column('homework_submissions', 'filename')
+    op.drop_index('ix_blobs_ref_count_last_seen_at', table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,28 @@
+"""add live_classes ends_at index
+
+Revision ID: e4a7c2b9d815
+Revises: c3f9a1e5d742
+Create Date: 2026-10-18 16:42:08.331275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2b9d815'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a1e5d742'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_live_classes_ends_at', 'live_classes', ['ends_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_live_classes_ends_at', table_name='live_classes')
@@ -0,0 +1,28 @@
+"""add blobs deleting_at
+
+Revision ID: f2b8d6c4a913
+Revises: e4a7c2b9d815
+Create Date: 2026-10-18 19:05:41.602318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6c4a913'
+down_revision: Union[str, Sequence[str], None] = 'e4a7c2b9d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blobs', sa.Column('deleting_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('blobs', 'deleting_at')
@@ -0,0 +1,82 @@
+# benchmarks/compare.py
+"""
+Diff two benchmark reports, operation by operation.
+
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.compare before.json after.json --threshold 10
+
+Exits non-zero when any p95 got slower, or any throughput dropped, by
+more than --threshold percent.
+"""
+import argparse
+import json
+import sys
+
+# (field, higher is better)
+FIELDS = (
+    ("throughput_per_s", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("errors", False),
+)
+GATED = ("throughput_per_s", "p95_ms")
+
+
+def _change(before, after) -> float | None:
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple[list[str], list[str]]:
+    lines, regressions = [], []
+    ops = sorted(set(before["results"]) | set(after["results"]))
+    lines.append(f"{'operation':<18} {'metric':<17} {'before':>11} {'after':>11} {'change':>9}")
+    for op in ops:
+        old = before["results"].get(op, {})
+        new = after["results"].get(op, {})
+        for name, higher_is_better in FIELDS:
+            a, b = old.get(name), new.get(name)
+            change = _change(a, b)
+            shown = "" if change is None else f"{change:+.1f}%"
+            lines.append(f"{op:<18} {name:<17} {_fmt(a):>11} {_fmt(b):>11} {shown:>9}")
+
+            worse = change is not None and (-change if higher_is_better else change) > threshold
+            if name in GATED and worse:
+                regressions.append(f"{op} {name}: {_fmt(a)} -> {_fmt(b)} ({shown})")
+    return lines, regressions
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="Allowed regression, in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    for side, report in (("before", before), ("after", after)):
+        meta = report.get("meta", {})
+        print(f"{side}: {meta.get('commit')} {meta.get('database')} {meta.get('dataset')}")
+    if before.get("meta", {}).get("dataset") != after.get("meta", {}).get("dataset"):
+        print("warning: the reports were run on different datasets")
+
+    lines, regressions = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nregressions over {args.threshold:g}%:")
+        print("\n".join(f"  {line}" for line in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
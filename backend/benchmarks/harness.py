@@ -0,0 +1,147 @@
+# benchmarks/harness.py
+"""
+Boots the FastAPI app in this process for benchmarking: environment,
+fake Redis, SQLite timezone handling, lifespan, and an in-process
+WebSocket client. Nothing here touches the network.
+"""
+import asyncio
+import importlib
+import os
+import pkgutil
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BENCH_DIR / ".cache"
+
+
+def configure(database_url: str, *, bcrypt_rounds: int | None = None):
+    """Must run before anything imports `database` or `main`."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    if bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(bcrypt_rounds)
+
+    # Measure fan-out, not the per-user chat throttle
+    os.environ.setdefault("CHAT_RATE_LIMIT_STUDENT", "1000:1000")
+    os.environ.setdefault("CHAT_RATE_LIMIT_ADMIN", "1000:1000")
+    os.environ.setdefault("BLOB_GC_INTERVAL", "0")
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="bench-uploads-"))
+
+    _install_fake_redis()
+    _load_models()
+    if database_url.startswith("sqlite"):
+        _sqlite_utc_datetimes()
+
+
+def _install_fake_redis():
+    import fakeredis
+    import fakeredis.aioredis
+
+    import core.redis
+
+    server = fakeredis.FakeServer()
+    core.redis.redis_client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    core.redis.redis_sync_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+
+def _load_models():
+    import models
+
+    for module in pkgutil.iter_modules(models.__path__):
+        importlib.import_module(f"models.{module.name}")
+
+
+def _sqlite_utc_datetimes():
+    # SQLite drops tzinfo, and the app compares against aware datetimes.
+    # Hand back UTC-aware values like Postgres does.
+    from sqlalchemy.types import DateTime, TypeDecorator
+
+    from database import Base
+
+    class UTCDateTime(TypeDecorator):
+        impl = DateTime
+        cache_ok = True
+
+        def process_result_value(self, value, dialect):
+            if value is not None and value.tzinfo is None:
+                return value.replace(tzinfo=timezone.utc)
+            return value
+
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, DateTime) and column.type.timezone:
+                column.type = UTCDateTime(timezone=True)
+
+
+@asynccontextmanager
+async def running_app():
+    """Import the app and run its lifespan around the benchmark."""
+    import httpx
+
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield app, client
+
+
+class ASGIWebSocket:
+    """Minimal WebSocket client that talks to the ASGI app directly."""
+
+    def __init__(self, app, path: str, query_string: str = ""):
+        self.app = app
+        self.path = path
+        self.query_string = query_string
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+    async def connect(self) -> bool:
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": self.query_string.encode(),
+            "headers": [(b"host", b"bench")],
+            "server": ("bench", 80),
+            "client": ("127.0.0.1", 0),
+            "subprotocols": [],
+            "state": {},
+        }
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+
+        # The chat endpoint accepts before authorizing, so a rejected
+        # connection shows up later as a close from receive_text()
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            self.closed = True
+            return False
+        return True
+
+    async def send_text(self, text: str):
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def receive_text(self) -> str | None:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            self.closed = True
+            return None
+        return message.get("text")
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+        self.closed = True
@@ -0,0 +1,232 @@
+# benchmarks/run.py
+"""
+Run the backend benchmark suite in-process and print the results as JSON.
+
+    python -m benchmarks.run                       # SQLite, full dataset
+    python -m benchmarks.run --quick               # small dataset, short run
+    python -m benchmarks.run --database-url postgresql://... --reset
+    python -m benchmarks.run --output before.json
+
+Run from the backend directory. See benchmarks/README.md.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks import harness
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to a cached SQLite file under benchmarks/.cache")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables before seeding")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--enrollments-per-user", type=int, default=5)
+    parser.add_argument("--historical-classes", type=int, default=100_000, help="Finished live classes")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of mixed HTTP load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--async-clients", type=int, default=500, help="Concurrent clients for sync vs async")
+    parser.add_argument("--async-requests", type=int, default=10_000, help="Requests per sync vs async phase")
+    parser.add_argument("--catalog-requests", type=int, default=5000, help="GET /courses/ per catalog cache phase")
+    parser.add_argument("--pages", type=int, default=200, help="GET /live-classes/ requests per pagination phase")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--login-burst", type=int, default=200, help="Students logging in at once")
+    parser.add_argument("--auth-requests", type=int, default=20_000, help="GET /auth/me per user cache phase")
+    parser.add_argument("--jwt-checks", type=int, default=100_000, help="Token verifications per path")
+    parser.add_argument("--stampede-joins", type=int, default=2000, help="Students joining their classes at once")
+    parser.add_argument("--stampede-waves", type=int, default=3)
+    parser.add_argument("--ws-subscribers", type=int, default=2000, help="Student sockets in the chat room")
+    parser.add_argument("--ws-messages", type=int, default=200)
+    parser.add_argument("--ws-senders", type=int, default=2, help="Admin connections sending to the room")
+    parser.add_argument("--pubsub-classes", type=int, default=500, help="Live classes subscribed per pub/sub phase")
+    parser.add_argument("--pubsub-messages", type=int, default=20, help="Frames per class per pub/sub phase")
+    parser.add_argument("--write-messages", type=int, default=20_000, help="Chat rows written each way")
+    parser.add_argument("--write-senders", type=int, default=200, help="Concurrent chat sockets for the batched writes")
+    parser.add_argument("--export-rows", type=int, default=1_000_000, help="Submissions streamed per export format")
+    parser.add_argument("--limiter-checks", type=int, default=100_000, help="Chat rate limiter checks per path")
+    parser.add_argument("--notify-clients", type=int, default=5000, help="Students holding a notifications socket")
+    parser.add_argument("--notify-workers", type=int, default=2, help="Simulated workers running the class start scheduler")
+    parser.add_argument("--presence-workers", type=int, default=4, help="Simulated workers sharing presence")
+    parser.add_argument("--presence-students", type=int, default=2000)
+    parser.add_argument("--presence-rounds", type=int, default=10, help="Heartbeat rounds")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Defaults to the app's BCRYPT_ROUNDS")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="Small dataset and short run, for a smoke check")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.users, args.courses, args.messages = 500, 20, 20_000
+        args.historical_classes = 10_000
+        args.duration, args.ws_subscribers, args.ws_messages = 5, 50, 50
+        args.stampede_joins = 300
+        args.auth_requests = 2000
+        args.catalog_requests = 1000
+        args.async_requests = 2000
+        args.jwt_checks = 10_000
+        args.write_messages = 2000
+        args.pubsub_messages = 5
+        args.limiter_checks = 10_000
+        args.export_rows = 20_000
+        args.notify_clients = 300
+        args.presence_students = 300
+    return args
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _log(message: str):
+    print(message, file=sys.stderr)
+
+
+async def _run(args, dataset) -> dict:
+    from benchmarks.workloads import (
+        run_catalog,
+        run_chat_fanout,
+        run_chat_pubsub,
+        run_chat_writes,
+        run_class_start_notifications,
+        run_export,
+        run_http_mix,
+        run_join_stampede,
+        run_login_burst,
+        run_pagination,
+        run_rate_limiter,
+        run_sync_vs_async,
+        run_token_verification,
+        run_user_cache,
+        run_presence,
+    )
+
+    async with harness.running_app() as (app, client):
+        _log(f"mixed HTTP workload: {args.concurrency} users for {args.duration}s")
+        http = await run_http_mix(
+            client, dataset,
+            duration=args.duration, concurrency=args.concurrency, seed=args.seed,
+        )
+        _log(f"sync vs async: {args.async_clients} clients, {args.async_requests} requests each")
+        sync_async = await run_sync_vs_async(
+            dataset, clients=args.async_clients, requests=args.async_requests, seed=args.seed,
+        )
+        _log(f"catalog cache: {args.catalog_requests} requests per phase")
+        catalog = await run_catalog(client, requests=args.catalog_requests, concurrency=args.concurrency)
+        _log(f"pagination: {args.pages} pages of {args.page_size} per phase")
+        paging = await run_pagination(client, dataset, pages=args.pages, page_size=args.page_size, seed=args.seed)
+        _log(f"login burst: {args.login_burst} logins")
+        burst = await run_login_burst(client, dataset, logins=args.login_burst, probes=200, seed=args.seed)
+        _log(f"user cache: {args.auth_requests} requests uncached and cached")
+        auth = await run_user_cache(
+            client, dataset,
+            requests=args.auth_requests, concurrency=args.concurrency, seed=args.seed,
+        )
+        _log(f"token verification: {args.jwt_checks} checks per path")
+        jwt = run_token_verification(dataset, checks=args.jwt_checks, tokens=1000)
+        _log(f"join stampede: {args.stampede_joins} joins, {args.stampede_waves} waves")
+        stampede = await run_join_stampede(
+            client, dataset,
+            joins=args.stampede_joins, waves=args.stampede_waves, seed=args.seed,
+        )
+        _log(f"chat fan-out: {args.ws_subscribers} subscribers, {args.ws_messages} messages")
+        chat = await run_chat_fanout(
+            app, dataset,
+            subscribers=args.ws_subscribers, messages=args.ws_messages,
+            senders=args.ws_senders, seed=args.seed,
+        )
+        _log(f"chat pub/sub: {args.pubsub_classes} classes, {args.pubsub_messages} frames each")
+        pubsub = await run_chat_pubsub(classes=args.pubsub_classes, messages=args.pubsub_messages)
+        _log(f"chat writes: {args.write_messages} rows per path, {args.write_senders} senders")
+        writes = await run_chat_writes(dataset, messages=args.write_messages, senders=args.write_senders)
+        _log(f"exports: {args.export_rows} rows per format")
+        export = await run_export(dataset, rows=args.export_rows)
+        _log(f"rate limiter: {args.limiter_checks} checks per path")
+        limiter = await run_rate_limiter(checks=args.limiter_checks, users=1000)
+        _log(f"class start notifications: {args.notify_clients} clients, {args.notify_workers} workers")
+        notify = await run_class_start_notifications(
+            app, dataset,
+            clients=args.notify_clients, workers=args.notify_workers, seed=args.seed,
+        )
+        _log(f"presence: {args.presence_students} students on {args.presence_workers} workers")
+        presence = await run_presence(
+            dataset,
+            workers=args.presence_workers, students=args.presence_students,
+            rounds=args.presence_rounds, seed=args.seed,
+        )
+    return {**http, **sync_async, **catalog, **paging, **burst, **auth, **jwt, **stampede, **chat, **pubsub, **writes, **export, **limiter, **notify, **presence}
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    database_url = args.database_url
+    if database_url is None:
+        harness.CACHE_DIR.mkdir(exist_ok=True)
+        name = f"bench-u{args.users}-c{args.courses}-m{args.messages}-e{args.enrollments_per_user}-h{args.historical_classes}-s{args.seed}"
+        if args.bcrypt_rounds:
+            name += f"-r{args.bcrypt_rounds}"
+        database_url = f"sqlite:///{harness.CACHE_DIR / name}.db"
+    harness.configure(database_url, bcrypt_rounds=args.bcrypt_rounds)
+
+    from benchmarks.seed import build_dataset, is_seeded, refresh_live_windows, seed
+    from database import Base, engine
+
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    dataset = build_dataset(
+        args.users, args.courses, args.messages, args.enrollments_per_user, args.seed,
+        historical_classes=args.historical_classes,
+    )
+    if is_seeded(engine, dataset):
+        _log("reusing seeded database")
+    else:
+        seed(engine, dataset, log=_log)
+    refresh_live_windows(engine, dataset)
+
+    started = time.perf_counter()
+    results = asyncio.run(_run(args, dataset))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": engine.url.get_backend_name(),
+            "dataset": {
+                "users": args.users,
+                "courses": args.courses,
+                "messages": args.messages,
+                "enrollments_per_user": args.enrollments_per_user,
+                "historical_classes": args.historical_classes,
+                "seed": args.seed,
+            },
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "wall_time_s": round(time.perf_counter() - started, 2),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
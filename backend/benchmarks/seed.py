@@ -0,0 +1,182 @@
+# benchmarks/seed.py
+"""
+Deterministic benchmark dataset. Rows are bulk-inserted into an empty
+database with sequential ids, so the layout can be rebuilt from the
+parameters alone when a seeded database is reused.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, update
+
+BENCH_PASSWORD = "bench-password"
+ADMIN_USERNAME = "admin"
+# Per course: two past classes, one live now, one upcoming
+CLASSES_PER_COURSE = 4
+LIVE_SLOT = 2
+
+_CHUNK = 20_000
+
+
+@dataclass
+class Dataset:
+    users: int
+    courses: int
+    messages: int
+    enrollments_per_user: int
+    seed: int
+    # Finished classes on top of the per-course four, spread over the last year
+    historical_classes: int = 0
+    # student id -> enrolled course ids
+    enrollments: dict[int, list[int]] = field(default_factory=dict)
+
+    @property
+    def admin_id(self) -> int:
+        return 1
+
+    @property
+    def student_ids(self) -> range:
+        return range(2, self.users + 1)
+
+    def username(self, user_id: int) -> str:
+        return ADMIN_USERNAME if user_id == self.admin_id else f"user{user_id}"
+
+    def live_class_id(self, course_id: int) -> int:
+        return (course_id - 1) * CLASSES_PER_COURSE + LIVE_SLOT + 1
+
+    def course_students(self, course_id: int) -> list[int]:
+        return [uid for uid, courses in self.enrollments.items() if course_id in courses]
+
+
+def build_dataset(
+    users: int,
+    courses: int,
+    messages: int,
+    enrollments_per_user: int,
+    seed: int,
+    historical_classes: int = 0,
+) -> Dataset:
+    rng = random.Random(seed)
+    dataset = Dataset(users, courses, messages, enrollments_per_user, seed, historical_classes)
+    per_user = min(enrollments_per_user, courses)
+    for user_id in dataset.student_ids:
+        dataset.enrollments[user_id] = sorted(rng.sample(range(1, courses + 1), per_user))
+    return dataset
+
+
+def _chunks(rows, size=_CHUNK):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def is_seeded(engine, dataset: Dataset) -> bool:
+    from models.users import User
+
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count()).select_from(User)) == dataset.users
+
+
+def seed(engine, dataset: Dataset, log=print):
+    from core.hashing import get_password_hash
+    from models.courses import Course
+    from models.enrollments import Enrollment
+    from models.live_class_messages import LiveClassMessage
+    from models.live_classes import LiveClass
+    from models.users import User
+
+    rng = random.Random(dataset.seed + 1)
+    now = datetime.now(timezone.utc)
+    # One hash for everyone: login cost is in verifying, not in seeding
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+
+    def timed(label, table, rows):
+        start = time.perf_counter()
+        count = 0
+        with engine.begin() as conn:
+            for batch in _chunks(rows):
+                conn.execute(insert(table), batch)
+                count += len(batch)
+        log(f"seeded {count} {label} in {time.perf_counter() - start:.1f}s")
+
+    timed("users", User, (
+        {
+            "username": dataset.username(user_id),
+            "email": f"{dataset.username(user_id)}@example.com",
+            "full_name": f"Bench User {user_id}",
+            "hashed_password": hashed_password,
+            "is_admin": user_id == dataset.admin_id,
+        }
+        for user_id in range(1, dataset.users + 1)
+    ))
+    timed("courses", Course, (
+        {"name": f"Course {course_id}", "code": f"C{course_id:05d}"}
+        for course_id in range(1, dataset.courses + 1)
+    ))
+    timed("enrollments", Enrollment, (
+        {"user_id": user_id, "course_id": course_id, "progress": rng.randint(0, 100), "completed": 0}
+        for user_id, course_ids in dataset.enrollments.items()
+        for course_id in course_ids
+    ))
+
+    offsets = (timedelta(days=-14), timedelta(days=-7), timedelta(hours=-1), timedelta(days=7))
+    timed("live classes", LiveClass, (
+        {
+            "course_id": course_id,
+            "title": f"Course {course_id} class {slot + 1}",
+            "starts_at": now + offset,
+            "ends_at": now + offset + timedelta(hours=4),
+            "meeting_url": f"https://meet.bench.local/{course_id}/{slot}",
+        }
+        for course_id in range(1, dataset.courses + 1)
+        for slot, offset in enumerate(offsets)
+    ))
+
+    # Appended after the per-course classes so their ids stay predictable
+    timed("historical live classes", LiveClass, _historical_classes(dataset, rng, now))
+
+    live_class_count = dataset.courses * CLASSES_PER_COURSE
+    students = dataset.users - 1
+    timed("chat messages", LiveClassMessage, (
+        {
+            "live_class_id": rng.randint(1, live_class_count),
+            "user_id": rng.randint(2, students + 1),
+            "message": f"message {i} " + "lorem ipsum " * rng.randint(0, 6),
+            "created_at": now - timedelta(seconds=dataset.messages - i),
+        }
+        for i in range(dataset.messages)
+    ))
+
+
+def _historical_classes(dataset: Dataset, rng: random.Random, now: datetime):
+    for i in range(dataset.historical_classes):
+        starts_at = now - timedelta(days=15, minutes=rng.randint(0, 350 * 24 * 60))
+        yield {
+            "course_id": rng.randint(1, dataset.courses),
+            "title": f"Archived class {i}",
+            "starts_at": starts_at,
+            "ends_at": starts_at + timedelta(hours=2),
+            "meeting_url": f"https://meet.bench.local/archive/{i}",
+        }
+
+
+def refresh_live_windows(engine, dataset: Dataset):
+    """Move every course's live slot around the current time (for reused databases)."""
+    from models.live_classes import LiveClass
+
+    now = datetime.now(timezone.utc)
+    live_ids = [dataset.live_class_id(course_id) for course_id in range(1, dataset.courses + 1)]
+    with engine.begin() as conn:
+        for batch in _chunks(live_ids, 1000):
+            conn.execute(
+                update(LiveClass)
+                .where(LiveClass.id.in_(batch))
+                .values(starts_at=now - timedelta(hours=1), ends_at=now + timedelta(hours=3))
+            )
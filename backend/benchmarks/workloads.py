@@ -0,0 +1,1036 @@
+# benchmarks/workloads.py
+"""Workload drivers. Every operation's latency goes into a Recorder."""
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import cycle, islice
+
+from benchmarks.harness import ASGIWebSocket
+from benchmarks.seed import BENCH_PASSWORD, CLASSES_PER_COURSE, Dataset
+
+# Relative weights of the HTTP operations in the mixed workload
+DEFAULT_MIX = {
+    "login": 1,
+    "catalog": 10,
+    "courses_me": 8,
+    "live_class_join": 5,
+    # Database-backed schedule listing, next to the in-memory index
+    "live_classes_me": 2,
+    "live_now": 5,
+    "upcoming": 5,
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, op: str, seconds: float, ok: bool = True):
+        if ok:
+            self.latencies[op].append(seconds)
+        else:
+            self.errors[op] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        result = {}
+        for op in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies.get(op, ()))
+            result[op] = {
+                "count": len(values),
+                "errors": self.errors.get(op, 0),
+                "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else 0,
+                "mean_ms": _ms(sum(values) / len(values)) if values else None,
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "max_ms": _ms(values[-1]) if values else None,
+            }
+        return result
+
+
+def percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _token(username: str) -> str:
+    from core.security import create_access_token
+
+    return create_access_token({"sub": username}, timedelta(hours=2))
+
+
+# ------------------------
+# Mixed HTTP workload
+# ------------------------
+async def run_http_mix(
+    client,
+    dataset: Dataset,
+    *,
+    duration: float,
+    concurrency: int,
+    seed: int,
+    mix: dict[str, int] = DEFAULT_MIX,
+) -> dict:
+    recorder = Recorder()
+    ops, weights = zip(*mix.items())
+    deadline = time.perf_counter() + duration
+    students = list(dataset.student_ids)
+
+    async def timed(op: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        recorder.record(op, time.perf_counter() - start, ok)
+
+    async def virtual_user(worker: int):
+        rng = random.Random(seed * 1000 + worker)
+        user_id = rng.choice(students)
+        username = dataset.username(user_id)
+        headers = {"Authorization": f"Bearer {_token(username)}"}
+
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            if op == "login":
+                await timed(op, client.post(
+                    "/auth/login", data={"username": username, "password": BENCH_PASSWORD},
+                ))
+            elif op == "catalog":
+                await timed(op, client.get("/courses/"))
+            elif op == "courses_me":
+                await timed(op, client.get("/courses/me", headers=headers))
+            elif op == "live_classes_me":
+                await timed(op, client.get("/live-classes/me", headers=headers))
+            elif op == "live_now":
+                await timed(op, client.get("/live-classes/me/live", headers=headers))
+            elif op == "upcoming":
+                await timed(op, client.get("/live-classes/me/upcoming", headers=headers))
+            elif op == "live_class_join":
+                course_id = rng.choice(dataset.enrollments[user_id])
+                await timed(op, client.get(
+                    f"/live-classes/{dataset.live_class_id(course_id)}/join", headers=headers,
+                ))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+    return recorder.summary(time.perf_counter() - start)
+
+
+# ------------------------
+# Sync vs async endpoints
+# ------------------------
+async def run_sync_vs_async(dataset: Dataset, *, clients: int, requests: int, seed: int) -> dict:
+    """
+    One query, a student's courses with progress, behind a `def`
+    endpoint on a sync Session (`courses_sync`, Starlette's threadpool)
+    and an `async def` endpoint on an AsyncSession (`courses_async`),
+    each hit `requests` times by `clients` concurrent clients. Runs on a
+    bare FastAPI app so authentication and middleware stay out of it.
+    """
+    from types import SimpleNamespace
+
+    import httpx
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from crud.enrollments import get_user_courses_with_progress, get_user_courses_with_progress_async
+    from database import get_async_db, get_db
+
+    app = FastAPI()
+
+    @app.get("/sync/{user_id}")
+    def courses_sync(user_id: int, db: Session = Depends(get_db)):
+        return get_user_courses_with_progress(db, SimpleNamespace(id=user_id))
+
+    @app.get("/async/{user_id}")
+    async def courses_async(user_id: int, db: AsyncSession = Depends(get_async_db)):
+        return await get_user_courses_with_progress_async(db, SimpleNamespace(id=user_id))
+
+    rng = random.Random(seed)
+    students = list(dataset.student_ids)
+    summary = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for op, prefix in (("courses_sync", "/sync"), ("courses_async", "/async")):
+            recorder = Recorder()
+
+            async def virtual_client(index: int):
+                for _ in range(index, requests, clients):
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(f"{prefix}/{rng.choice(students)}")
+                        ok = response.status_code == 200
+                    except Exception:
+                        ok = False
+                    recorder.record(op, time.perf_counter() - start, ok)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(virtual_client(i) for i in range(clients)))
+            summary.update(recorder.summary(time.perf_counter() - start))
+            summary[op]["clients"] = clients
+    return summary
+
+
+# ------------------------
+# Pagination
+# ------------------------
+async def run_pagination(client, dataset: Dataset, *, pages: int, page_size: int, seed: int) -> dict:
+    """
+    GET /live-classes/ as the admin over the whole class table, historical
+    classes included: `list_first_page`, `list_deep_page` (a cursor in the
+    last tenth of the table), `list_course_deep_page` (the same inside one
+    course, through the course_id filter) and `list_walk` (following the
+    cursor header page after page), `pages` requests each at `page_size`.
+    `list_unpaginated` fetches the whole table a few times for scale. All
+    but the walk report the mean response size in `bytes_per_response`.
+    """
+    from core.pagination import NEXT_CURSOR_HEADER
+
+    rng = random.Random(seed)
+    headers = {"Authorization": f"Bearer {_token(dataset.username(dataset.admin_id))}"}
+    total = dataset.courses * CLASSES_PER_COURSE + dataset.historical_classes
+    summary = {}
+
+    async def phase(op: str, params, count: int):
+        recorder = Recorder()
+        sizes = []
+        start = time.perf_counter()
+        for i in range(count):
+            request_start = time.perf_counter()
+            try:
+                response = await client.get("/live-classes/", headers=headers, params=params(i))
+                ok = response.status_code == 200
+                sizes.append(len(response.content))
+            except Exception:
+                ok = False
+            recorder.record(op, time.perf_counter() - request_start, ok)
+        summary.update(recorder.summary(time.perf_counter() - start))
+        summary[op]["bytes_per_response"] = round(sum(sizes) / len(sizes)) if sizes else None
+
+    def deep_cursor() -> int:
+        return rng.randint(total * 9 // 10, total - page_size)
+
+    await phase("list_unpaginated", lambda i: {}, 3)
+    await phase("list_first_page", lambda i: {"limit": page_size}, pages)
+    await phase("list_deep_page", lambda i: {"limit": page_size, "cursor": deep_cursor()}, pages)
+    await phase("list_course_deep_page", lambda i: {
+        "limit": page_size,
+        "cursor": deep_cursor(),
+        "course_id": rng.randint(1, dataset.courses),
+    }, pages)
+
+    recorder = Recorder()
+    params = {"limit": page_size}
+    start = time.perf_counter()
+    for _ in range(pages):
+        request_start = time.perf_counter()
+        response = await client.get("/live-classes/", headers=headers, params=params)
+        recorder.record("list_walk", time.perf_counter() - request_start, response.status_code == 200)
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        params = {"limit": page_size, "cursor": response.headers[NEXT_CURSOR_HEADER]}
+    summary.update(recorder.summary(time.perf_counter() - start))
+    return summary
+
+
+# ------------------------
+# Course catalog cache
+# ------------------------
+async def run_catalog(client, *, requests: int, concurrency: int) -> dict:
+    """
+    GET /courses/ three ways: `catalog_cold` drops the catalog cache before
+    every request, so each one renders from the database; `catalog_warm`
+    is served from the cache; `catalog_304` revalidates with a matching
+    If-None-Match and gets a bodiless 304. `requests` each, from
+    `concurrency` clients (cold runs one at a time so every request misses).
+    Each reports its SQL statements per request.
+    """
+    from core.query_counter import QueryCounter
+    from crud.course_cache import invalidate_catalog
+    from database import async_engine
+
+    etag = (await client.get("/courses/")).headers["ETag"]
+    summary = {}
+
+    async def phase(op: str, clients: int, headers: dict, status: int, before=None):
+        recorder = Recorder()
+
+        async def virtual_client(index: int):
+            for _ in range(index, requests, clients):
+                if before is not None:
+                    before()
+                start = time.perf_counter()
+                try:
+                    ok = (await client.get("/courses/", headers=headers)).status_code == status
+                except Exception:
+                    ok = False
+                recorder.record(op, time.perf_counter() - start, ok)
+
+        with QueryCounter(async_engine) as queries:
+            start = time.perf_counter()
+            await asyncio.gather(*(virtual_client(i) for i in range(clients)))
+            summary.update(recorder.summary(time.perf_counter() - start))
+        summary[op]["queries_per_request"] = round(queries.count / requests, 2)
+
+    await phase("catalog_cold", 1, {}, 200, before=invalidate_catalog)
+    await client.get("/courses/")
+    await phase("catalog_warm", concurrency, {}, 200)
+    await phase("catalog_304", concurrency, {"If-None-Match": etag}, 304)
+    return summary
+
+
+# ------------------------
+# Login burst
+# ------------------------
+async def run_login_burst(client, dataset: Dataset, *, logins: int, probes: int, seed: int) -> dict:
+    """
+    GET /courses/ latency on its own (`catalog_idle`, `probes` requests
+    one after another) and while `logins` students log in at once
+    (`catalog_during_logins`, back to back until the burst is over).
+    Logins the saturated hashing pool turns away with a 503 are counted
+    as `login_rejected`, not as errors: that is the fast rejection at work.
+    """
+    rng = random.Random(seed)
+    students = rng.sample(list(dataset.student_ids), min(logins, len(dataset.student_ids)))
+
+    async def catalog(recorder: Recorder, op: str):
+        start = time.perf_counter()
+        try:
+            ok = (await client.get("/courses/")).status_code < 400
+        except Exception:
+            ok = False
+        recorder.record(op, time.perf_counter() - start, ok)
+
+    idle = Recorder()
+    start = time.perf_counter()
+    for _ in range(probes):
+        await catalog(idle, "catalog_idle")
+    summary = idle.summary(time.perf_counter() - start)
+
+    burst = Recorder()
+    burst_over = asyncio.Event()
+
+    async def login(user_id: int):
+        start = time.perf_counter()
+        try:
+            response = await client.post(
+                "/auth/login", data={"username": dataset.username(user_id), "password": BENCH_PASSWORD},
+            )
+            status = response.status_code
+        except Exception:
+            status = None
+        op = "login_rejected" if status == 503 else "login_burst"
+        burst.record(op, time.perf_counter() - start, status in (200, 503))
+
+    async def logins_then_stop():
+        await asyncio.gather(*(login(user_id) for user_id in students))
+        burst_over.set()
+
+    async def probe_until_over():
+        while not burst_over.is_set():
+            await catalog(burst, "catalog_during_logins")
+
+    start = time.perf_counter()
+    await asyncio.gather(logins_then_stop(), probe_until_over())
+    summary.update(burst.summary(time.perf_counter() - start))
+    return summary
+
+
+# ------------------------
+# Authenticated user cache
+# ------------------------
+async def run_user_cache(client, dataset: Dataset, *, requests: int, concurrency: int, seed: int) -> dict:
+    """
+    GET /auth/me, the smallest authenticated request, with the principal
+    cache bypassed (`auth_me_uncached`, every request looks the user up)
+    and warm (`auth_me_cached`). Each reports its SQL statements per request.
+    """
+    import core.security
+    from core.query_counter import QueryCounter
+    from database import async_engine
+
+    rng = random.Random(seed)
+    users = rng.sample(list(dataset.student_ids), min(concurrency, len(dataset.student_ids)))
+    headers = [{"Authorization": f"Bearer {_token(dataset.username(u))}"} for u in users]
+
+    async def phase(op: str) -> dict:
+        recorder = Recorder()
+
+        async def virtual_user(index: int):
+            for _ in range(index, requests, len(headers)):
+                start = time.perf_counter()
+                try:
+                    ok = (await client.get("/auth/me", headers=headers[index])).status_code == 200
+                except Exception:
+                    ok = False
+                recorder.record(op, time.perf_counter() - start, ok)
+
+        with QueryCounter(async_engine) as queries:
+            start = time.perf_counter()
+            await asyncio.gather(*(virtual_user(i) for i in range(len(headers))))
+            summary = recorder.summary(time.perf_counter() - start)
+        summary[op]["queries_per_request"] = round(queries.count / requests, 2)
+        return summary
+
+    async def always_missing(username):
+        return None
+
+    cached_lookup = core.security.get_cached_user
+    core.security.get_cached_user = always_missing
+    try:
+        summary = await phase("auth_me_uncached")
+    finally:
+        core.security.get_cached_user = cached_lookup
+    # Warm every principal, then measure
+    await asyncio.gather(*(client.get("/auth/me", headers=h) for h in headers))
+    summary.update(await phase("auth_me_cached"))
+    return summary
+
+
+# ------------------------
+# Token verification
+# ------------------------
+def run_token_verification(dataset: Dataset, *, checks: int, tokens: int) -> dict:
+    """
+    Verifications/sec of `tokens` distinct access tokens, round robin:
+    `jwt_verify_uncached` is a full jwt.decode every time,
+    `jwt_verify_cached` is core.security.decode_token once warm.
+    """
+    from core import security
+
+    users = list(dataset.student_ids)[:tokens]
+    issued = [_token(dataset.username(u)) for u in users]
+    summary = {}
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    for i in range(checks):
+        op_start = time.perf_counter()
+        security.jwt.decode(
+            issued[i % len(issued)], security._verification_key, algorithms=[security.JWT_ALGORITHM],
+        )
+        recorder.record("jwt_verify_uncached", time.perf_counter() - op_start)
+    summary.update(recorder.summary(time.perf_counter() - start))
+
+    for token in issued:
+        security.decode_token(token)
+    recorder = Recorder()
+    start = time.perf_counter()
+    for i in range(checks):
+        op_start = time.perf_counter()
+        security.decode_token(issued[i % len(issued)])
+        recorder.record("jwt_verify_cached", time.perf_counter() - op_start)
+    summary.update(recorder.summary(time.perf_counter() - start))
+    return summary
+
+
+# ------------------------
+# Class-start join stampede
+# ------------------------
+async def run_join_stampede(client, dataset: Dataset, *, joins: int, waves: int, seed: int) -> dict:
+    """
+    The top of the hour: `joins` distinct (student, class) pairs, spread
+    over every course's live class, all join at once. Repeated `waves`
+    times; the first wave is cold, later ones are the reconnects and
+    refreshes that follow. Joins/sec is per wave.
+    """
+    pairs = [(uid, cid) for uid, course_ids in dataset.enrollments.items() for cid in course_ids]
+    pairs = random.Random(seed).sample(pairs, min(joins, len(pairs)))
+    requests = [
+        (
+            f"/live-classes/{dataset.live_class_id(course_id)}/join",
+            {"Authorization": f"Bearer {_token(dataset.username(user_id))}"},
+        )
+        for user_id, course_id in pairs
+    ]
+
+    async def join(op: str, recorder: Recorder, path: str, headers: dict):
+        start = time.perf_counter()
+        try:
+            ok = (await client.get(path, headers=headers)).status_code == 200
+        except Exception:
+            ok = False
+        recorder.record(op, time.perf_counter() - start, ok)
+
+    summary = {}
+    for wave in range(waves):
+        op = "join_stampede_cold" if wave == 0 else "join_stampede_warm"
+        recorder = Recorder()
+        start = time.perf_counter()
+        await asyncio.gather(*(join(op, recorder, path, headers) for path, headers in requests))
+        result = recorder.summary(time.perf_counter() - start)[op]
+        # Keep the slowest warm wave
+        if op not in summary or result["throughput_per_s"] < summary[op]["throughput_per_s"]:
+            summary[op] = result
+    return summary
+
+
+# ------------------------
+# WebSocket chat fan-out
+# ------------------------
+async def _wait_until_registered(live_class_id: int, count: int, timeout: float = 10):
+    # The endpoint accepts first and authorizes after; only send once every
+    # socket has joined the room, or early messages would count as lost
+    from routers.websocket import active_connections
+
+    deadline = time.perf_counter() + timeout
+    while len(active_connections.get(live_class_id, ())) < count:
+        if time.perf_counter() > deadline:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def run_chat_fanout(
+    app,
+    dataset: Dataset,
+    *,
+    subscribers: int,
+    messages: int,
+    senders: int,
+    seed: int,
+) -> dict:
+    """
+    Connect `subscribers` student sockets of one course to its live class chat,
+    plus `senders` admin connections, send `messages` from the admins,
+    and time each delivery from send to receipt. (Student messages only
+    reach admins, so the broadcast case is an admin talking to the room.)
+    """
+    # The busiest course. A room bigger than the course is filled with
+    # extra tabs of the same students, one socket each.
+    sizes = Counter(cid for course_ids in dataset.enrollments.values() for cid in course_ids)
+    course_id = sizes.most_common(1)[0][0]
+    students = dataset.course_students(course_id)
+    random.Random(seed).shuffle(students)
+    members = list(islice(cycle(students), subscribers))
+    live_class_id = dataset.live_class_id(course_id)
+    path = f"/chat/ws/live-classes/{live_class_id}/chat"
+
+    recorder = Recorder()
+    connect_start = time.perf_counter()
+    sockets = []
+    sending = []
+    admins = [dataset.admin_id] * max(senders, 1)
+    for user_id in admins + members:
+        start = time.perf_counter()
+        ws = ASGIWebSocket(app, path, f"token={_token(dataset.username(user_id))}")
+        ok = await ws.connect()
+        recorder.record("chat_connect", time.perf_counter() - start, ok)
+        if ok:
+            sockets.append(ws)
+            if user_id == dataset.admin_id:
+                sending.append(ws)
+    await _wait_until_registered(live_class_id, len(sockets))
+    connect_elapsed = time.perf_counter() - connect_start
+
+    expected = {i: len(sockets) for i in range(messages)}
+    done = asyncio.Event()
+    if not sending or not messages:
+        done.set()
+
+    async def listen(ws: ASGIWebSocket):
+        while True:
+            text = await ws.receive_text()
+            if text is None:
+                return
+            body = json.loads(json.loads(text)["message"])
+            recorder.record("chat_delivery", time.perf_counter() - body["t"])
+            expected[body["i"]] -= 1
+            if expected[body["i"]] == 0:
+                del expected[body["i"]]
+                if not expected:
+                    done.set()
+
+    listeners = [asyncio.create_task(listen(ws)) for ws in sockets]
+    send_start = time.perf_counter()
+
+    async def sender(index: int, ws: ASGIWebSocket):
+        for i in range(index, messages, len(sending)):
+            await ws.send_text(json.dumps({"i": i, "t": time.perf_counter()}))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(sender(n, ws) for n, ws in enumerate(sending)))
+    try:
+        await asyncio.wait_for(done.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        pass
+    fanout_elapsed = time.perf_counter() - send_start
+
+    for task in listeners:
+        task.cancel()
+    for ws in sockets:
+        await ws.close()
+
+    lost = sum(expected.values())
+    for _ in range(lost):
+        recorder.record("chat_delivery", 0, ok=False)
+
+    summary = recorder.summary(fanout_elapsed)
+    if "chat_connect" in summary:
+        summary["chat_connect"]["throughput_per_s"] = round(
+            summary["chat_connect"]["count"] / connect_elapsed, 2
+        )
+    if "chat_delivery" in summary:
+        summary["chat_delivery"]["subscribers"] = len(sockets)
+        summary["chat_delivery"]["messages_sent"] = messages
+    return summary
+
+
+# ------------------------
+# Chat pub/sub connections
+# ------------------------
+async def run_chat_pubsub(*, classes: int, messages: int) -> dict:
+    """
+    `classes` active live classes on one worker, subscribed two ways:
+    `pubsub_per_class` is the old design (a pub/sub connection and a
+    listener task per class), `pubsub_shared` is one RedisSubscriber for
+    all of them. Each records publish-to-handler latency over `messages`
+    rounds of one frame per class, plus the Redis connections, tasks and
+    Python memory (tracemalloc) the subscriptions take. A frame that
+    doesn't arrive is an error.
+    """
+    import tracemalloc
+
+    from core.pubsub import RedisSubscriber
+    from core.redis import redis_client
+
+    channels = [f"bench_pubsub:{i}" for i in range(classes)]
+    summary = {}
+
+    async def per_class(handler):
+        pubsubs = []
+        # A connection per class outgrows the client's default pool (100)
+        pool = redis_client.connection_pool
+        max_connections, pool.max_connections = pool.max_connections, max(pool.max_connections, classes + 16)
+
+        async def listen(pubsub):
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None and message["type"] == "message":
+                    handler(message["channel"], message["data"])
+
+        for channel in channels:
+            pubsub = redis_client.pubsub()
+            await pubsub.subscribe(channel)
+            pubsubs.append(pubsub)
+        tasks = [asyncio.create_task(listen(pubsub)) for pubsub in pubsubs]
+
+        async def close():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for pubsub in pubsubs:
+                await pubsub.aclose()
+            pool.max_connections = max_connections
+
+        return len({id(pubsub.connection) for pubsub in pubsubs}), close
+
+    async def shared(handler):
+        subscriber = RedisSubscriber(handler)
+        for channel in channels:
+            await subscriber.subscribe(channel)
+        return 1 if subscriber._pubsub.connection is not None else 0, subscriber.close
+
+    for op, subscribe in (("pubsub_per_class", per_class), ("pubsub_shared", shared)):
+        recorder = Recorder()
+        received = 0
+        round_done = asyncio.Event()
+
+        def handler(channel, data):
+            nonlocal received
+            recorder.record(op, time.perf_counter() - float(data))
+            received += 1
+            if received == classes:
+                round_done.set()
+
+        tasks_before = len(asyncio.all_tasks())
+        tracemalloc.start()
+        connections, close = await subscribe(handler)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tasks = len(asyncio.all_tasks()) - tasks_before
+
+        started = time.perf_counter()
+        try:
+            for _ in range(messages):
+                received = 0
+                round_done.clear()
+                for channel in channels:
+                    await redis_client.publish(channel, repr(time.perf_counter()))
+                try:
+                    await asyncio.wait_for(round_done.wait(), timeout=10)
+                except asyncio.TimeoutError:
+                    recorder.errors[op] += classes - received
+        finally:
+            await close()
+
+        result = recorder.summary(time.perf_counter() - started)
+        result[op].update(
+            classes=classes,
+            redis_connections=connections,
+            listener_tasks=tasks,
+            memory_kb=round(memory / 1024, 1),
+        )
+        summary.update(result)
+    return summary
+
+
+# ------------------------
+# Chat persistence
+# ------------------------
+async def run_chat_writes(dataset: Dataset, *, messages: int, senders: int) -> dict:
+    """
+    Rows/sec into live_class_messages, both ways. `chat_write_single` is
+    create_live_chat_message one row at a time (INSERT, COMMIT and the
+    refresh SELECT per row); `chat_write_batched` is `senders` concurrent
+    chat sockets going through a ChatMessageWriter. Each throughput_per_s
+    is rows/sec over that op's own run. The rows are deleted afterwards.
+    """
+    from sqlalchemy import delete, func, select
+
+    from crud.live_chat import create_live_chat_message
+    from crud.live_chat_writer import ChatMessageWriter
+    from database import SessionLocal
+    from models.live_class_messages import LiveClassMessage
+
+    live_class_id = dataset.live_class_id(1)
+    with SessionLocal() as db:
+        last_id = db.scalar(select(func.max(LiveClassMessage.id))) or 0
+
+    single = Recorder()
+
+    def write_single():
+        with SessionLocal() as db:
+            for i in range(messages):
+                start = time.perf_counter()
+                create_live_chat_message(
+                    db, live_class_id=live_class_id, user_id=dataset.admin_id, message=f"bench {i}",
+                )
+                single.record("chat_write_single", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.to_thread(write_single)
+    summary = single.summary(time.perf_counter() - start)
+
+    batched = Recorder()
+    writer = ChatMessageWriter()
+
+    async def sender(index: int):
+        for i in range(index, messages, senders):
+            start = time.perf_counter()
+            try:
+                await writer.write(live_class_id=live_class_id, user_id=dataset.admin_id, message=f"bench {i}")
+                ok = True
+            except Exception:
+                ok = False
+            batched.record("chat_write_batched", time.perf_counter() - start, ok)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(n) for n in range(senders)))
+    await writer.close()
+    summary.update(batched.summary(time.perf_counter() - start))
+    if "chat_write_batched" in summary:
+        summary["chat_write_batched"]["batches"] = writer.batches_written
+        summary["chat_write_batched"]["senders"] = senders
+
+    with SessionLocal() as db:
+        db.execute(delete(LiveClassMessage).where(LiveClassMessage.id > last_id))
+        db.commit()
+    return summary
+
+
+# ------------------------
+# Streaming exports
+# ------------------------
+async def run_export(dataset: Dataset, *, rows: int) -> dict:
+    """
+    Streams a `rows`-submission homework through the admin export encoder,
+    as NDJSON (`export_ndjson`) and CSV (`export_csv`), dropping each chunk.
+    `throughput_per_s` is rows/sec; `rss_growth_mb` is how far the
+    process's peak RSS rose during the export, which stays near zero when
+    only a batch is held at a time. The rows are deleted afterwards.
+    """
+    import resource
+
+    from sqlalchemy import delete, insert
+
+    from core.export import stream_rows
+    from crud.exports import submissions_export_statement
+    from database import SessionLocal
+    from models.homeworks import Homework, HomeworkSubmission
+
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        homework = Homework(course_id=1, title="Export benchmark", due_date=now)
+        db.add(homework)
+        db.flush()
+        for start in range(0, rows, 20_000):
+            db.execute(insert(HomeworkSubmission), [
+                {
+                    "homework_id": homework.id,
+                    "user_id": 2 + i % (dataset.users - 1),
+                    "file_url": f"/uploads/export/{i}",
+                    "submitted_at": now,
+                }
+                for i in range(start, min(start + 20_000, rows))
+            ])
+        db.commit()
+        homework_id = homework.id
+
+    summary = {}
+    try:
+        for fmt in ("ndjson", "csv"):
+            op = f"export_{fmt}"
+            recorder = Recorder()
+            peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            exported = 0
+            async for chunk in stream_rows(submissions_export_statement(homework_id), fmt):
+                exported += chunk.count("\n")
+            elapsed = time.perf_counter() - start
+            recorder.record(op, elapsed, exported == rows + (fmt == "csv"))
+            summary.update(recorder.summary(elapsed))
+            summary[op]["rows"] = rows
+            summary[op]["throughput_per_s"] = round(rows / elapsed, 2)
+            # ru_maxrss is in KiB on Linux
+            peak_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            summary[op]["rss_growth_mb"] = round((peak_after - peak_before) / 1024, 1)
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(HomeworkSubmission).where(HomeworkSubmission.homework_id == homework_id))
+            db.execute(delete(Homework).where(Homework.id == homework_id))
+            db.commit()
+    return summary
+
+
+# ------------------------
+# Chat rate limiter
+# ------------------------
+async def run_rate_limiter(*, checks: int, users: int) -> dict:
+    """
+    Checks/sec of the chat rate limiter, spread over `users` buckets:
+    `rate_limit_redis` through the shared Redis token bucket (one script
+    call each, one at a time), `rate_limit_local` through the in-process
+    fallback used while Redis is down.
+    """
+    from core import rate_limit
+
+    summary = {}
+    recorder = Recorder()
+    start = time.perf_counter()
+    for i in range(checks):
+        op_start = time.perf_counter()
+        await rate_limit.allow_chat_message(0, i % users, is_admin=False)
+        recorder.record("rate_limit_redis", time.perf_counter() - op_start)
+    summary.update(recorder.summary(time.perf_counter() - start))
+
+    recorder = Recorder()
+    limit = rate_limit.chat_limit_for(0, is_admin=False)
+    start = time.perf_counter()
+    for i in range(checks):
+        op_start = time.perf_counter()
+        rate_limit._allow_local(f"bench:{i % users}", limit)
+        recorder.record("rate_limit_local", time.perf_counter() - op_start)
+    summary.update(recorder.summary(time.perf_counter() - start))
+    return summary
+
+
+# ------------------------
+# Class-start notifications
+# ------------------------
+async def _wait_until_following(count: int, timeout: float = 60):
+    from routers.notifications import listeners
+
+    deadline = time.perf_counter() + timeout
+    while sum(len(conns) for conns in listeners.values()) < count:
+        if time.perf_counter() > deadline:
+            return
+        await asyncio.sleep(0.05)
+
+
+async def run_class_start_notifications(app, dataset: Dataset, *, clients: int, workers: int, seed: int) -> dict:
+    """
+    `clients` students hold a notifications socket each. A fake clock
+    jumps to the next scheduled class start, and `workers` schedulers (one
+    per simulated worker) take a pass each. Every client must get exactly
+    one class_starting event per class of theirs that started; missing
+    and duplicate events count as errors.
+    """
+    from crud.live_class_schedule import schedule
+    from crud.notifications import CLASS_START_NOTIFY_GRACE, ClassStartScheduler
+
+    students = random.Random(seed).sample(list(dataset.student_ids), min(clients, len(dataset.student_ids)))
+    recorder = Recorder()
+    connect_start = time.perf_counter()
+    sockets = {}
+    for user_id in students:
+        start = time.perf_counter()
+        ws = ASGIWebSocket(app, "/notifications/ws", f"token={_token(dataset.username(user_id))}")
+        ok = await ws.connect()
+        recorder.record("notify_connect", time.perf_counter() - start, ok)
+        if ok:
+            sockets[user_id] = ws
+    # A user channel plus one per enrolled course, for every socket
+    await _wait_until_following(sum(1 + len(dataset.enrollments[uid]) for uid in sockets))
+    connect_elapsed = time.perf_counter() - connect_start
+
+    now = datetime.now(timezone.utc)
+    next_class = next(iter(schedule.starting_between(now, now + timedelta(days=365))), None)
+    if next_class is None:
+        return recorder.summary(connect_elapsed)
+    fake_now = next_class.starts_at + timedelta(seconds=1)
+    started = schedule.starting_between(fake_now - timedelta(seconds=CLASS_START_NOTIFY_GRACE), fake_now)
+    started_courses = {live_class.course_id for live_class in started}
+    expected = {
+        uid: sum(1 for cid in dataset.enrollments[uid] if cid in started_courses)
+        for uid in sockets
+    }
+    remaining = sum(expected.values())
+    done = asyncio.Event()
+    if not remaining:
+        done.set()
+    fired_at = 0.0
+
+    async def listen(user_id: int, ws: ASGIWebSocket):
+        nonlocal remaining
+        while True:
+            text = await ws.receive_text()
+            if text is None:
+                return
+            if json.loads(text)["type"] != "class_starting":
+                continue
+            expected[user_id] -= 1
+            if expected[user_id] < 0:
+                # Announced twice
+                recorder.record("notify_delivery", 0, ok=False)
+                continue
+            recorder.record("notify_delivery", time.perf_counter() - fired_at)
+            remaining -= 1
+            if remaining == 0:
+                done.set()
+
+    listeners = [asyncio.create_task(listen(uid, ws)) for uid, ws in sockets.items()]
+    schedulers = [ClassStartScheduler(schedule, clock=lambda: fake_now) for _ in range(max(workers, 1))]
+
+    fired_at = time.perf_counter()
+    announced = 0
+    for scheduler in schedulers:
+        announced += await scheduler.tick()
+    try:
+        await asyncio.wait_for(done.wait(), timeout=60)
+    except asyncio.TimeoutError:
+        pass
+    # Give duplicates, if any, a moment to show up
+    await asyncio.sleep(0.5)
+    fanout_elapsed = time.perf_counter() - fired_at
+
+    for task in listeners:
+        task.cancel()
+    for ws in sockets.values():
+        await ws.close()
+
+    for _ in range(sum(left for left in expected.values() if left > 0)):
+        recorder.record("notify_delivery", 0, ok=False)
+
+    summary = recorder.summary(fanout_elapsed)
+    if "notify_connect" in summary:
+        summary["notify_connect"]["throughput_per_s"] = round(
+            summary["notify_connect"]["count"] / connect_elapsed, 2
+        )
+    if "notify_delivery" in summary:
+        summary["notify_delivery"]["clients"] = len(sockets)
+        summary["notify_delivery"]["classes_started"] = len(started)
+        summary["notify_delivery"]["announced"] = announced
+    return summary
+
+
+# ------------------------
+# Multi-worker presence
+# ------------------------
+async def run_presence(dataset: Dataset, *, workers: int, students: int, rounds: int, seed: int) -> dict:
+    """
+    Simulate `workers` app workers sharing one class's presence in Redis.
+    Students are spread over the workers, a tenth of them connected to
+    two at once (a second tab). Every round each worker heartbeats, and
+    the attendee count must equal the distinct students. Then the first
+    worker's sockets close, which must not drop a student still connected
+    to another worker; then the last worker dies, and once its heartbeats
+    expire the count must drop to the students still connected elsewhere.
+    Wrong counts are errors.
+    """
+    from core.redis import redis_client
+    from crud import presence
+
+    rng = random.Random(seed)
+    workers = max(workers, 2)
+    live_class_id = dataset.live_class_id(1)
+    members = rng.sample(list(dataset.student_ids), min(students, len(dataset.student_ids)))
+    rooms = [set() for _ in range(workers)]
+    for user_id in members:
+        rooms[rng.randrange(workers)].add(user_id)
+        if rng.random() < 0.1:
+            rooms[rng.randrange(workers)].add(user_id)
+
+    await redis_client.delete(
+        presence.presence_key(live_class_id), presence.unique_attendees_key(live_class_id),
+    )
+    recorder = Recorder()
+    started = time.perf_counter()
+    now = time.time()
+
+    async def check(expected: int, at: float):
+        start = time.perf_counter()
+        attendance = await presence.get_attendance(live_class_id, now=at)
+        recorder.record("presence_read", time.perf_counter() - start, attendance["attendees"] == expected)
+
+    worker_ids = [f"bench-worker-{i}" for i in range(workers)]
+    for worker_id, room in zip(worker_ids, rooms):
+        for user_id in room:
+            start = time.perf_counter()
+            await presence.join_presence(live_class_id, user_id, now=now, worker_id=worker_id)
+            recorder.record("presence_join", time.perf_counter() - start)
+    await check(len(members), now)
+
+    for round_ in range(rounds):
+        at = now + (round_ + 1) * presence.PRESENCE_HEARTBEAT_INTERVAL
+        for worker_id, room in zip(worker_ids, rooms):
+            start = time.perf_counter()
+            await presence.heartbeat({live_class_id: room}, now=at, worker_id=worker_id)
+            recorder.record("presence_heartbeat", time.perf_counter() - start)
+        await check(len(members), at)
+
+    # The first worker's students all disconnect from it
+    at = now + rounds * presence.PRESENCE_HEARTBEAT_INTERVAL
+    for user_id in rooms[0]:
+        start = time.perf_counter()
+        await presence.leave_presence(live_class_id, user_id, worker_id=worker_ids[0])
+        recorder.record("presence_leave", time.perf_counter() - start)
+    rooms[0] = set()
+    await check(len(set().union(*rooms)), at)
+
+    # The last worker stops heartbeating; wait out the TTL on the others
+    survivors = list(zip(worker_ids, rooms))[:-1]
+    at += presence.PRESENCE_TTL + 1
+    for worker_id, room in survivors:
+        await presence.heartbeat({live_class_id: room}, now=at, worker_id=worker_id)
+    await check(len(set().union(*rooms[:-1])), at)
+
+    summary = recorder.summary(time.perf_counter() - started)
+    if "presence_heartbeat" in summary:
+        summary["presence_heartbeat"]["workers"] = workers
+        summary["presence_heartbeat"]["students"] = len(members)
+    return summary
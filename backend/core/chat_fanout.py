@@ -0,0 +1,130 @@
+# core/chat_fanout.py
+import asyncio
+import os
+
+from fastapi import WebSocket
+
+# Max messages waiting to be written to a single socket
+CHAT_SEND_QUEUE_SIZE = int(os.getenv("CHAT_SEND_QUEUE_SIZE", "256"))
+
+# What to do when a socket's queue is full:
+#   "drop_oldest" -> discard the oldest pending message and keep the socket
+#   "disconnect"  -> close the socket, the client is expected to reconnect
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "disconnect")
+CHAT_SLOW_CONSUMER_POLICY = os.getenv("CHAT_SLOW_CONSUMER_POLICY", "drop_oldest")
+if CHAT_SLOW_CONSUMER_POLICY not in SLOW_CONSUMER_POLICIES:
+    raise RuntimeError(f"Unknown CHAT_SLOW_CONSUMER_POLICY: {CHAT_SLOW_CONSUMER_POLICY}")
+
+# Close code sent to sockets dropped by the "disconnect" policy (try again later)
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ChatConnection:
+    """
+    One attendee socket with its own outbound queue and writer task,
+    so a slow client never blocks delivery to the rest of the class.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        user_id: int,
+        is_admin: bool,
+        attendance: bool = False,
+        max_queue: int = CHAT_SEND_QUEUE_SIZE,
+        policy: str = CHAT_SLOW_CONSUMER_POLICY,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.ws = websocket
+        self.user_id = user_id
+        self.is_admin = is_admin
+        # Opted in to attendance count frames
+        self.attendance = attendance
+        self.policy = policy
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+        self._writer = asyncio.create_task(self._write_loop())
+        # Closing the socket of a slow consumer, started from send()
+        self._closing: asyncio.Task | None = None
+
+    def send(self, text: str) -> bool:
+        """Queue an already serialized frame without waiting on the socket."""
+        if self.closed:
+            return False
+
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.policy == "disconnect":
+            # send() can't wait on the socket; close it in the background
+            self.closed = True
+            self._writer.cancel()
+            self._closing = asyncio.create_task(self._close_socket(SLOW_CONSUMER_CLOSE_CODE))
+            return False
+
+        # drop_oldest
+        self.queue.get_nowait()
+        self.dropped += 1
+        self.queue.put_nowait(text)
+        return True
+
+    async def _write_loop(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await self.ws.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket went away mid-write; the receive loop does the cleanup
+            self.closed = True
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.ws.close(code=code)
+        except Exception:
+            pass
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            if self._closing is not None:
+                await self._closing
+            return
+        self.closed = True
+        self._writer.cancel()
+        await self._close_socket(code)
+
+    def stop(self):
+        """Stop the writer after the client has already disconnected."""
+        self.closed = True
+        self._writer.cancel()
+        if self._closing is not None:
+            self._closing.cancel()
+
+
+def broadcast(connections: list[ChatConnection], raw: str, *, from_admin: bool) -> int:
+    """
+    Fan out one serialized chat frame. Admin messages go to everyone,
+    student messages only reach admins. Returns the number of queued sends.
+    """
+    sent = 0
+    for conn in connections:
+        if from_admin or conn.is_admin:
+            if conn.send(raw):
+                sent += 1
+    return sent
+
+
+def send_attendance(connections: list[ChatConnection], raw: str) -> int:
+    """Fan out an attendance count frame to the sockets that asked for them."""
+    sent = 0
+    for conn in connections:
+        if conn.attendance and conn.send(raw):
+            sent += 1
+    return sent
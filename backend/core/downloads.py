@@ -0,0 +1,140 @@
+# core/downloads.py
+import zipfile
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import PurePath
+from typing import Iterable, Iterator
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+
+from core.http_cache import etag_matches
+from core.storage import StorageBackend, content_disposition, storage
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def safe_filename(filename: str | None, default: str = "file") -> str:
+    """Client-supplied name reduced to a bare file name."""
+    name = PurePath((filename or "").replace("\\", "/")).name.strip()
+    return name or default
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def stored_file_response(
+    request: Request,
+    key: str,
+    *,
+    etag: str,
+    last_modified: datetime,
+    filename: str,
+    backend: StorageBackend | None = None,
+) -> Response:
+    """
+    Serve a stored object that never changes under `key`.
+
+    Local files go out through FileResponse: Range and If-Range requests,
+    and http.response.pathsend where the server supports it, so the bytes
+    never pass through Python. Remote backends redirect to a presigned URL
+    and the object store serves the bytes (ranges included) itself.
+    """
+    backend = backend or storage
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified.timestamp(), usegmt=True),
+        "Cache-Control": "private, max-age=3600",
+    }
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    path = backend.local_path(key)
+    if path is None:
+        return RedirectResponse(backend.download_url(key, filename=filename), status_code=307)
+
+    return FileResponse(path, headers=headers, filename=filename)
+
+
+# ------------------------
+# Streaming ZIP archives
+# ------------------------
+@dataclass(frozen=True)
+class ZipEntry:
+    name: str
+    key: str
+    size: int
+    modified_at: datetime
+
+
+class _ChunkSink:
+    """Write-only, unseekable file object that hands back what was written."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[ZipEntry], *, backend: StorageBackend | None = None) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of `entries` piece by piece. Files are stored
+    uncompressed (submissions are mostly PDFs and images already) and
+    read chunk by chunk, so memory use doesn't depend on archive size.
+
+    Synchronous on purpose: StreamingResponse runs it in a worker thread.
+    """
+    backend = backend or storage
+    sink = _ChunkSink()
+    # Unseekable output makes zipfile write sizes in data descriptors after
+    # each file instead of seeking back to patch the local header
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, date_time=entry.modified_at.timetuple()[:6])
+            info.file_size = entry.size
+            with closing(backend.open_read(entry.key)) as src, archive.open(info, mode="w") as dst:
+                while chunk := src.read(DOWNLOAD_CHUNK_SIZE):
+                    dst.write(chunk)
+                    if data := sink.drain():
+                        yield data
+    # Central directory, written on close
+    if data := sink.drain():
+        yield data
+
+
+def zip_response(entries: Iterable[ZipEntry], filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
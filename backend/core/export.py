@@ -0,0 +1,73 @@
+# core/export.py
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+
+from database import AsyncSessionLocal
+
+# Rows fetched per round trip from the server-side cursor; also the number
+# of rows encoded into each response chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+ExportFormat = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns: list[str], rows) -> str:
+    return "".join(
+        json.dumps({col: _jsonable(val) for col, val in zip(columns, row)}) + "\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(
+        [_jsonable(val) for val in row] for row in rows
+    )
+    return buf.getvalue()
+
+
+async def stream_rows(stmt, fmt: ExportFormat) -> AsyncIterator[str]:
+    """
+    Run `stmt` on a server-side cursor and yield it encoded batch by batch,
+    so memory stays flat however many rows the query returns.
+
+    Uses its own session: the request's session is closed once the
+    endpoint returns, while the body is still being streamed.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            yield _encode_csv([columns])
+
+        async for rows in result.partitions():
+            if fmt == "csv":
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(columns, rows)
+
+
+def export_response(stmt, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_rows(stmt, fmt),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
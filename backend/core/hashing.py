@@ -1,9 +1,61 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor; existing hashes keep verifying after a change
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so a thread pool hashes in parallel while
+# keeping it off the request threads that serve every other endpoint
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Hash jobs allowed to wait for a worker before new ones are rejected
+HASHING_QUEUE_SIZE = int(os.getenv("HASHING_QUEUE_SIZE", "16"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
+
+_hashing_executor = ThreadPoolExecutor(
+    max_workers=HASHING_WORKERS,
+    thread_name_prefix="bcrypt",
+)
+_hashing_slots = threading.BoundedSemaphore(HASHING_WORKERS + HASHING_QUEUE_SIZE)
+
+
+class HashingPoolSaturated(Exception):
+    """Every hashing worker is busy and the wait queue is full."""
+
+
+def _run_hashing(fn, *args):
+    if not _hashing_slots.acquire(blocking=False):
+        raise HashingPoolSaturated()
+    try:
+        return _hashing_executor.submit(fn, *args).result()
+    finally:
+        _hashing_slots.release()
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _run_hashing(pwd_context.hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+
+async def _run_hashing_async(fn, *args):
+    if not _hashing_slots.acquire(blocking=False):
+        raise HashingPoolSaturated()
+    try:
+        return await asyncio.wrap_future(_hashing_executor.submit(fn, *args))
+    finally:
+        _hashing_slots.release()
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing_async(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing_async(pwd_context.verify, plain_password, hashed_password)
@@ -0,0 +1,38 @@
+# core/http_cache.py
+import hashlib
+
+from fastapi import Request, Response
+
+
+def strong_etag(body: bytes, version: int | None = None) -> str:
+    """Hash of the body, prefixed with `version` when the cache behind it has one."""
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    if version is not None:
+        digest = f"{version}-{digest}"
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    *,
+    cache_control: str,
+    media_type: str = "application/json",
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Serve a precomputed body, or a bodiless 304 if the client has it already."""
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,116 @@
+# core/instrumentation.py
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from core.metrics import Counter, Histogram
+
+# ------------------------
+# Metrics
+# ------------------------
+_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ("method", "route", "status"),
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Time a request spent waiting on SQL statements",
+    ("method", "route"),
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ("method", "route"),
+    buckets=_QUERY_BUCKETS,
+)
+db_queries = Counter("db_queries_total", "SQL statements executed", ("engine",))
+db_query_seconds = Histogram("db_query_duration_seconds", "SQL statement latency", ("engine",))
+
+
+# ------------------------
+# Per-request attribution
+# ------------------------
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Set for the duration of an HTTP request. Async sessions run their
+# statements in the request's task and sync endpoints run in a copied
+# context, so the cursor hooks below see the request that issued them.
+_current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current_request.get()
+
+
+def instrument_engine(engine, name: str):
+    """Count and time every statement `engine` runs (pass sync_engine for async engines)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._instrumentation_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._instrumentation_start
+        db_queries.inc(engine=name)
+        db_query_seconds.observe(elapsed, engine=name)
+
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+def _route_label(scope) -> str:
+    # The route template, never the raw path: ids would explode cardinality
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware, so streaming responses
+    and context variables pass through untouched). Records latency, SQL
+    statement count and SQL time for every HTTP request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+
+            method = scope["method"]
+            route = _route_label(scope)
+            http_request_seconds.observe(elapsed, method=method, route=route, status=status)
+            http_request_db_seconds.observe(stats.db_seconds, method=method, route=route)
+            http_request_db_queries.observe(stats.queries, method=method, route=route)
@@ -0,0 +1,55 @@
+# core/pagination.py
+from fastapi import Query, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Keyset pagination query params: `cursor` is the id of the last item of
+    the previous page, `limit` the page size (DEFAULT_PAGE_SIZE once a
+    cursor is given).
+
+    A request with neither still gets the whole list, as before pagination
+    existed, so clients that don't page yet keep working. `limit` is None
+    then. Deprecated: such requests will get the first page instead once
+    the clients have moved over.
+    """
+
+    def __init__(
+        self,
+        cursor: int | None = Query(None, ge=0),
+        limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        if limit is None and cursor is not None:
+            limit = DEFAULT_PAGE_SIZE
+        self.cursor = cursor
+        self.limit = limit
+
+
+def keyset_page(stmt, id_column, page: PageParams):
+    """Restrict `stmt` to one page; fetches one extra row to detect the end."""
+    if page.cursor is not None:
+        stmt = stmt.where(id_column > page.cursor)
+    stmt = stmt.order_by(id_column)
+    if page.limit is None:
+        return stmt
+    return stmt.limit(page.limit + 1)
+
+
+def split_page(rows, page: PageParams) -> tuple[list, int | None]:
+    """Drop the look-ahead row and return (items, next_cursor)."""
+    rows = list(rows)
+    if page.limit is not None and len(rows) > page.limit:
+        rows = rows[:page.limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def set_next_cursor(response: Response, next_cursor: int | None) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
@@ -0,0 +1,97 @@
+# core/pubsub.py
+import asyncio
+import logging
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RedisSubscriber:
+    """
+    One Redis pub/sub connection per process, shared by any number of
+    channels. Channels are reference counted: the first subscribe() of a
+    channel subscribes on Redis, the last unsubscribe() drops it.
+    Every message is handed to `handler(channel, data)`.
+    """
+
+    def __init__(self, handler: Callable[[str, str], None]):
+        self.handler = handler
+        self._refs: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        self._pubsub = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def channels(self) -> int:
+        return len(self._refs)
+
+    async def subscribe(self, channel: str):
+        async with self._lock:
+            count = self._refs.get(channel, 0)
+            if count:
+                self._refs[channel] = count + 1
+                return
+
+            if self._pubsub is None:
+                self._pubsub = redis_client.pubsub()
+            # Counted only once Redis has it: a failed SUBSCRIBE leaves the
+            # channel unknown, so the next subscribe() tries again
+            await self._pubsub.subscribe(channel)
+            self._refs[channel] = 1
+
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._listen())
+
+    async def unsubscribe(self, channel: str):
+        async with self._lock:
+            count = self._refs.get(channel, 0)
+            if count > 1:
+                self._refs[channel] = count - 1
+                return
+
+            self._refs.pop(channel, None)
+            if count and self._pubsub is not None:
+                await self._pubsub.unsubscribe(channel)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._refs.clear()
+
+    async def _listen(self):
+        while True:
+            if not self._refs:
+                # Nothing to route; stay idle until a channel is added
+                await asyncio.sleep(0.5)
+                continue
+
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=1.0,
+                )
+            except RedisError:
+                # redis-py resubscribes our channels when it reconnects
+                logger.warning("Redis pub/sub connection lost, retrying", exc_info=True)
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message["type"] != "message":
+                continue
+
+            try:
+                self.handler(message["channel"], message["data"])
+            except Exception:
+                logger.exception("Pub/sub handler failed for %s", message["channel"])
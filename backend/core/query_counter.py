@@ -0,0 +1,46 @@
+# core/query_counter.py
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """
+    Records every SQL statement an engine sends while the block runs.
+    Works with both Engine and AsyncEngine.
+
+        with QueryCounter(async_engine) as queries:
+            client.get("/courses/me", headers=auth)
+        assert queries.count == 2
+    """
+
+    def __init__(self, engine):
+        self.engine = getattr(engine, "sync_engine", engine)
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+@contextmanager
+def assert_num_queries(engine, expected: int):
+    """Fail when the block issues a different number of SQL statements (e.g. an N+1)."""
+    with QueryCounter(engine) as queries:
+        yield queries
+
+    if queries.count != expected:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(queries.statements))
+        raise AssertionError(
+            f"Expected {expected} SQL statements, got {queries.count}:\n{listing}"
+        )
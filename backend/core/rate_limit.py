@@ -0,0 +1,112 @@
+# core/rate_limit.py
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+
+from redis.exceptions import RedisError
+
+from core.cache import TTLCache
+from core.redis import redis_client
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket: refills `rate` tokens per second, holds at most `burst`."""
+    rate: float
+    burst: int
+
+    def __post_init__(self):
+        # A zero rate never refills (and has no finite ttl); a bucket
+        # smaller than one token never allows anything
+        if not self.rate > 0:
+            raise ValueError(f"Rate limit rate must be positive, got {self.rate}")
+        if self.burst < 1:
+            raise ValueError(f"Rate limit burst must be at least 1, got {self.burst}")
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        # "<rate per second>:<burst>", e.g. "1:1" or "0.5:3"
+        rate, burst = value.split(":")
+        return cls(rate=float(rate), burst=int(burst))
+
+    @property
+    def ttl(self) -> int:
+        # Time for an empty bucket to refill completely
+        return math.ceil(self.burst / self.rate) + 1
+
+
+CHAT_RATE_LIMIT_STUDENT = RateLimit.parse(os.getenv("CHAT_RATE_LIMIT_STUDENT", "1:1"))
+CHAT_RATE_LIMIT_ADMIN = RateLimit.parse(os.getenv("CHAT_RATE_LIMIT_ADMIN", "5:10"))
+
+# Per live class overrides, e.g. {"42": {"student": "0.2:1", "admin": "10:20"}}
+CHAT_RATE_LIMIT_OVERRIDES: dict[int, dict[str, RateLimit]] = {
+    int(class_id): {role: RateLimit.parse(v) for role, v in limits.items()}
+    for class_id, limits in json.loads(
+        os.getenv("CHAT_RATE_LIMIT_OVERRIDES", "{}")
+    ).items()
+}
+
+# KEYS[1] = bucket, ARGV[1] = rate, ARGV[2] = burst, ARGV[3] = ttl
+# Uses the Redis clock so every worker refills the bucket the same way.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return allowed
+"""
+
+_token_bucket = redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+# Used only while Redis is unreachable; idle buckets expire on their own
+_local_buckets = TTLCache(maxsize=100_000, ttl=60)
+
+
+def chat_limit_for(live_class_id: int, *, is_admin: bool) -> RateLimit:
+    role = "admin" if is_admin else "student"
+    override = CHAT_RATE_LIMIT_OVERRIDES.get(live_class_id, {}).get(role)
+    if override:
+        return override
+    return CHAT_RATE_LIMIT_ADMIN if is_admin else CHAT_RATE_LIMIT_STUDENT
+
+
+def _allow_local(key: str, limit: RateLimit) -> bool:
+    now = time.monotonic()
+    tokens, ts = _local_buckets.get(key, (limit.burst, now))
+    tokens = min(limit.burst, tokens + (now - ts) * limit.rate)
+
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    _local_buckets.set(key, (tokens, now), ttl=limit.ttl)
+    return allowed
+
+
+async def allow_chat_message(live_class_id: int, user_id: int, *, is_admin: bool) -> bool:
+    """Take one token from the user's bucket for this class. False = drop."""
+    limit = chat_limit_for(live_class_id, is_admin=is_admin)
+    key = f"chat_rate:{live_class_id}:{user_id}"
+    try:
+        allowed = await _token_bucket(
+            keys=[key],
+            args=[limit.rate, limit.burst, limit.ttl],
+        )
+        return bool(allowed)
+    except RedisError:
+        return _allow_local(key, limit)
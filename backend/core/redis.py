@@ -1,4 +1,5 @@
 # core/redis.py
+import redis as redis_sync
 import redis.asyncio as redis
 
 redis_client = redis.Redis(
@@ -6,3 +7,10 @@ redis_client = redis.Redis(
     port=6379,
     decode_responses=True
 )
+
+# For code that runs in threadpool workers (sync endpoints / dependencies)
+redis_sync_client = redis_sync.Redis(
+    host="localhost",
+    port=6379,
+    decode_responses=True
+)
@@ -0,0 +1,119 @@
+# core/schedule_index.py
+import heapq
+import threading
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import Iterable
+
+
+@dataclass(frozen=True, order=True)
+class ScheduledClass:
+    """A live class as held by the schedule index. Orders by start time."""
+    starts_at: datetime
+    id: int
+    course_id: int = field(compare=False)
+    title: str = field(compare=False)
+    ends_at: datetime = field(compare=False)
+    meeting_url: str = field(compare=False)
+
+    @property
+    def is_live(self) -> bool:
+        now = datetime.now(timezone.utc)
+        return self.starts_at <= now <= self.ends_at
+
+
+_starts_at = attrgetter("starts_at")
+
+
+class ScheduleIndex:
+    """
+    Classes that haven't ended yet, per course, sorted by start time.
+
+    Lookups bisect each course's list: "live now" only looks at classes
+    that already started (a handful per course, as long as the owner
+    rebuilds the index with replace_all() now and then to drop finished
+    ones), "upcoming" reads from the bisect point on. Finished classes
+    never enter the index, so history costs nothing.
+    Safe to share between the event loop and threadpool workers.
+    """
+
+    def __init__(self):
+        self._by_course: dict[int, list[ScheduledClass]] = {}
+        self._by_id: dict[int, ScheduledClass] = {}
+        # Every course together, for "what starts in this window"
+        self._all: list[ScheduledClass] = []
+        self._lock = threading.Lock()
+
+    def replace_all(self, classes: Iterable[ScheduledClass]) -> None:
+        by_course: dict[int, list[ScheduledClass]] = {}
+        by_id = {}
+        for entry in classes:
+            by_course.setdefault(entry.course_id, []).append(entry)
+            by_id[entry.id] = entry
+        for entries in by_course.values():
+            entries.sort()
+        all_classes = sorted(by_id.values())
+        with self._lock:
+            self._by_course = by_course
+            self._by_id = by_id
+            self._all = all_classes
+
+    def add(self, entry: ScheduledClass) -> None:
+        """Insert a class, or move it if it was rescheduled."""
+        with self._lock:
+            self._remove(entry.id)
+            insort(self._by_course.setdefault(entry.course_id, []), entry)
+            insort(self._all, entry)
+            self._by_id[entry.id] = entry
+
+    def remove(self, class_id: int) -> None:
+        with self._lock:
+            self._remove(class_id)
+
+    def _remove(self, class_id: int) -> None:
+        old = self._by_id.pop(class_id, None)
+        if old is None:
+            return
+        entries = self._by_course[old.course_id]
+        entries.remove(old)
+        if not entries:
+            del self._by_course[old.course_id]
+        self._all.remove(old)
+
+    def live_now(self, course_ids: Iterable[int], now: datetime) -> list[ScheduledClass]:
+        live = []
+        with self._lock:
+            for course_id in course_ids:
+                entries = self._by_course.get(course_id)
+                if not entries:
+                    continue
+                started = bisect_right(entries, now, key=_starts_at)
+                live.extend(entry for entry in entries[:started] if entry.ends_at >= now)
+        live.sort()
+        return live
+
+    def upcoming(self, course_ids: Iterable[int], now: datetime, limit: int) -> list[ScheduledClass]:
+        """The next `limit` classes starting after `now` across the courses."""
+        with self._lock:
+            streams = []
+            for course_id in course_ids:
+                entries = self._by_course.get(course_id)
+                if entries:
+                    start = bisect_right(entries, now, key=_starts_at)
+                    streams.append(entries[start:start + limit])
+        return list(heapq.merge(*streams))[:limit]
+
+    def starting_between(self, after: datetime, until: datetime) -> list[ScheduledClass]:
+        """Classes of any course with `after` < starts_at <= `until`."""
+        with self._lock:
+            start = bisect_right(self._all, after, key=_starts_at)
+            end = bisect_right(self._all, until, key=_starts_at)
+            return self._all[start:end]
+
+    def get(self, class_id: int) -> ScheduledClass | None:
+        return self._by_id.get(class_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
@@ -1,5 +1,9 @@
+import hashlib
+import os
+import time
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from pathlib import Path
+from jose import jwk, jwt
 from passlib.context import CryptContext
 
 from core.config import SECRET_KEY, ALGORITHM, REFRESH_TOKEN_EXPIRE_MINUTES
@@ -7,30 +11,99 @@ from core.config import SECRET_KEY, ALGORITHM, REFRESH_TOKEN_EXPIRE_MINUTES
 from fastapi import Depends, HTTPException, status, WebSocket
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_async_db
 from models.users import User
-from crud.users import get_user_by_username
+from crud.users import get_user_by_username_async
+from core.user_cache import UserPrincipal, get_cached_user, cache_user
+from core.cache import TTLCache
 
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
 )
 
+# ------------------------
+# Signing / verification keys
+# ------------------------
+# Default: HMAC with SECRET_KEY/ALGORITHM from core.config.
+# Asymmetric mode: set JWT_PRIVATE_KEY_FILE (signing, auth server only) and/or
+# JWT_PUBLIC_KEY_FILE (verification) to PEM files, and JWT_ALGORITHM to e.g.
+# RS256 or ES256. The keys are parsed once at import time.
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE")
+
+if JWT_PRIVATE_KEY_FILE or JWT_PUBLIC_KEY_FILE:
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "RS256")
+    _signing_key = (
+        jwk.construct(Path(JWT_PRIVATE_KEY_FILE).read_text(), JWT_ALGORITHM)
+        if JWT_PRIVATE_KEY_FILE else None
+    )
+    _verification_key = (
+        jwk.construct(Path(JWT_PUBLIC_KEY_FILE).read_text(), JWT_ALGORITHM)
+        if JWT_PUBLIC_KEY_FILE else _signing_key.public_key()
+    )
+else:
+    JWT_ALGORITHM = ALGORITHM
+    _signing_key = _verification_key = SECRET_KEY
+
+# Already-verified tokens, keyed by token hash; entries expire with the token
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "300"))
+_verified_tokens = TTLCache(maxsize=JWT_CACHE_SIZE, ttl=JWT_CACHE_MAX_TTL)
+
+
+def encode_token(claims: dict) -> str:
+    if _signing_key is None:
+        raise RuntimeError("JWT_PRIVATE_KEY_FILE is required to issue tokens")
+    return jwt.encode(claims, _signing_key, algorithm=JWT_ALGORITHM)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Verify a JWT and return its claims. Raises JWTError like jwt.decode.
+    Tokens verified before are served from memory until they expire.
+    """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(cache_key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, _verification_key, algorithms=[JWT_ALGORITHM])
+
+    ttl = JWT_CACHE_MAX_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _verified_tokens.set(cache_key, payload, ttl=ttl)
+    return payload
+
 
 def create_access_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encode_token(to_encode)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
+async def load_user_principal(db: AsyncSession, username: str) -> UserPrincipal | None:
+    # Cached principal first, the users table only on a miss
+    principal = await get_cached_user(username)
+    if principal is not None:
+        return principal
+
+    user = await get_user_by_username_async(db, username)
+    if user is None:
+        return None
+    return await cache_user(user)
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
+    db: AsyncSession = Depends(get_async_db),
+) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -38,14 +111,14 @@ def get_current_user(
     )
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str | None = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = get_user_by_username(db, username)
+    user = await load_user_principal(db, username)
     if user is None:
         raise credentials_exception
 
@@ -55,9 +128,9 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encode_token(to_encode)
 
-def get_current_admin(current_user: User = Depends(get_current_user)):
+async def get_current_admin(current_user: UserPrincipal = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -66,14 +139,14 @@ def get_current_admin(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-async def get_current_user_ws(websocket: WebSocket, db: Session) -> User:
+async def get_current_user_ws(websocket: WebSocket, db: AsyncSession) -> UserPrincipal:
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="Missing token")
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         username: str | None = payload.get("sub")
         if username is None:
             await websocket.close(code=1008)
@@ -82,7 +155,7 @@ async def get_current_user_ws(websocket: WebSocket, db: Session) -> User:
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = get_user_by_username(db, username)
+    user = await load_user_principal(db, username)
     if not user:
         await websocket.close(code=1008)
         raise HTTPException(status_code=401, detail="User not found")
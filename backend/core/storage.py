@@ -0,0 +1,327 @@
+# core/storage.py
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import quote
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# "local" or "s3"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", BASE_DIR / "uploads"))
+# Uploads land here first while being hashed; keep it on the same
+# filesystem as UPLOAD_DIR so promoting a file is a rename
+UPLOAD_STAGING_DIR = Path(os.getenv("UPLOAD_STAGING_DIR", UPLOAD_DIR / ".staging"))
+# URL prefix local files are published under
+UPLOAD_URL_PREFIX = os.getenv("UPLOAD_URL_PREFIX", "/uploads")
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around an upload
+UPLOAD_FORM_OVERHEAD = int(os.getenv("UPLOAD_FORM_OVERHEAD", str(64 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+# Point at MinIO or another S3-compatible stand-in; unset means AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+# Multipart part size; S3 requires at least 5 MiB for all but the last part
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+# Lifetime of presigned download URLs
+S3_URL_EXPIRES = int(os.getenv("S3_URL_EXPIRES", "300"))
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'{disposition}; filename="{filename}"'
+    return f"{disposition}; filename*=utf-8''{quoted}"
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    key: str
+    url: str
+    size: int
+    sha256: str
+
+
+# ------------------------
+# Backends
+# ------------------------
+# Writers are synchronous and driven from a worker thread, one chunk at a
+# time, so the event loop never waits on disk or network I/O.
+
+class StorageWriter(ABC):
+    @abstractmethod
+    def write(self, chunk: bytes) -> None: ...
+
+    @abstractmethod
+    def commit(self) -> None: ...
+
+    @abstractmethod
+    def abort(self) -> None: ...
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def put_file(self, path: Path, key: str) -> None:
+        """Store a local file under `key`. The file may be moved away."""
+
+    @abstractmethod
+    def open_read(self, key: str) -> BinaryIO: ...
+
+    def local_path(self, key: str) -> Path | None:
+        """Path on this machine's disk, for backends that have one."""
+        return None
+
+    def download_url(self, key: str, *, filename: str | None = None) -> str | None:
+        """Short-lived URL the client can fetch the object from directly."""
+        return None
+
+    @abstractmethod
+    def url(self, key: str) -> str: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+
+class _LocalWriter(StorageWriter):
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the destination and rename, so readers never see
+        # a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        self._file = os.fdopen(fd, "wb")
+        self._tmp = tmp
+        self._path = path
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self._tmp, self._path)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: Path, url_prefix: str = UPLOAD_URL_PREFIX):
+        self.root = root.resolve()
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Storage key escapes the upload root: {key}")
+        return path
+
+    def open(self, key: str) -> StorageWriter:
+        """Write a new file under `key`; it appears once committed."""
+        return _LocalWriter(self.path(key))
+
+    def put_file(self, path: Path, key: str) -> None:
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(path, dest)
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def local_path(self, key: str) -> Path | None:
+        return self.path(key)
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(StorageBackend):
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        endpoint_url: str | None = None,
+        public_url: str | None = None,
+        part_size: int = S3_PART_SIZE,
+    ):
+        try:
+            import boto3
+        except ImportError as exc:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 to be installed") from exc
+
+        self.bucket = bucket
+        self.part_size = part_size
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.public_url = (public_url or f"https://{bucket}.s3.amazonaws.com").rstrip("/")
+
+    def put_file(self, path: Path, key: str) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        config = TransferConfig(multipart_threshold=self.part_size, multipart_chunksize=self.part_size)
+        self.client.upload_file(str(path), self.bucket, key, Config=config)
+
+    def open_read(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def download_url(self, key: str, *, filename: str | None = None) -> str | None:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = content_disposition(filename)
+        return self.client.generate_presigned_url(
+            "get_object", Params=params, ExpiresIn=S3_URL_EXPIRES,
+        )
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+def _create_storage() -> StorageBackend:
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(UPLOAD_DIR)
+    if STORAGE_BACKEND == "s3":
+        if not S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return S3Storage(S3_BUCKET, endpoint_url=S3_ENDPOINT_URL, public_url=S3_PUBLIC_URL)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+storage = _create_storage()
+
+
+# ------------------------
+# Streaming uploads
+# ------------------------
+def _write_chunk(writer: StorageWriter, hasher, chunk: bytes):
+    hasher.update(chunk)
+    writer.write(chunk)
+
+
+async def save_upload(
+    upload: UploadFile,
+    key: str,
+    *,
+    backend: LocalStorage,
+    max_bytes: int | None = None,
+) -> StoredFile:
+    """
+    Copy `upload` to local storage chunk by chunk, hashing as it goes. At
+    most one chunk is held in memory. Raises UploadTooLarge, and leaves
+    nothing behind, once more than `max_bytes` (UPLOAD_MAX_BYTES by
+    default) have been read.
+
+    Starlette has spooled the whole multipart body to a temporary file by
+    now, so this is the exact check on the file itself;
+    RequestSizeLimitMiddleware stops oversized bodies as they arrive.
+    """
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    writer = await asyncio.to_thread(backend.open, key)
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await asyncio.to_thread(_write_chunk, writer, hasher, chunk)
+        await asyncio.to_thread(writer.commit)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+
+    return StoredFile(key=key, url=backend.url(key), size=size, sha256=hasher.hexdigest())
+
+
+# ------------------------
+# Staged uploads
+# ------------------------
+# For content-addressed storage the key depends on the hash, which is only
+# known once the whole upload has been read. Uploads are therefore staged
+# on local disk first, then promoted into storage, or dropped when the
+# content is already stored.
+
+_staging = LocalStorage(UPLOAD_STAGING_DIR, url_prefix="")
+
+
+async def stage_upload(upload: UploadFile, *, max_bytes: int | None = None) -> StoredFile:
+    return await save_upload(upload, uuid.uuid4().hex, backend=_staging, max_bytes=max_bytes)
+
+
+def promote_staged(staged: StoredFile, key: str, *, backend: StorageBackend | None = None) -> None:
+    (backend or storage).put_file(_staging.path(staged.key), key)
+
+
+def discard_staged(staged: StoredFile) -> None:
+    _staging.delete(staged.key)
+
+
+# ------------------------
+# Request size limit
+# ------------------------
+class RequestSizeLimitMiddleware:
+    """
+    Answers 413 to any request body larger than an upload may be, before
+    the app reads it: up front from Content-Length, or as soon as a
+    chunked body goes past the limit. Without it a multipart upload is
+    spooled to disk in full before save_upload gets to count it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD
+        detail = f"Request body exceeds {limit} bytes"
+        length = Headers(scope=scope).get("content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI passes HTTPExceptions raised while parsing
+                    # the body through to its exception handler
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
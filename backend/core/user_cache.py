@@ -0,0 +1,194 @@
+# core/user_cache.py
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import TTLCache
+from core.pubsub import RedisSubscriber
+from core.redis import redis_client, redis_sync_client
+from models.users import User
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# Share cached principals between workers through Redis
+USER_CACHE_REDIS = os.getenv("USER_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """
+    The authenticated user as seen by request handlers. Carries the
+    columns endpoints actually read, without an attached ORM session.
+    """
+    id: int
+    username: str
+    email: str
+    full_name: str | None
+    is_admin: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            is_admin=user.is_admin,
+        )
+
+
+_principals = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# Every worker drops the usernames published here from its local cache
+INVALIDATION_CHANNEL = "user_principal_invalidations"
+
+# Invalidations still being sent from the event loop
+_pending: set[asyncio.Task] = set()
+
+
+def _redis_key(username: str) -> str:
+    return f"user_principal:{username}"
+
+
+async def get_cached_user(username: str) -> UserPrincipal | None:
+    principal = _principals.get(username)
+    if principal is not None or not USER_CACHE_REDIS:
+        return principal
+
+    try:
+        raw = await redis_client.get(_redis_key(username))
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+
+    principal = UserPrincipal(**json.loads(raw))
+    _principals.set(username, principal)
+    return principal
+
+
+async def cache_user(user: User) -> UserPrincipal:
+    principal = UserPrincipal.from_user(user)
+    _principals.set(user.username, principal)
+
+    if USER_CACHE_REDIS:
+        try:
+            await redis_client.set(
+                _redis_key(user.username),
+                json.dumps(asdict(principal)),
+                ex=int(USER_CACHE_TTL),
+            )
+        except RedisError:
+            pass
+    return principal
+
+
+def _drop_published(channel: str, data: str) -> None:
+    for username in json.loads(data):
+        _principals.pop(username)
+
+
+invalidation_subscriber = RedisSubscriber(_drop_published)
+
+
+async def _invalidate_shared(usernames: list[str]) -> None:
+    # Redis first, so a worker reloading after the broadcast can't get
+    # the stale principal back from there
+    try:
+        if USER_CACHE_REDIS:
+            await redis_client.delete(*map(_redis_key, usernames))
+        await redis_client.publish(INVALIDATION_CHANNEL, json.dumps(usernames))
+    except RedisError:
+        # Other workers catch up when their entries expire (USER_CACHE_TTL)
+        logger.warning("Could not invalidate cached users %s", usernames, exc_info=True)
+
+
+def _invalidate_shared_sync(usernames: list[str]) -> None:
+    try:
+        if USER_CACHE_REDIS:
+            redis_sync_client.delete(*map(_redis_key, usernames))
+        redis_sync_client.publish(INVALIDATION_CHANNEL, json.dumps(usernames))
+    except RedisError:
+        logger.warning("Could not invalidate cached users %s", usernames, exc_info=True)
+
+
+def invalidate_users(usernames) -> None:
+    """
+    Drop cached principals here at once, and on every other worker and in
+    Redis right after. Called from ORM commit hooks, so it never blocks:
+    on the event loop the Redis calls run as a task, in worker threads
+    they use the sync client.
+    """
+    usernames = sorted(set(usernames))
+    if not usernames:
+        return
+    for username in usernames:
+        _principals.pop(username)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _invalidate_shared_sync(usernames)
+        return
+    task = loop.create_task(_invalidate_shared(usernames))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def invalidate_user(username: str) -> None:
+    invalidate_users([username])
+
+
+async def settle_invalidations() -> None:
+    """Wait for invalidations this worker is still sending (tests, shutdown)."""
+    while _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+async def start_invalidation_listener() -> None:
+    try:
+        await invalidation_subscriber.subscribe(INVALIDATION_CHANNEL)
+    except RedisError:
+        logger.warning("Could not subscribe to user cache invalidations", exc_info=True)
+
+
+async def stop_invalidation_listener() -> None:
+    await settle_invalidations()
+    await invalidation_subscriber.close()
+
+
+# ------------------------
+# Automatic invalidation
+# ------------------------
+# Any UPDATE/DELETE of a user row (admin flag, email, username, ...) drops
+# the cached principal once the transaction commits.
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target: User):
+    session = object_session(target)
+    if session is None:
+        return
+
+    changed = session.info.setdefault("changed_usernames", set())
+    changed.add(target.username)
+    # A rename must also drop the entry cached under the old name
+    changed.update(inspect(target).attrs.username.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session):
+    invalidate_users(session.info.pop("changed_usernames", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session):
+    session.info.pop("changed_usernames", None)
@@ -0,0 +1,228 @@
+# crud/blobs.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, event, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.storage import StoredFile, discard_staged, promote_staged, storage
+from database import AsyncSessionLocal
+from models.blobs import Blob
+from models.homeworks import HomeworkSubmission
+
+logger = logging.getLogger(__name__)
+
+# Unreferenced blobs younger than this are kept: an upload may have just
+# stored one and not yet committed its submission
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+# Seconds between background collections; 0 disables the job
+BLOB_GC_INTERVAL = int(os.getenv("BLOB_GC_INTERVAL", "3600"))
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "500"))
+# A tombstone this old belongs to a collection that died halfway; the
+# next collection finishes it
+BLOB_GC_TOMBSTONE_TIMEOUT = int(os.getenv("BLOB_GC_TOMBSTONE_TIMEOUT", "600"))
+# How long an upload waits for a collection to finish deleting its content
+# before giving up, and how often it checks
+BLOB_TOMBSTONE_WAIT = float(os.getenv("BLOB_TOMBSTONE_WAIT", "30"))
+BLOB_TOMBSTONE_POLL = float(os.getenv("BLOB_TOMBSTONE_POLL", "0.1"))
+
+
+class BlobBeingDeleted(Exception):
+    """The content was still being garbage collected when the upload gave up waiting."""
+
+
+def blob_key(sha256: str) -> str:
+    # Fan out by hash prefix so no single directory grows unbounded
+    return f"blobs/{sha256[:2]}/{sha256}"
+
+
+async def _touch_blob(db: AsyncSession, sha256: str, now: datetime) -> bool:
+    # A tombstoned blob is not touched: its object may already be gone
+    result = await db.execute(
+        update(Blob)
+        .where(Blob.sha256 == sha256, Blob.deleting_at.is_(None))
+        .values(last_seen_at=now)
+    )
+    return result.rowcount > 0
+
+
+async def store_blob_async(
+    db: AsyncSession,
+    staged: StoredFile,
+    *,
+    wait: float | None = None,
+) -> Blob:
+    """
+    Resolve a staged upload to its blob, writing the content to storage
+    only if no blob with the same hash exists yet. Consumes the staged
+    file. The returned blob is not referenced yet; recording a submission
+    that points at it takes the reference.
+
+    If garbage collection is deleting the same content, waits up to `wait`
+    seconds (BLOB_TOMBSTONE_WAIT by default) for it to finish, then stores
+    the content again. Raises BlobBeingDeleted if it doesn't finish in time.
+    """
+    deadline = asyncio.get_running_loop().time() + (BLOB_TOMBSTONE_WAIT if wait is None else wait)
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            if await _touch_blob(db, staged.sha256, now):
+                await db.commit()
+                break
+
+            tombstoned = await db.scalar(select(Blob.deleting_at).where(Blob.sha256 == staged.sha256))
+            await db.commit()
+            if tombstoned is not None:
+                # Writing the object now could race the collector's delete
+                if asyncio.get_running_loop().time() >= deadline:
+                    raise BlobBeingDeleted(staged.sha256)
+                await asyncio.sleep(BLOB_TOMBSTONE_POLL)
+                continue
+
+            key = blob_key(staged.sha256)
+            await asyncio.to_thread(promote_staged, staged, key)
+            db.add(Blob(
+                sha256=staged.sha256,
+                size=staged.size,
+                storage_key=key,
+                ref_count=0,
+                created_at=now,
+                last_seen_at=now,
+            ))
+            try:
+                await db.commit()
+                break
+            except IntegrityError:
+                # Someone stored the same content concurrently, under the
+                # same key, and our staged file is already moved there.
+                # Use their row; there is nothing left to promote again.
+                await db.rollback()
+                if await _touch_blob(db, staged.sha256, datetime.now(timezone.utc)):
+                    await db.commit()
+                    break
+                await db.commit()
+                # Their blob is being collected, and the object with it
+                raise BlobBeingDeleted(staged.sha256)
+    finally:
+        await asyncio.to_thread(discard_staged, staged)
+
+    return await db.get(Blob, staged.sha256)
+
+
+# ------------------------
+# Reference counting
+# ------------------------
+# Taking a reference happens with the submission insert (see
+# crud.homeworks); deleting a submission through the ORM releases it.
+
+def reference_blob_statement(sha256: str):
+    return update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count + 1)
+
+
+@event.listens_for(HomeworkSubmission, "after_delete")
+def _release_blob(mapper, connection, target: HomeworkSubmission):
+    if target.blob_sha256 is not None:
+        connection.execute(
+            update(Blob)
+            .where(Blob.sha256 == target.blob_sha256)
+            .values(ref_count=Blob.ref_count - 1)
+        )
+
+
+# ------------------------
+# Garbage collection
+# ------------------------
+# Three steps per batch, each its own transaction: tombstone the rows,
+# delete the objects, delete the rows. An upload of the same content in
+# the meantime can't touch the tombstoned row, so it waits for the row to
+# go and then stores the content afresh (see store_blob_async); it never
+# ends up pointing at an object that is about to be deleted.
+
+async def collect_unreferenced_blobs_async(
+    db: AsyncSession,
+    *,
+    grace_seconds: int = BLOB_GC_GRACE_SECONDS,
+    tombstone_timeout: int = BLOB_GC_TOMBSTONE_TIMEOUT,
+) -> int:
+    """Delete unreferenced blobs past the grace period. Returns how many."""
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=grace_seconds)
+    collectable = (
+        Blob.ref_count == 0,
+        or_(
+            and_(Blob.deleting_at.is_(None), Blob.last_seen_at < cutoff),
+            # Left behind by a collection that didn't finish
+            Blob.deleting_at < now - timedelta(seconds=tombstone_timeout),
+        ),
+    )
+    collected = 0
+
+    while True:
+        candidates = (
+            await db.scalars(select(Blob.sha256).where(*collectable).limit(BLOB_GC_BATCH_SIZE))
+        ).all()
+        if not candidates:
+            return collected
+
+        # Conditions are re-checked here, so a blob referenced or
+        # re-uploaded since the select survives
+        tombstoned = (
+            await db.execute(
+                update(Blob)
+                .where(Blob.sha256.in_(candidates), *collectable)
+                .values(deleting_at=now)
+                .returning(Blob.sha256, Blob.storage_key)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await db.commit()
+
+        for _, key in tombstoned:
+            await asyncio.to_thread(storage.delete, key)
+
+        await db.execute(
+            delete(Blob)
+            .where(Blob.sha256.in_([sha256 for sha256, _ in tombstoned]), Blob.deleting_at == now)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        collected += len(tombstoned)
+
+
+async def run_blob_gc(interval: int = BLOB_GC_INTERVAL):
+    """Background job: collect unreferenced blobs every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                collected = await collect_unreferenced_blobs_async(db)
+            if collected:
+                logger.info("Collected %d unreferenced blobs", collected)
+        except Exception:
+            logger.exception("Blob garbage collection failed")
+
+
+# ------------------------
+# Reporting
+# ------------------------
+async def get_blob_storage_report_async(db: AsyncSession) -> dict:
+    submissions, logical_bytes = (
+        await db.execute(
+            select(func.count(HomeworkSubmission.id), func.coalesce(func.sum(Blob.size), 0))
+            .join(Blob, Blob.sha256 == HomeworkSubmission.blob_sha256)
+        )
+    ).one()
+    blobs, stored_bytes = (
+        await db.execute(select(func.count(Blob.sha256), func.coalesce(func.sum(Blob.size), 0)))
+    ).one()
+
+    return {
+        "submissions": submissions,
+        "blobs": blobs,
+        "logical_bytes": logical_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": max(logical_bytes - stored_bytes, 0),
+    }
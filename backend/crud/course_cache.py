@@ -0,0 +1,158 @@
+# crud/course_cache.py
+import json
+import os
+from dataclasses import dataclass
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import TTLCache
+from core.http_cache import strong_etag
+from core.pagination import PageParams
+from core.redis import redis_client, redis_sync_client
+from crud.courses import get_all_courses_async
+from models.courses import Course
+from schemas.courses import CourseOut
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "256"))
+# Share rendered pages between workers through Redis
+CATALOG_CACHE_REDIS = os.getenv("CATALOG_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+# How long clients may reuse a page before revalidating with If-None-Match
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+
+# Bumped by every invalidation, on any worker. Each generation's pages
+# live in their own Redis hash, so invalidating is a single INCR and a
+# page rendered from data older than the INCR can only land in a hash
+# that nobody reads any more.
+_GENERATION_KEY = "course_catalog_generation"
+_REDIS_KEY_PREFIX = "course_catalog:"
+
+_courses_adapter = TypeAdapter(list[CourseOut])
+
+
+@dataclass(frozen=True)
+class CatalogPage:
+    """One page of GET /courses/, already serialized."""
+    body: bytes
+    etag: str
+    next_cursor: int | None
+
+
+_pages = TTLCache(maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL)
+# Bumped on this worker's invalidations; a page rendered from an older
+# generation is not cached, so a slow reader can't put back what a commit
+# just dropped
+_generation = 0
+
+
+def _page_key(page: PageParams) -> str:
+    return f"{page.cursor}:{page.limit}"
+
+
+async def _shared_generation() -> int | None:
+    """The Redis generation, or None if Redis is unreachable."""
+    try:
+        return int(await redis_client.get(_GENERATION_KEY) or 0)
+    except RedisError:
+        return None
+
+
+async def _get_shared(shared: int, key: str) -> CatalogPage | None:
+    try:
+        raw = await redis_client.hget(f"{_REDIS_KEY_PREFIX}{shared}", key)
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+
+    data = json.loads(raw)
+    return CatalogPage(data["body"].encode(), data["etag"], data["next_cursor"])
+
+
+async def _set_shared(shared: int, key: str, catalog: CatalogPage):
+    raw = json.dumps({
+        "body": catalog.body.decode(),
+        "etag": catalog.etag,
+        "next_cursor": catalog.next_cursor,
+    })
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(f"{_REDIS_KEY_PREFIX}{shared}", key, raw)
+            pipe.expire(f"{_REDIS_KEY_PREFIX}{shared}", int(CATALOG_CACHE_TTL))
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+async def _render_page(db: AsyncSession, page: PageParams, shared: int | None) -> CatalogPage:
+    courses, next_cursor = await get_all_courses_async(db, page)
+    body = _courses_adapter.dump_json(
+        _courses_adapter.validate_python(courses, from_attributes=True)
+    )
+    return CatalogPage(body, strong_etag(body, shared), next_cursor)
+
+
+async def get_catalog_page(db: AsyncSession, page: PageParams) -> CatalogPage:
+    # With Redis, local pages are also keyed by the shared generation, so a
+    # commit on any worker retires them here on the next request
+    shared = await _shared_generation() if CATALOG_CACHE_REDIS else None
+    key = _page_key(page)
+    local_key = (shared, key)
+    catalog = _pages.get(local_key)
+    if catalog is not None:
+        return catalog
+
+    generation = _generation
+    catalog = await _get_shared(shared, key) if shared is not None else None
+    if catalog is None:
+        catalog = await _render_page(db, page, shared)
+        if shared is not None:
+            await _set_shared(shared, key, catalog)
+
+    if generation == _generation:
+        _pages.set(local_key, catalog)
+    return catalog
+
+
+def invalidate_catalog() -> None:
+    # Synchronous on purpose: it runs from ORM commit hooks, and courses
+    # change rarely
+    global _generation
+    _generation += 1
+    _pages.clear()
+
+    if CATALOG_CACHE_REDIS:
+        try:
+            redis_sync_client.incr(_GENERATION_KEY)
+        except RedisError:
+            pass
+
+
+# ------------------------
+# Automatic invalidation
+# ------------------------
+# Any INSERT/UPDATE/DELETE of a course drops the cached catalog once the
+# transaction commits.
+
+@event.listens_for(Course, "after_insert")
+@event.listens_for(Course, "after_update")
+@event.listens_for(Course, "after_delete")
+def _mark_catalog_changed(mapper, connection, target: Course):
+    session = object_session(target)
+    if session is not None:
+        session.info["course_catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_catalog(session: Session):
+    if session.info.pop("course_catalog_changed", False):
+        invalidate_catalog()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_catalog(session: Session):
+    session.info.pop("course_catalog_changed", None)
@@ -1,7 +1,10 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.courses import Course
 from models.users import User
 from schemas.courses import CourseCreate
+from core.pagination import PageParams, keyset_page, split_page
 
 def enroll_user_in_course(db: Session, user: User, course_id: int):
     course = db.query(Course).filter(Course.id == course_id).first()
@@ -29,4 +32,23 @@ def create_course(db: Session, course_in: CourseCreate):
     db.add(course)
     db.commit()
     db.refresh(course)
-    return course
\ No newline at end of file
+    return course
+
+
+# ------------------------
+# Async versions
+# ------------------------
+async def get_all_courses_async(db: AsyncSession, page: PageParams):
+    stmt = select(Course.id, Course.name, Course.code)
+    rows = (await db.execute(keyset_page(stmt, Course.id, page))).all()
+    return split_page(rows, page)
+
+async def create_course_async(db: AsyncSession, course_in: CourseCreate):
+    course = Course(
+        name=course_in.name,
+        code=course_in.code,
+    )
+    db.add(course)
+    await db.commit()
+    await db.refresh(course)
+    return course
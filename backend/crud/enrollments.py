@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.enrollments import Enrollment
 from models.courses import Course
@@ -42,20 +44,62 @@ def get_user_enrollments(db: Session, user: User):
         .all()
     )
 
-def get_user_courses_with_progress(db: Session, user: User):
-    enrollments = (
-        db.query(Enrollment)
-        .filter(Enrollment.user_id == user.id)
-        .all()
+def _courses_with_progress_statement(user_id: int):
+    # One JOIN, projecting only the columns EnrolledCourseBase needs
+    return (
+        select(
+            Course.id,
+            Course.name,
+            Course.code,
+            Enrollment.progress,
+            Enrollment.completed,
+        )
+        .join(Enrollment, Enrollment.course_id == Course.id)
+        .where(Enrollment.user_id == user_id)
     )
 
-    return [
-        EnrolledCourseBase(
-            id=e.course.id,
-            name=e.course.name,
-            code=e.course.code,
-            progress=e.progress,
-            completed=e.completed,
+def get_user_courses_with_progress(db: Session, user: User):
+    rows = db.execute(_courses_with_progress_statement(user.id))
+    return [EnrolledCourseBase(**row._mapping) for row in rows]
+
+
+# ------------------------
+# Async versions
+# ------------------------
+async def enroll_user_in_course_async(
+    db: AsyncSession,
+    user: User,
+    course_id: int,
+):
+    course = await db.get(Course, course_id)
+    if not course:
+        return None
+
+    existing = await db.scalar(
+        select(Enrollment).where(
+            Enrollment.user_id == user.id,
+            Enrollment.course_id == course_id,
         )
-        for e in enrollments
-    ]
+    )
+    if existing:
+        return existing
+
+    enrollment = Enrollment(
+        user_id=user.id,
+        course_id=course_id,
+    )
+
+    db.add(enrollment)
+    await db.commit()
+    await db.refresh(enrollment)
+    return enrollment
+
+
+async def get_user_enrollments_async(db: AsyncSession, user: User):
+    return (
+        await db.scalars(select(Enrollment).where(Enrollment.user_id == user.id))
+    ).all()
+
+async def get_user_courses_with_progress_async(db: AsyncSession, user: User):
+    rows = await db.execute(_courses_with_progress_statement(user.id))
+    return [EnrolledCourseBase(**row._mapping) for row in rows]
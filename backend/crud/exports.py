@@ -0,0 +1,46 @@
+# crud/exports.py
+from sqlalchemy import select
+
+from models.enrollments import Enrollment
+from models.homeworks import HomeworkSubmission
+from models.users import User
+
+# Statements behind the admin exports. Ordered by id so a streamed export
+# is stable and can be compared between runs.
+
+
+def users_export_statement():
+    return select(
+        User.id,
+        User.username,
+        User.email,
+        User.full_name,
+        User.is_admin,
+    ).order_by(User.id)
+
+
+def enrollments_export_statement(course_id: int | None = None):
+    stmt = select(
+        Enrollment.id,
+        Enrollment.user_id,
+        Enrollment.course_id,
+        Enrollment.progress,
+        Enrollment.completed,
+        Enrollment.enrolled_at,
+    ).order_by(Enrollment.id)
+    if course_id is not None:
+        stmt = stmt.where(Enrollment.course_id == course_id)
+    return stmt
+
+
+def submissions_export_statement(homework_id: int | None = None):
+    stmt = select(
+        HomeworkSubmission.id,
+        HomeworkSubmission.homework_id,
+        HomeworkSubmission.user_id,
+        HomeworkSubmission.file_url,
+        HomeworkSubmission.submitted_at,
+    ).order_by(HomeworkSubmission.id)
+    if homework_id is not None:
+        stmt = stmt.where(HomeworkSubmission.homework_id == homework_id)
+    return stmt
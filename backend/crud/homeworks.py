@@ -1,7 +1,12 @@
+from sqlalchemy import select
+from models.blobs import Blob
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.homeworks import Homework, HomeworkSubmission
 from schemas.homeworks import HomeworkCreate, HomeworkSubmissionCreate
 from datetime import datetime, timezone
+from core.pagination import PageParams, keyset_page, split_page
+from crud.blobs import reference_blob_statement
 
 def create_homework(db: Session, homework_in: HomeworkCreate):
     homework = Homework(**homework_in.dict())
@@ -18,9 +23,14 @@ def submit_homework(db: Session, homework_id: int, user_id: int, submission_in:
         homework_id=homework_id,
         user_id=user_id,
         file_url=submission_in.file_url,
+        filename=submission_in.filename,
+        blob_sha256=submission_in.blob_sha256,
         submitted_at=datetime.now(timezone.utc)
     )
     db.add(submission)
+    if submission_in.blob_sha256:
+        # Same transaction as the insert, so the count can't drift
+        db.execute(reference_blob_statement(submission_in.blob_sha256))
     db.commit()
     db.refresh(submission)
     return submission
@@ -30,4 +40,99 @@ def get_user_homework_submissions(db: Session, user_id: int):
 
 
 def get_homework_submissions(db: Session, homework_id: int):
-    return db.query(HomeworkSubmission).filter(HomeworkSubmission.homework_id == homework_id).all()
\ No newline at end of file
+    return db.query(HomeworkSubmission).filter(HomeworkSubmission.homework_id == homework_id).all()
+
+
+# ------------------------
+# Async versions
+# ------------------------
+async def create_homework_async(db: AsyncSession, homework_in: HomeworkCreate):
+    homework = Homework(**homework_in.dict())
+    db.add(homework)
+    await db.commit()
+    await db.refresh(homework)
+    return homework
+
+async def get_homework_async(db: AsyncSession, homework_id: int):
+    return await db.get(Homework, homework_id)
+
+async def get_course_homeworks_async(db: AsyncSession, course_id: int):
+    return (
+        await db.scalars(select(Homework).where(Homework.course_id == course_id))
+    ).all()
+
+async def submit_homework_async(db: AsyncSession, homework_id: int, user_id: int, submission_in: HomeworkSubmissionCreate):
+    submission = HomeworkSubmission(
+        homework_id=homework_id,
+        user_id=user_id,
+        file_url=submission_in.file_url,
+        filename=submission_in.filename,
+        blob_sha256=submission_in.blob_sha256,
+        submitted_at=datetime.now(timezone.utc)
+    )
+    db.add(submission)
+    if submission_in.blob_sha256:
+        # Same transaction as the insert, so the count can't drift
+        await db.execute(reference_blob_statement(submission_in.blob_sha256))
+    await db.commit()
+    await db.refresh(submission)
+    return submission
+
+async def get_user_homework_submissions_async(db: AsyncSession, user_id: int):
+    return (
+        await db.scalars(select(HomeworkSubmission).where(HomeworkSubmission.user_id == user_id))
+    ).all()
+
+async def get_homework_submissions_async(
+    db: AsyncSession,
+    homework_id: int,
+    page: PageParams,
+    *,
+    submitted_from: datetime | None = None,
+    submitted_to: datetime | None = None,
+):
+    stmt = select(
+        HomeworkSubmission.id,
+        HomeworkSubmission.homework_id,
+        HomeworkSubmission.user_id,
+        HomeworkSubmission.file_url,
+        HomeworkSubmission.submitted_at,
+    ).where(HomeworkSubmission.homework_id == homework_id)
+    if submitted_from is not None:
+        stmt = stmt.where(HomeworkSubmission.submitted_at >= submitted_from)
+    if submitted_to is not None:
+        stmt = stmt.where(HomeworkSubmission.submitted_at < submitted_to)
+
+    rows = (await db.execute(keyset_page(stmt, HomeworkSubmission.id, page))).all()
+    return split_page(rows, page)
+
+
+def _submission_files_statement():
+    return select(
+        HomeworkSubmission.id,
+        HomeworkSubmission.homework_id,
+        HomeworkSubmission.user_id,
+        HomeworkSubmission.filename,
+        HomeworkSubmission.submitted_at,
+        Blob.sha256,
+        Blob.size,
+        Blob.storage_key,
+        Blob.created_at,
+    ).join(Blob, Blob.sha256 == HomeworkSubmission.blob_sha256)
+
+
+async def get_submission_file_async(db: AsyncSession, submission_id: int):
+    """The submission's stored file, or None if it has none in blob storage."""
+    return (
+        await db.execute(_submission_files_statement().where(HomeworkSubmission.id == submission_id))
+    ).one_or_none()
+
+
+async def get_homework_submission_files_async(db: AsyncSession, homework_id: int):
+    return (
+        await db.execute(
+            _submission_files_statement()
+            .where(HomeworkSubmission.homework_id == homework_id)
+            .order_by(HomeworkSubmission.id)
+        )
+    ).all()
@@ -1,3 +1,5 @@
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.live_class_messages import LiveClassMessage
 
@@ -19,19 +21,79 @@ def create_live_chat_message(
     return msg
 
 
+def bulk_create_live_chat_messages(db: Session, rows: list[dict]):
+    """
+    Insert many messages with one multi-row INSERT ... RETURNING.
+    Returns (id, created_at) rows in the same order as `rows`.
+    """
+    result = db.execute(
+        insert(LiveClassMessage).returning(
+            LiveClassMessage.id,
+            LiveClassMessage.created_at,
+            sort_by_parameter_order=True,
+        ),
+        rows,
+    )
+    inserted = result.all()
+    db.commit()
+    return inserted
+
+
+def _live_chat_messages_statement(
+    live_class_id: int,
+    limit: int,
+    before_id: int | None,
+    after_id: int | None,
+):
+    """
+    Keyset query on (live_class_id, id). Returns the statement and whether
+    its rows come newest first and must be reversed.
+    """
+    stmt = select(LiveClassMessage).where(
+        LiveClassMessage.live_class_id == live_class_id
+    )
+    if before_id is not None:
+        stmt = stmt.where(LiveClassMessage.id < before_id)
+
+    if after_id is not None:
+        stmt = stmt.where(LiveClassMessage.id > after_id)
+        return stmt.order_by(LiveClassMessage.id.asc()).limit(limit), False
+
+    return stmt.order_by(LiveClassMessage.id.desc()).limit(limit), True
+
+
 # crud/live_chat.py
 def get_live_chat_messages(
     db: Session,
     live_class_id: int,
-    limit: int = 50
+    limit: int = 50,
+    *,
+    before_id: int | None = None,
+    after_id: int | None = None,
 ):
-    return (
-        db.query(LiveClassMessage)
-        .filter(LiveClassMessage.live_class_id == live_class_id)
-        .order_by(LiveClassMessage.created_at.desc())
-        .limit(limit)
-        .all()[::-1]  # oldest → newest
-    )
+    """
+    Keyset-paginated history, always returned oldest → newest.
+
+    - no cursor: the latest `limit` messages
+    - before_id: the page just older than `before_id` (scrolling back)
+    - after_id: the first `limit` messages newer than `after_id` (delta sync)
+    """
+    stmt, newest_first = _live_chat_messages_statement(live_class_id, limit, before_id, after_id)
+    messages = db.scalars(stmt).all()
+    return messages[::-1] if newest_first else messages  # oldest → newest
+
+
+async def get_live_chat_messages_async(
+    db: AsyncSession,
+    live_class_id: int,
+    limit: int = 50,
+    *,
+    before_id: int | None = None,
+    after_id: int | None = None,
+):
+    stmt, newest_first = _live_chat_messages_statement(live_class_id, limit, before_id, after_id)
+    messages = (await db.scalars(stmt)).all()
+    return messages[::-1] if newest_first else messages  # oldest → newest
 
 def chat_channel(live_class_id: int) -> str:
     return f"live_class_chat:{live_class_id}"
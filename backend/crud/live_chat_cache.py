@@ -0,0 +1,185 @@
+# crud/live_chat_cache.py
+import json
+import os
+
+from redis.exceptions import RedisError
+
+from core.redis import redis_client
+from crud.live_chat import chat_channel
+
+# How many recent messages are kept per live class
+CHAT_HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "50"))
+# Idle history buffers expire after this many seconds
+CHAT_HISTORY_TTL = int(os.getenv("CHAT_HISTORY_TTL", str(6 * 60 * 60)))
+# Upper bound on a warm-up's database read; a slower one is not cached
+CHAT_HISTORY_WARMING_TTL = int(os.getenv("CHAT_HISTORY_WARMING_TTL", "30"))
+
+# A reader that finds the buffer cold marks it as warming before reading
+# the database, and appends land from then on. The warm step merges them
+# with the database snapshot by message id, so nothing published while
+# the snapshot was read gets lost. The buffer is a sorted set scored by
+# message id, trimmed to the newest entries.
+# Keys share the class id as hash tag, for Redis Cluster.
+
+# Append to the buffer only once it's warm or warming, otherwise a cold
+# buffer would look complete with just the newest messages.
+# KEYS[1] = history zset, KEYS[2] = warm marker, KEYS[3] = warming marker
+# ARGV[1] = message id, ARGV[2] = entry, ARGV[3] = size, ARGV[4] = ttl
+_APPEND_SCRIPT = """
+local warm = redis.call('EXISTS', KEYS[2]) == 1
+if not warm and redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[3]) - 1)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+if warm then
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+return 1
+"""
+
+# Start warming a cold buffer. Concurrent readers share one warm-up: only
+# the first clears what's left of an expired buffer.
+# KEYS as above; ARGV[1] = how long the warming marker lives
+# Returns 0 when the buffer is already warm.
+_BEGIN_WARM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return 0
+end
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    redis.call('DEL', KEYS[1])
+end
+redis.call('SET', KEYS[3], 1, 'EX', ARGV[1])
+return 1
+"""
+
+# Merge a database snapshot into a warming buffer and mark it warm. A
+# snapshot entry replaces the appended entry with the same id. A no-op
+# when another reader finished first, or when the warming marker has
+# expired (appends may have been missed; the next reader starts over).
+# KEYS as above; ARGV[1] = ttl, ARGV[2] = size, ARGV[3..] = id, entry pairs
+_WARM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 or redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+for i = 3, #ARGV, 2 do
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], ARGV[i], ARGV[i])
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -tonumber(ARGV[2]) - 1)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('SET', KEYS[2], 1, 'EX', ARGV[1])
+redis.call('DEL', KEYS[3])
+return 1
+"""
+
+_append_history = redis_client.register_script(_APPEND_SCRIPT)
+_begin_warm_history = redis_client.register_script(_BEGIN_WARM_SCRIPT)
+_warm_history = redis_client.register_script(_WARM_SCRIPT)
+
+
+def chat_history_key(live_class_id: int) -> str:
+    return f"live_class_chat_recent:{{{live_class_id}}}"
+
+
+def _chat_history_warm_key(live_class_id: int) -> str:
+    return f"live_class_chat_recent_warm:{{{live_class_id}}}"
+
+
+def _chat_history_warming_key(live_class_id: int) -> str:
+    return f"live_class_chat_recent_warming:{{{live_class_id}}}"
+
+
+def _history_keys(live_class_id: int) -> list[str]:
+    return [
+        chat_history_key(live_class_id),
+        _chat_history_warm_key(live_class_id),
+        _chat_history_warming_key(live_class_id),
+    ]
+
+
+def _history_entry(
+    *,
+    id: int,
+    live_class_id: int,
+    user_id: int,
+    message: str,
+    created_at: str,
+) -> str:
+    # Same fields as LiveChatMessageOut
+    return json.dumps({
+        "id": id,
+        "live_class_id": live_class_id,
+        "user_id": user_id,
+        "message": message,
+        "created_at": created_at,
+    })
+
+
+async def publish_live_chat_message(live_class_id: int, payload: dict):
+    """
+    Publish a saved message to the class channel and append it to the
+    recent-history buffer.
+    """
+    await redis_client.publish(chat_channel(live_class_id), json.dumps(payload))
+
+    entry = _history_entry(
+        id=payload["id"],
+        live_class_id=live_class_id,
+        user_id=payload["user_id"],
+        message=payload["message"],
+        created_at=payload["created_at"],
+    )
+    try:
+        await _append_history(
+            keys=_history_keys(live_class_id),
+            args=[payload["id"], entry, CHAT_HISTORY_SIZE, CHAT_HISTORY_TTL],
+        )
+    except RedisError:
+        # The database is still the source of truth
+        pass
+
+
+async def get_cached_chat_history(live_class_id: int) -> list[dict] | None:
+    """Recent messages oldest → newest, or None when the buffer is cold."""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.exists(_chat_history_warm_key(live_class_id))
+            pipe.zrange(chat_history_key(live_class_id), 0, -1)
+            warm, entries = await pipe.execute()
+    except RedisError:
+        return None
+
+    if not warm:
+        return None
+    return [json.loads(e) for e in entries]
+
+
+async def begin_chat_history_warm(live_class_id: int) -> None:
+    """
+    Call before reading the history from the database for
+    warm_chat_history, so messages published meanwhile are kept.
+    """
+    try:
+        await _begin_warm_history(keys=_history_keys(live_class_id), args=[CHAT_HISTORY_WARMING_TTL])
+    except RedisError:
+        pass
+
+
+async def warm_chat_history(live_class_id: int, messages: list) -> None:
+    """Fill a warming buffer from LiveClassMessage rows (oldest → newest)."""
+    args = [CHAT_HISTORY_TTL, CHAT_HISTORY_SIZE]
+    for m in messages[-CHAT_HISTORY_SIZE:]:
+        args.append(m.id)
+        args.append(_history_entry(
+            id=m.id,
+            live_class_id=m.live_class_id,
+            user_id=m.user_id,
+            message=m.message,
+            created_at=m.created_at.isoformat(),
+        ))
+    try:
+        await _warm_history(keys=_history_keys(live_class_id), args=args)
+    except RedisError:
+        pass
@@ -0,0 +1,181 @@
+# crud/live_chat_writer.py
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from core.metrics import Counter, Gauge
+from database import SessionLocal
+from crud.live_chat import bulk_create_live_chat_messages
+
+# Flush when this many messages are buffered ...
+CHAT_FLUSH_SIZE = int(os.getenv("CHAT_FLUSH_SIZE", "200"))
+# ... or when the oldest buffered message has waited this long
+CHAT_FLUSH_INTERVAL_MS = int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "10"))
+
+# Dedicated thread for chat writes, so the event loop never blocks on a
+# commit and chat doesn't compete with the HTTP threadpool. Batches are
+# flushed one at a time, which also keeps rows in arrival order.
+_chat_db_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="chat-db",
+)
+
+
+# Queue marker that tells the writer task to finish
+_STOP = object()
+
+
+def _fail_pending(queue: asyncio.Queue):
+    while not queue.empty():
+        item = queue.get_nowait()
+        if item is not _STOP and not item[1].done():
+            item[1].set_exception(RuntimeError("Chat writer stopped before the message was written"))
+
+
+def _save_batch(rows: list[dict]):
+    db = SessionLocal()
+    try:
+        return bulk_create_live_chat_messages(db, rows)
+    finally:
+        db.close()
+
+
+class ChatMessageWriter:
+    """
+    Write-behind buffer for LiveClassMessage rows. Messages from every
+    live class in this process are collected and written in batches;
+    each caller still gets its own (id, created_at) back.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_size: int = CHAT_FLUSH_SIZE,
+        flush_interval_ms: int = CHAT_FLUSH_INTERVAL_MS,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue: asyncio.Queue | None = None
+        self._full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        # Set by close(); later writes skip the buffer
+        self._closed = False
+
+        # Counters for monitoring
+        self.rows_written = 0
+        self.batches_written = 0
+        self.failed_batches = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self.queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        # If the task dies (cancelled, say), nobody will flush what's left
+        queue = self.queue
+        self._task.add_done_callback(lambda task: _fail_pending(queue))
+
+    async def write(self, *, live_class_id: int, user_id: int, message: str):
+        """Buffer one message and wait until its batch is committed."""
+        row = {
+            "live_class_id": live_class_id,
+            "user_id": user_id,
+            "message": message,
+            "created_at": datetime.now(timezone.utc),
+        }
+        if self._closed:
+            # Shutting down: nothing would flush a buffered row, write it now
+            loop = asyncio.get_running_loop()
+            saved = await loop.run_in_executor(_chat_db_executor, _save_batch, [row])
+            self.rows_written += 1
+            return saved[0]
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        if self.queue.qsize() >= self.flush_size:
+            self._full.set()
+
+        return await future
+
+    async def close(self):
+        """Flush everything still buffered and stop the writer task."""
+        self._closed = True
+        if not self._task or self._task.done():
+            return
+        self.queue.put_nowait(_STOP)
+        # The writer may not have started waiting yet; don't let it
+        # sit out a flush interval once it does
+        self._stopping = True
+        self._full.set()
+        await self._task
+        self._task = None
+
+    def _take_batch(self, batch: list) -> tuple[list, bool]:
+        while len(batch) < self.flush_size and not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+
+            if self.queue.qsize() + 1 < self.flush_size and not self._stopping:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, stopping = self._take_batch([item])
+            await self._flush(batch)
+            if stopping:
+                # Anything queued before the stop marker is already flushed
+                return
+
+    async def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            inserted = await loop.run_in_executor(_chat_db_executor, _save_batch, rows)
+        except Exception as exc:
+            self.failed_batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.rows_written += len(rows)
+        self.batches_written += 1
+        for (_, future), saved in zip(batch, inserted):
+            if not future.done():
+                future.set_result(saved)
+
+
+chat_writer = ChatMessageWriter()
+
+Gauge("chat_writer_queue_depth", "Chat messages waiting to be written").set_function(
+    lambda: chat_writer.queue_depth
+)
+Counter("chat_writer_rows_written_total", "Chat messages written").set_function(
+    lambda: chat_writer.rows_written
+)
+Counter("chat_writer_batches_written_total", "Chat message batches written").set_function(
+    lambda: chat_writer.batches_written
+)
+Counter("chat_writer_failed_batches_total", "Chat message batches that failed to write").set_function(
+    lambda: chat_writer.failed_batches
+)
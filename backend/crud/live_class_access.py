@@ -0,0 +1,156 @@
+# crud/live_class_access.py
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import event, exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import TTLCache
+from models.enrollments import Enrollment
+from models.live_classes import LiveClass
+from models.users import User
+
+# Upper bound on how long a granted join is reused. Entries never outlive
+# the class; other workers see unenrollments once this runs out
+LIVE_CLASS_ACCESS_TTL = float(os.getenv("LIVE_CLASS_ACCESS_TTL", "60"))
+LIVE_CLASS_ACCESS_CACHE_SIZE = int(os.getenv("LIVE_CLASS_ACCESS_CACHE_SIZE", "50000"))
+
+
+@dataclass(frozen=True)
+class LiveClassAccess:
+    """What a join needs to know about a class, and whether the user is enrolled."""
+    id: int
+    course_id: int
+    starts_at: datetime
+    ends_at: datetime
+    meeting_url: str
+    enrolled: bool
+
+    def is_live(self, now: datetime) -> bool:
+        return self.starts_at <= now <= self.ends_at
+
+
+# (user_id, class_id) -> LiveClassAccess, only for enrolled users inside the class window
+_granted = TTLCache(maxsize=LIVE_CLASS_ACCESS_CACHE_SIZE, ttl=LIVE_CLASS_ACCESS_TTL)
+# Bumped on invalidation, like the catalog cache: a decision read before a
+# commit dropped the cache must not be put back after it
+_generation = 0
+
+
+def live_class_access_statement(class_id: int, user_id: int):
+    # One round trip: the class row plus an EXISTS probe on the
+    # unique (user_id, course_id) enrollment index
+    enrolled = exists().where(
+        Enrollment.user_id == user_id,
+        Enrollment.course_id == LiveClass.course_id,
+    )
+    return select(
+        LiveClass.id,
+        LiveClass.course_id,
+        LiveClass.starts_at,
+        LiveClass.ends_at,
+        LiveClass.meeting_url,
+        enrolled.label("enrolled"),
+    ).where(LiveClass.id == class_id)
+
+
+def _check(access: LiveClassAccess | None, now: datetime, *, is_admin: bool, admin_bypass: bool):
+    if access is None:
+        raise HTTPException(404, "Class not found")
+    if admin_bypass and is_admin:
+        return
+    if not access.enrolled:
+        raise HTTPException(403, "You are not enrolled in this course")
+    if now < access.starts_at:
+        raise HTTPException(403, "Class has not started yet")
+    if now > access.ends_at:
+        raise HTTPException(403, "Class has ended")
+
+
+def _remember(user_id: int, access: LiveClassAccess, now: datetime, generation: int):
+    if generation != _generation or not access.enrolled or not access.is_live(now):
+        return
+    ttl = min(LIVE_CLASS_ACCESS_TTL, (access.ends_at - now).total_seconds())
+    if ttl > 0:
+        _granted.set((user_id, access.id), access, ttl=ttl)
+
+
+def _to_access(row) -> LiveClassAccess | None:
+    return None if row is None else LiveClassAccess(**row._mapping)
+
+
+def authorize_live_class(db: Session, *, class_id: int, user: User, admin_bypass: bool = False) -> LiveClassAccess:
+    now = datetime.now(timezone.utc)
+    access = _granted.get((user.id, class_id))
+    if access is None:
+        generation = _generation
+        access = _to_access(db.execute(live_class_access_statement(class_id, user.id)).first())
+        _check(access, now, is_admin=user.is_admin, admin_bypass=admin_bypass)
+        _remember(user.id, access, now, generation)
+        return access
+
+    _check(access, now, is_admin=user.is_admin, admin_bypass=admin_bypass)
+    return access
+
+
+async def authorize_live_class_async(
+    db: AsyncSession,
+    *,
+    class_id: int,
+    user: User,
+    admin_bypass: bool = False,
+) -> LiveClassAccess:
+    """
+    Can `user` join class `class_id` right now? Raises HTTPException (404
+    or 403) if not. With `admin_bypass`, admins only need the class to
+    exist. Granted joins are cached per (user, class) until the TTL or
+    the end of the class, whichever comes first.
+    """
+    now = datetime.now(timezone.utc)
+    access = _granted.get((user.id, class_id))
+    if access is None:
+        generation = _generation
+        row = (await db.execute(live_class_access_statement(class_id, user.id))).first()
+        access = _to_access(row)
+        _check(access, now, is_admin=user.is_admin, admin_bypass=admin_bypass)
+        _remember(user.id, access, now, generation)
+        return access
+
+    _check(access, now, is_admin=user.is_admin, admin_bypass=admin_bypass)
+    return access
+
+
+def invalidate_live_class_access() -> None:
+    global _generation
+    _generation += 1
+    _granted.clear()
+
+
+# ------------------------
+# Automatic invalidation
+# ------------------------
+# Rescheduling or deleting a class, or removing an enrollment, drops every
+# cached decision once the transaction commits. Both are rare next to joins.
+
+@event.listens_for(LiveClass, "after_update")
+@event.listens_for(LiveClass, "after_delete")
+@event.listens_for(Enrollment, "after_update")
+@event.listens_for(Enrollment, "after_delete")
+def _mark_access_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["live_class_access_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_access(session: Session):
+    if session.info.pop("live_class_access_changed", False):
+        invalidate_live_class_access()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_access_changes(session: Session):
+    session.info.pop("live_class_access_changed", None)
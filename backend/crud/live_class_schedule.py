@@ -0,0 +1,242 @@
+# crud/live_class_schedule.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import TTLCache
+from core.redis import redis_client, redis_sync_client
+from core.schedule_index import ScheduledClass, ScheduleIndex
+from database import AsyncSessionLocal
+from models.enrollments import Enrollment
+from models.live_classes import LiveClass
+
+logger = logging.getLogger(__name__)
+
+# Seconds between full reloads, which also pick up classes created by
+# other workers and drop finished ones
+SCHEDULE_REFRESH_INTERVAL = int(os.getenv("SCHEDULE_REFRESH_INTERVAL", "60"))
+USER_COURSES_CACHE_TTL = float(os.getenv("USER_COURSES_CACHE_TTL", "300"))
+USER_COURSES_CACHE_SIZE = int(os.getenv("USER_COURSES_CACHE_SIZE", "10000"))
+
+# Ongoing and upcoming classes of every course, for this worker
+schedule = ScheduleIndex()
+
+# Changes committed while a reload is reading, replayed on top of it so
+# the reload's older snapshot doesn't undo them
+_changes_during_load: dict[int, ScheduledClass | None] | None = None
+
+# user_id -> (Redis generation it was read at, enrolled course ids)
+_user_courses = TTLCache(maxsize=USER_COURSES_CACHE_SIZE, ttl=USER_COURSES_CACHE_TTL)
+
+# Enrollment changes bump the user's generation in Redis, like the course
+# catalog's, so every worker's cached course ids go stale at once
+_USER_COURSES_GENERATION_PREFIX = "user_courses_generation:"
+
+# Generation bumps still being sent from the event loop
+_pending: set[asyncio.Task] = set()
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    # Naive input is stored as UTC by the timestamptz columns
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _scheduled(live_class: LiveClass) -> ScheduledClass:
+    return ScheduledClass(
+        starts_at=_utc(live_class.starts_at),
+        id=live_class.id,
+        course_id=live_class.course_id,
+        title=live_class.title,
+        ends_at=_utc(live_class.ends_at),
+        meeting_url=live_class.meeting_url,
+    )
+
+
+async def load_schedule_async(db: AsyncSession) -> int:
+    """Rebuild the index from every class that hasn't ended. Returns its size."""
+    global _changes_during_load
+    now = datetime.now(timezone.utc)
+    _changes_during_load = {}
+    try:
+        rows = (await db.execute(
+            select(
+                LiveClass.starts_at,
+                LiveClass.id,
+                LiveClass.course_id,
+                LiveClass.title,
+                LiveClass.ends_at,
+                LiveClass.meeting_url,
+            ).where(LiveClass.ends_at >= now)
+        )).all()
+        schedule.replace_all(ScheduledClass(**row._mapping) for row in rows)
+        _apply(_changes_during_load, datetime.now(timezone.utc))
+    finally:
+        _changes_during_load = None
+    return len(schedule)
+
+
+async def refresh_schedule() -> int:
+    async with AsyncSessionLocal() as db:
+        return await load_schedule_async(db)
+
+
+async def run_schedule_refresh(interval: int = SCHEDULE_REFRESH_INTERVAL):
+    """Background job: reload the schedule index every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_schedule()
+        except Exception:
+            logger.exception("Schedule refresh failed")
+
+
+# ------------------------
+# Lookups
+# ------------------------
+def _user_courses_generation_key(user_id: int) -> str:
+    return f"{_USER_COURSES_GENERATION_PREFIX}{user_id}"
+
+
+async def _user_courses_generation(user_id: int) -> int | None:
+    """The user's Redis generation, or None if Redis is unreachable."""
+    try:
+        return int(await redis_client.get(_user_courses_generation_key(user_id)) or 0)
+    except RedisError:
+        return None
+
+
+async def get_user_course_ids_async(db: AsyncSession, user_id: int) -> list[int]:
+    # Read before the query: an enrollment committed meanwhile bumps the
+    # generation, so what's cached below is already stale, not wrong for
+    # the whole TTL. Without Redis, other workers catch up on the TTL.
+    generation = await _user_courses_generation(user_id)
+    cached = _user_courses.get(user_id)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    course_ids = (
+        await db.scalars(select(Enrollment.course_id).where(Enrollment.user_id == user_id))
+    ).all()
+    _user_courses.set(user_id, (generation, course_ids))
+    return course_ids
+
+
+async def get_live_now_async(db: AsyncSession, user_id: int) -> list[ScheduledClass]:
+    course_ids = await get_user_course_ids_async(db, user_id)
+    return schedule.live_now(course_ids, datetime.now(timezone.utc))
+
+
+async def get_upcoming_async(db: AsyncSession, user_id: int, limit: int) -> list[ScheduledClass]:
+    course_ids = await get_user_course_ids_async(db, user_id)
+    return schedule.upcoming(course_ids, datetime.now(timezone.utc), limit)
+
+
+# ------------------------
+# Incremental updates
+# ------------------------
+# Class inserts, updates and deletes reach this worker's index when the
+# transaction commits (create_live_class included); other workers catch up
+# on their next refresh. Enrollment changes drop the user's cached courses
+# on every worker.
+
+@event.listens_for(LiveClass, "after_insert")
+@event.listens_for(LiveClass, "after_update")
+def _stage_scheduled(mapper, connection, target: LiveClass):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("schedule_changes", {})[target.id] = _scheduled(target)
+
+
+@event.listens_for(LiveClass, "after_delete")
+def _stage_unscheduled(mapper, connection, target: LiveClass):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("schedule_changes", {})[target.id] = None
+
+
+@event.listens_for(Enrollment, "after_insert")
+@event.listens_for(Enrollment, "after_update")
+@event.listens_for(Enrollment, "after_delete")
+def _stage_enrollment(mapper, connection, target: Enrollment):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("enrollment_users", set()).add(target.user_id)
+
+
+def _apply(changes: dict[int, ScheduledClass | None], now: datetime):
+    for class_id, entry in changes.items():
+        if entry is None or entry.ends_at is None or entry.ends_at < now:
+            schedule.remove(class_id)
+        else:
+            schedule.add(entry)
+
+
+async def _bump_user_courses(user_ids: list[int]) -> None:
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.incr(_user_courses_generation_key(user_id))
+            await pipe.execute()
+    except RedisError:
+        logger.warning("Could not invalidate enrolled courses of %s", user_ids, exc_info=True)
+
+
+def _bump_user_courses_sync(user_ids: list[int]) -> None:
+    try:
+        with redis_sync_client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.incr(_user_courses_generation_key(user_id))
+            pipe.execute()
+    except RedisError:
+        logger.warning("Could not invalidate enrolled courses of %s", user_ids, exc_info=True)
+
+
+def invalidate_user_courses(user_ids) -> None:
+    """
+    Drop cached course ids here at once and, through the Redis generation,
+    on every worker. Called from commit hooks, so it never blocks the
+    event loop: there the bump runs as a task.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        _user_courses.pop(user_id)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _bump_user_courses_sync(user_ids)
+        return
+    task = loop.create_task(_bump_user_courses(user_ids))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+async def settle_user_courses_invalidations() -> None:
+    """Wait for generation bumps this worker is still sending (tests, shutdown)."""
+    while _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_schedule_changes(session: Session):
+    changes = session.info.pop("schedule_changes", {})
+    _apply(changes, datetime.now(timezone.utc))
+    if _changes_during_load is not None:
+        _changes_during_load.update(changes)
+    invalidate_user_courses(session.info.pop("enrollment_users", ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_schedule_changes(session: Session):
+    session.info.pop("schedule_changes", None)
+    session.info.pop("enrollment_users", None)
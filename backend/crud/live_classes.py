@@ -1,10 +1,13 @@
 from datetime import datetime, timezone
+from sqlalchemy import and_, not_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.live_classes import LiveClass
 from schemas.live_classes import LiveClassCreate
 from models.enrollments import Enrollment
 from models.users import User
-from fastapi import HTTPException
+from core.pagination import PageParams, keyset_page, split_page
+from crud.live_class_access import LiveClassAccess, authorize_live_class, authorize_live_class_async
 
 def create_live_class(db: Session, live_class_in: LiveClassCreate):
     live_class = LiveClass(**live_class_in.dict())
@@ -14,26 +17,9 @@ def create_live_class(db: Session, live_class_in: LiveClassCreate):
     return live_class
 
 
-def get_joinable_live_class(db: Session, *, class_id: int, user: User) -> LiveClass:
-    live_class = db.query(LiveClass).get(class_id)
-    if not live_class:
-        raise HTTPException(404, "Class not found")
-
-    enrollment = db.query(Enrollment).filter(
-        Enrollment.user_id == user.id,
-        Enrollment.course_id == live_class.course_id
-    ).first()
-    if not enrollment:
-        raise HTTPException(403, "You are not enrolled in this course")
-
-    now = datetime.now(timezone.utc)
-    if now < live_class.starts_at:
-        raise HTTPException(403, "Class has not started yet")
-    if now > live_class.ends_at:
-        raise HTTPException(403, "Class has ended")
-
-    # ✅ no need to assign is_live
-    return live_class
+def get_joinable_live_class(db: Session, *, class_id: int, user: User) -> LiveClassAccess:
+    # Class, enrollment and time window in one query (see crud.live_class_access)
+    return authorize_live_class(db, class_id=class_id, user=user)
 
 def get_user_live_classes(db: Session, user: User):
     return (
@@ -42,3 +28,61 @@ def get_user_live_classes(db: Session, user: User):
         .filter(Enrollment.user_id == user.id)
         .all()
     )
+
+
+# ------------------------
+# Async versions
+# ------------------------
+async def create_live_class_async(db: AsyncSession, live_class_in: LiveClassCreate):
+    live_class = LiveClass(**live_class_in.dict())
+    db.add(live_class)
+    await db.commit()
+    await db.refresh(live_class)
+    return live_class
+
+
+async def get_joinable_live_class_async(db: AsyncSession, *, class_id: int, user: User) -> LiveClassAccess:
+    return await authorize_live_class_async(db, class_id=class_id, user=user)
+
+async def get_user_live_classes_async(db: AsyncSession, user: User):
+    return (
+        await db.scalars(
+            select(LiveClass)
+            .join(Enrollment, Enrollment.course_id == LiveClass.course_id)
+            .where(Enrollment.user_id == user.id)
+        )
+    ).all()
+
+async def get_all_live_classes_async(
+    db: AsyncSession,
+    page: PageParams,
+    *,
+    course_id: int | None = None,
+    starts_from: datetime | None = None,
+    starts_to: datetime | None = None,
+    is_live: bool | None = None,
+):
+    # is_live is computed by the database so it can be filtered on too
+    now = datetime.now(timezone.utc)
+    live = and_(LiveClass.starts_at <= now, LiveClass.ends_at >= now)
+
+    stmt = select(
+        LiveClass.id,
+        LiveClass.course_id,
+        LiveClass.title,
+        LiveClass.starts_at,
+        LiveClass.ends_at,
+        LiveClass.meeting_url,
+        live.label("is_live"),
+    )
+    if course_id is not None:
+        stmt = stmt.where(LiveClass.course_id == course_id)
+    if starts_from is not None:
+        stmt = stmt.where(LiveClass.starts_at >= starts_from)
+    if starts_to is not None:
+        stmt = stmt.where(LiveClass.starts_at < starts_to)
+    if is_live is not None:
+        stmt = stmt.where(live if is_live else not_(live))
+
+    rows = (await db.execute(keyset_page(stmt, LiveClass.id, page))).all()
+    return split_page(rows, page)
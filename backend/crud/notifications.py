@@ -0,0 +1,143 @@
+# crud/notifications.py
+# Per-user notifications over Redis pub/sub. Every event goes to one
+# channel, a course's (everyone enrolled) or a user's (that user only),
+# as a JSON object with a "type":
+#
+#   class_starting    live_class_id, course_id, title, starts_at
+#   homework_created  homework_id, course_id, title, due_date
+#   enrolled          course_id
+#
+# routers.notifications delivers them over the /notifications/ws socket.
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from core.redis import redis_client
+from core.schedule_index import ScheduleIndex, ScheduledClass
+from crud.live_class_schedule import schedule
+
+logger = logging.getLogger(__name__)
+
+# Seconds between scheduler passes; 0 disables the scheduler
+CLASS_START_NOTIFY_INTERVAL = float(os.getenv("CLASS_START_NOTIFY_INTERVAL", "5"))
+# Notify this many seconds before a class starts
+CLASS_START_NOTIFY_LEAD = float(os.getenv("CLASS_START_NOTIFY_LEAD", "0"))
+# On startup, still announce classes that started this recently
+CLASS_START_NOTIFY_GRACE = float(os.getenv("CLASS_START_NOTIFY_GRACE", "60"))
+
+USER_CHANNEL_PREFIX = "notify:user:"
+COURSE_CHANNEL_PREFIX = "notify:course:"
+
+
+def user_channel(user_id: int) -> str:
+    return f"{USER_CHANNEL_PREFIX}{user_id}"
+
+
+def course_channel(course_id: int) -> str:
+    return f"{COURSE_CHANNEL_PREFIX}{course_id}"
+
+
+async def publish_notification(channel: str, event: dict) -> None:
+    try:
+        await redis_client.publish(channel, json.dumps(event, default=str))
+    except RedisError:
+        # Notifications are best effort; clients can always refresh
+        logger.warning("Could not publish %s to %s", event.get("type"), channel, exc_info=True)
+
+
+async def notify_homework_created(homework) -> None:
+    await publish_notification(course_channel(homework.course_id), {
+        "type": "homework_created",
+        "homework_id": homework.id,
+        "course_id": homework.course_id,
+        "title": homework.title,
+        "due_date": homework.due_date.isoformat(),
+    })
+
+
+async def notify_enrolled(user_id: int, course_id: int) -> None:
+    await publish_notification(user_channel(user_id), {
+        "type": "enrolled",
+        "course_id": course_id,
+    })
+
+
+# ------------------------
+# Class start scheduler
+# ------------------------
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ClassStartScheduler:
+    """
+    Announces classes as they start, from the schedule index.
+
+    Every worker runs one. Each pass covers the time since the previous
+    pass, and a Redis SET NX per (class, start time) makes sure only one
+    worker publishes a given start. A rescheduled class is announced
+    again for its new start time. `clock` is injectable for tests and
+    benchmarks.
+    """
+
+    def __init__(
+        self,
+        index: ScheduleIndex,
+        *,
+        clock: Callable[[], datetime] = _utcnow,
+        lead: float = CLASS_START_NOTIFY_LEAD,
+        grace: float = CLASS_START_NOTIFY_GRACE,
+    ):
+        self.index = index
+        self.clock = clock
+        self.lead = timedelta(seconds=lead)
+        self.grace = timedelta(seconds=grace)
+        self._covered_until: datetime | None = None
+
+    async def tick(self) -> int:
+        """One pass. Returns how many starts this worker announced."""
+        horizon = self.clock() + self.lead
+        after = self._covered_until or horizon - self.lead - self.grace
+        if horizon <= after:
+            return 0
+
+        announced = 0
+        for live_class in self.index.starting_between(after, horizon):
+            if await self._claim(live_class):
+                await publish_notification(course_channel(live_class.course_id), {
+                    "type": "class_starting",
+                    "live_class_id": live_class.id,
+                    "course_id": live_class.course_id,
+                    "title": live_class.title,
+                    "starts_at": live_class.starts_at.isoformat(),
+                })
+                announced += 1
+        self._covered_until = horizon
+        return announced
+
+    async def _claim(self, live_class: ScheduledClass) -> bool:
+        key = f"notify:class_start:{live_class.id}:{int(live_class.starts_at.timestamp())}"
+        # Kept a day past the class, long after any worker could retry it
+        expires = max(int((live_class.ends_at - self.clock()).total_seconds()), 0) + 86400
+        try:
+            return bool(await redis_client.set(key, "1", nx=True, ex=expires))
+        except RedisError:
+            logger.warning("Could not claim class start %s", live_class.id, exc_info=True)
+            return False
+
+    async def run(self, interval: float = CLASS_START_NOTIFY_INTERVAL):
+        """Background job: a pass every `interval` seconds."""
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Class start notifications failed")
+            await asyncio.sleep(interval)
+
+
+class_start_scheduler = ClassStartScheduler(schedule)
@@ -0,0 +1,170 @@
+# crud/presence.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from core.redis import redis_client
+from crud.live_chat import chat_channel
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeats from each worker
+PRESENCE_HEARTBEAT_INTERVAL = float(os.getenv("PRESENCE_HEARTBEAT_INTERVAL", "10"))
+# A student not heartbeated for this long is gone (a worker died, say)
+PRESENCE_TTL = int(os.getenv("PRESENCE_TTL", "30"))
+# How long the distinct-attendee estimate of a class is kept
+PRESENCE_UNIQUE_TTL = int(os.getenv("PRESENCE_UNIQUE_TTL", str(7 * 24 * 60 * 60)))
+# Tags this process's entries, so a worker leaving or dying only takes
+# its own sockets out of presence
+WORKER_ID = os.getenv("WORKER_ID") or uuid.uuid4().hex[:12]
+
+# Refresh one class's students for one worker, drop the expired ones and
+# report the count if it changed since any worker last reported it.
+# Members are "worker:user", one per worker a student is connected to;
+# the count is of distinct students.
+# KEYS[1] = attendee zset, KEYS[2] = last reported count (same hash slot)
+# ARGV[1] = now, ARGV[2] = ttl, ARGV[3] = worker id, ARGV[4..] = user ids
+# Returns the new count, or -1 when unchanged.
+_HEARTBEAT_SCRIPT = """
+local now = ARGV[1]
+local prefix = ARGV[3] .. ':'
+for i = 4, #ARGV, 500 do
+    local members = {}
+    for j = i, math.min(i + 499, #ARGV) do
+        members[#members + 1] = now
+        members[#members + 1] = prefix .. ARGV[j]
+    end
+    redis.call('ZADD', KEYS[1], unpack(members))
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. (tonumber(now) - tonumber(ARGV[2])))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local seen, count = {}, 0
+for _, member in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    local user = string.match(member, '[^:]+$')
+    if not seen[user] then
+        seen[user] = true
+        count = count + 1
+    end
+end
+local last = redis.call('GETSET', KEYS[2], count)
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if last == tostring(count) then
+    return -1
+end
+return count
+"""
+
+_heartbeat = redis_client.register_script(_HEARTBEAT_SCRIPT)
+
+
+# A class's keys share the {id} hash tag, so they land in one Redis
+# Cluster slot and the heartbeat script may touch them together
+
+def presence_key(live_class_id: int) -> str:
+    # Sorted set: "worker:user" -> time of its last heartbeat
+    return f"live_class_presence:{{{live_class_id}}}"
+
+
+def _reported_key(live_class_id: int) -> str:
+    return f"live_class_presence_reported:{{{live_class_id}}}"
+
+
+def unique_attendees_key(live_class_id: int) -> str:
+    # HyperLogLog of every student who joined
+    return f"live_class_attendees:{{{live_class_id}}}"
+
+
+def _member(worker_id: str, user_id: int) -> str:
+    return f"{worker_id}:{user_id}"
+
+
+async def join_presence(
+    live_class_id: int,
+    user_id: int,
+    *,
+    now: float | None = None,
+    worker_id: str = WORKER_ID,
+) -> None:
+    now = time.time() if now is None else now
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zadd(presence_key(live_class_id), {_member(worker_id, user_id): now})
+            pipe.expire(presence_key(live_class_id), PRESENCE_TTL)
+            pipe.pfadd(unique_attendees_key(live_class_id), user_id)
+            pipe.expire(unique_attendees_key(live_class_id), PRESENCE_UNIQUE_TTL)
+            await pipe.execute()
+    except RedisError:
+        # Presence is advisory; the next heartbeat fills it in
+        pass
+
+
+async def leave_presence(live_class_id: int, user_id: int, *, worker_id: str = WORKER_ID) -> None:
+    # Only this worker's entry; the student may still be connected to another
+    try:
+        await redis_client.zrem(presence_key(live_class_id), _member(worker_id, user_id))
+    except RedisError:
+        pass
+
+
+async def get_attendance(live_class_id: int, *, now: float | None = None) -> dict:
+    """Current and distinct attendees of a class. Raises RedisError if Redis is down."""
+    now = time.time() if now is None else now
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zrangebyscore(presence_key(live_class_id), now - PRESENCE_TTL, "+inf")
+        pipe.pfcount(unique_attendees_key(live_class_id))
+        members, unique_attendees = await pipe.execute()
+    attendees = {member.rpartition(":")[2] for member in members}
+    return {
+        "live_class_id": live_class_id,
+        "attendees": len(attendees),
+        "unique_attendees": unique_attendees,
+    }
+
+
+async def heartbeat(
+    rooms: dict[int, set[int]],
+    *,
+    now: float | None = None,
+    worker_id: str = WORKER_ID,
+) -> dict[int, int]:
+    """
+    Refresh this worker's students in every class it has sockets in.
+    Count changes go out on the class chat channel as attendance frames.
+    Returns the classes whose count this worker reported.
+    """
+    now = time.time() if now is None else now
+    reported = {}
+    for live_class_id, user_ids in rooms.items():
+        count = await _heartbeat(
+            keys=[presence_key(live_class_id), _reported_key(live_class_id)],
+            args=[now, PRESENCE_TTL, worker_id, *user_ids],
+        )
+        if count >= 0:
+            await redis_client.publish(chat_channel(live_class_id), json.dumps({
+                "type": "attendance",
+                "live_class_id": live_class_id,
+                "attendees": count,
+            }))
+            reported[live_class_id] = count
+    return reported
+
+
+async def run_presence_heartbeat(
+    rooms: Callable[[], dict[int, set[int]]],
+    interval: float = PRESENCE_HEARTBEAT_INTERVAL,
+):
+    """Background job: heartbeat `rooms()` every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await heartbeat(rooms())
+        except RedisError:
+            logger.warning("Presence heartbeat failed", exc_info=True)
+        except Exception:
+            logger.exception("Presence heartbeat failed")
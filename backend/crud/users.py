@@ -1,7 +1,10 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.users import User
 from schemas.users import UserCreate
-from core.hashing import get_password_hash
+from core.hashing import get_password_hash, get_password_hash_async
+from core.pagination import PageParams, keyset_page, split_page
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
@@ -25,3 +28,29 @@ def create_user(db: Session, user: UserCreate):
     return db_user
 
 
+# ------------------------
+# Async versions
+# ------------------------
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    return await db.scalar(select(User).where(User.username == username))
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email))
+
+async def get_all_users_async(db: AsyncSession, page: PageParams):
+    # Only the public columns; never load hashed_password for a listing
+    stmt = select(User.id, User.username, User.email, User.full_name, User.is_admin)
+    rows = (await db.execute(keyset_page(stmt, User.id, page))).all()
+    return split_page(rows, page)
+
+async def create_user_async(db: AsyncSession, user: UserCreate):
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        hashed_password=await get_password_hash_async(user.password),
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
@@ -1,9 +1,16 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
+from core.metrics import Counter, Gauge, Histogram
+
 BASE_DIR = Path(__file__).resolve().parent
 env_path = BASE_DIR / ".env"
 
@@ -15,7 +22,114 @@ print("🔍 DATABASE_URL loaded:", bool(DATABASE_URL))
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set. Check that .env is in the same folder as database.py and contains a DATABASE_URL entry.")
 
-engine = create_engine(DATABASE_URL)
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+# ------------------------
+# Pool configuration
+# ------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")
+# Running behind PgBouncer in transaction mode: no server-side prepared statements
+DB_PGBOUNCER = _env_flag("DB_PGBOUNCER")
+
+
+def pgbouncer_connect_args(url) -> dict:
+    """Driver options that turn off prepared statements for PgBouncer."""
+    driver = make_url(url).get_driver_name()
+    if driver == "asyncpg":
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    if driver in ("psycopg", "psycopg_async"):
+        return {"prepare_threshold": None}
+    # psycopg2 never prepares statements server-side
+    return {}
+
+
+# ------------------------
+# Pool metrics
+# ------------------------
+# Every metric is labelled with the engine's pool name
+_pool_label = ("pool",)
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Connections checked out of the pool", _pool_label)
+db_pool_checkins = Counter("db_pool_checkins_total", "Connections returned to the pool", _pool_label)
+db_pool_connects = Counter("db_pool_connections_created_total", "New DBAPI connections opened", _pool_label)
+db_pool_timeouts = Counter("db_pool_timeouts_total", "Checkouts that gave up waiting for a connection", _pool_label)
+db_pool_wait_seconds = Histogram("db_pool_wait_seconds", "Time spent waiting for a pool connection", _pool_label)
+db_pool_hold_seconds = Histogram("db_pool_hold_seconds", "Time a connection stayed checked out", _pool_label)
+db_pool_checked_out = Gauge("db_pool_checked_out", "Connections currently checked out", _pool_label)
+db_pool_overflow = Gauge("db_pool_overflow", "Connections open beyond pool_size", _pool_label)
+
+
+class _CheckoutTimingMixin:
+    """Records how long each pool checkout waited."""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc(pool=self.metrics_name)
+            raise
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url, poolclass=InstrumentedQueuePool) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if DB_PGBOUNCER:
+        options["connect_args"] = pgbouncer_connect_args(url)
+    return options
+
+
+def instrument_pool(pool, name: str):
+    pool.metrics_name = name
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        db_pool_connects.inc(pool=name)
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(pool=name)
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        db_pool_checkins.inc(pool=name)
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            db_pool_hold_seconds.observe(time.perf_counter() - started, pool=name)
+
+    if isinstance(pool, QueuePool):
+        db_pool_checked_out.set_function(pool.checkedout, pool=name)
+        db_pool_overflow.set_function(pool.overflow, pool=name)
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+instrument_pool(engine.pool, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -26,4 +140,42 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ------------------------
+# Async engine
+# ------------------------
+# Same database through an asyncio driver, so endpoints can run on the
+# event loop instead of the threadpool
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def _async_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend, url.get_driver_name())
+    return url.set(drivername=f"{backend}+{driver}")
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **_engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool),
+)
+instrument_pool(async_engine.sync_engine.pool, "async")
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
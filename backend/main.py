@@ -1,14 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routers.auth import router as auth_router
 from routers.users import router as users_router
 from routers.courses import router as courses_router
 from routers.live_classes import router as live_classes_router
 from routers.homework import router as homework_router
-from routers.websocket import router as websocket_router
-from database import engine, Base
+from routers.websocket import router as websocket_router, chat_subscriber, local_attendees
+from routers.exports import router as exports_router
+from routers.metrics import router as metrics_router
+from routers.notifications import router as notifications_router, notification_subscriber
+from database import engine, async_engine, Base
+from crud.live_chat_writer import chat_writer
+from crud.blobs import BLOB_GC_INTERVAL, run_blob_gc
+from crud.live_class_schedule import (
+    SCHEDULE_REFRESH_INTERVAL,
+    refresh_schedule,
+    run_schedule_refresh,
+    settle_user_courses_invalidations,
+)
+from crud.notifications import CLASS_START_NOTIFY_INTERVAL, class_start_scheduler
+from crud.presence import PRESENCE_HEARTBEAT_INTERVAL, run_presence_heartbeat
 from fastapi.middleware.cors import CORSMiddleware
+from core.pagination import NEXT_CURSOR_HEADER
+from core.instrumentation import InstrumentationMiddleware, instrument_engine
+from core.storage import RequestSizeLimitMiddleware
+from core.user_cache import start_invalidation_listener, stop_invalidation_listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_invalidation_listener()
+    blob_gc = asyncio.create_task(run_blob_gc()) if BLOB_GC_INTERVAL > 0 else None
+    await refresh_schedule()
+    schedule_refresh = (
+        asyncio.create_task(run_schedule_refresh()) if SCHEDULE_REFRESH_INTERVAL > 0 else None
+    )
+    class_starts = (
+        asyncio.create_task(class_start_scheduler.run()) if CLASS_START_NOTIFY_INTERVAL > 0 else None
+    )
+    presence = (
+        asyncio.create_task(run_presence_heartbeat(local_attendees))
+        if PRESENCE_HEARTBEAT_INTERVAL > 0 else None
+    )
+    yield
+    if blob_gc is not None:
+        blob_gc.cancel()
+    if schedule_refresh is not None:
+        schedule_refresh.cancel()
+    if class_starts is not None:
+        class_starts.cancel()
+    if presence is not None:
+        presence.cancel()
+    # Don't lose buffered chat messages on shutdown
+    await chat_writer.close()
+    await chat_subscriber.close()
+    await notification_subscriber.close()
+    await settle_user_courses_invalidations()
+    await stop_invalidation_listener()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Inside CORS, so browsers can read a 413 too
+app.add_middleware(RequestSizeLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,8 +82,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],              # Allow all HTTP methods
     allow_headers=["*"],              # Allow all headers
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],  # Pagination cursor, cache validators
 )
 
+# Outermost, so latency covers every other middleware
+app.add_middleware(InstrumentationMiddleware)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
 
 Base.metadata.create_all(bind=engine)
 
@@ -38,6 +100,9 @@ app.include_router(courses_router)
 app.include_router(live_classes_router)
 app.include_router(homework_router)
 app.include_router(websocket_router)
+app.include_router(notifications_router)
+app.include_router(exports_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def read_root():
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from datetime import datetime, timezone
+from database import Base
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class Blob(Base):
+    """
+    One stored file, addressed by the sha256 of its content. Submissions
+    point at blobs, so identical uploads are stored once.
+    """
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    storage_key = Column(String, nullable=False)
+
+    # Number of submissions pointing at this blob; 0 means collectable
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    # Refreshed on every upload that resolves to this blob, so garbage
+    # collection leaves alone a blob that is about to be referenced
+    last_seen_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    # Set by garbage collection before it deletes the stored object; the
+    # row goes once the object is gone. Uploads wait for it to go.
+    deleting_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_blobs_ref_count_last_seen_at", "ref_count", "last_seen_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime, timezone
@@ -23,7 +23,14 @@ class HomeworkSubmission(Base):
     homework_id = Column(Integer, ForeignKey("homeworks.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     file_url = Column(String, nullable=False)  # Link to uploaded file
+    filename = Column(String, nullable=True)  # Name the file was uploaded with
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), nullable=True, index=True)
     submitted_at = Column(DateTime(timezone=True), default=datetime.now(timezone.utc))
 
     homework = relationship("Homework", back_populates="submissions")
     user = relationship("User")
+
+    __table_args__ = (
+        # Keyset pagination of a homework's submissions by id
+        Index("ix_homework_submissions_homework_id_id", "homework_id", "id"),
+    )
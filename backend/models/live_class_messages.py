@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from database import Base
@@ -14,3 +14,8 @@ class LiveClassMessage(Base):
 
     user = relationship("User")
     live_class = relationship("LiveClass")
+
+    __table_args__ = (
+        # Keyset pagination of a class's history by id
+        Index("ix_live_class_messages_live_class_id_id", "live_class_id", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime, timezone
@@ -18,6 +18,13 @@ class LiveClass(Base):
 
     course = relationship("Course", back_populates="live_classes")
 
+    __table_args__ = (
+        # Keyset pagination of a course's classes by id
+        Index("ix_live_classes_course_id_id", "course_id", "id"),
+        # Loading the schedule index: classes that haven't ended yet
+        Index("ix_live_classes_ends_at", "ends_at"),
+    )
+
     @property
     def is_live(self) -> bool:
         now = datetime.now(timezone.utc)
@@ -1,45 +1,68 @@
 # routers/auth.py
 
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from jose import JWTError, jwt
 
-from database import get_db
-from models.users import User as UserModel
+from database import get_async_db
+from core.user_cache import UserPrincipal
 from schemas.users import UserCreate, UserBase, UserMe
 from schemas.auth import Token
-from crud.users import get_user_by_username, get_user_by_email, create_user
-from core.hashing import get_password_hash, verify_password
+from crud.users import get_user_by_username_async, get_user_by_email_async, create_user_async
+from core.hashing import verify_password_async, HashingPoolSaturated
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
-from core.security import create_access_token, create_refresh_token, get_current_user
+from core.security import create_access_token, create_refresh_token, get_current_user, decode_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+
+def hashing_busy_exception() -> HTTPException:
+    # The password hashing pool is saturated (login burst): fail fast
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 # ------------------------
 # Signup
 # ------------------------
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
-    if get_user_by_username(db, user.username):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    if await get_user_by_username_async(db, user.username):
         raise HTTPException(status_code=400, detail="Username already exists")
-    if get_user_by_email(db, user.email):
+    if await get_user_by_email_async(db, user.email):
         raise HTTPException(status_code=400, detail="Email already exists")
+    # Same as login: don't hold a pooled connection while hashing
+    await db.close()
 
-    create_user(db, user)
+    try:
+        await create_user_async(db, user)
+    except HashingPoolSaturated:
+        raise hashing_busy_exception()
     return {"message": "User created successfully"}
 
 # ------------------------
 # Login
 # ------------------------
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = get_user_by_username(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await get_user_by_username_async(db, form_data.username)
+    # Give the pooled connection back before waiting on bcrypt; a login
+    # burst must queue on the hashing pool, not on the database pool
+    await db.close()
+    try:
+        valid = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except HashingPoolSaturated:
+        raise hashing_busy_exception()
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -62,7 +85,7 @@ def login(
 # Current user
 # ------------------------
 @router.get("/me", response_model=UserMe)
-def read_users_me(current_user: UserModel = Depends(get_current_user)):
+async def read_users_me(current_user: UserPrincipal = Depends(get_current_user)):
     return current_user
 
 
@@ -70,9 +93,9 @@ def read_users_me(current_user: UserModel = Depends(get_current_user)):
 # Refresh token
 # ------------------------
 @router.post("/refresh", response_model=Token)
-def refresh_token(refresh_token: str = Body(...)):
+async def refresh_token(refresh_token: str = Body(...)):
     try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(refresh_token)
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
@@ -1,50 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_async_db
+from core.http_cache import cached_response
+from core.pagination import NEXT_CURSOR_HEADER, PageParams
 from core.security import get_current_user, get_current_admin
-from models.users import User
+from core.user_cache import UserPrincipal
 from crud.enrollments import (
-    enroll_user_in_course,
-    get_user_enrollments,
-    get_user_courses_with_progress,
+    enroll_user_in_course_async,
+    get_user_courses_with_progress_async,
 )
 from schemas.courses import CourseOut, EnrolledCourseBase
-from crud.courses import get_all_courses, create_course
+from crud.courses import create_course_async
+from crud.course_cache import CATALOG_MAX_AGE, get_catalog_page
+from crud.notifications import notify_enrolled
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
 
 @router.post("/{course_id}/enroll")
-def enroll_course(
+async def enroll_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    enrollment = enroll_user_in_course(db, current_user, course_id)
+    enrollment = await enroll_user_in_course_async(db, current_user, course_id)
     if not enrollment:
         raise HTTPException(status_code=404, detail="Course not found")
 
+    await notify_enrolled(current_user.id, course_id)
     return {"message": "Enrolled successfully"}
 
 
 @router.get("/me", response_model=list[EnrolledCourseBase])
-def my_courses(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def my_courses(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    return get_user_courses_with_progress(db, current_user)
+    return await get_user_courses_with_progress_async(db, current_user)
 
 
 
 @router.get("/", response_model=list[CourseOut])
-def list_courses(db: Session = Depends(get_db)):
-    return get_all_courses(db)
+async def list_courses(
+    request: Request,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Same for everyone: serve the pre-serialized page and let clients revalidate
+    catalog = await get_catalog_page(db, page)
+    headers = {}
+    if catalog.next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = str(catalog.next_cursor)
+    return cached_response(
+        request,
+        catalog.body,
+        catalog.etag,
+        cache_control=f"public, max-age={CATALOG_MAX_AGE}",
+        headers=headers,
+    )
 
 @router.post("/", response_model=CourseOut)
-def admin_create_course(
+async def admin_create_course(
     course_in: CourseOut,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user = Depends(get_current_admin)
 ):
-    return create_course(db, course_in )
+    return await create_course_async(db, course_in )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+
+from core.export import ExportFormat, export_response
+from core.security import get_current_admin
+from crud.exports import (
+    users_export_statement,
+    enrollments_export_statement,
+    submissions_export_statement,
+)
+
+# Bulk reads for admins, streamed straight from a database cursor
+router = APIRouter(
+    prefix="/exports",
+    tags=["Exports"],
+    dependencies=[Depends(get_current_admin)],
+)
+
+
+@router.get("/users")
+async def export_users(format: ExportFormat = "ndjson"):
+    return export_response(users_export_statement(), format, "users")
+
+
+@router.get("/enrollments")
+async def export_enrollments(course_id: int | None = None, format: ExportFormat = "ndjson"):
+    return export_response(enrollments_export_statement(course_id), format, "enrollments")
+
+
+@router.get("/submissions")
+async def export_submissions(homework_id: int | None = None, format: ExportFormat = "ndjson"):
+    return export_response(submissions_export_statement(homework_id), format, "submissions")
@@ -1,43 +1,158 @@
-from fastapi import APIRouter, Depends, UploadFile, File
-from sqlalchemy.orm import Session
-from database import get_db
-from crud.homeworks import create_homework, get_course_homeworks, submit_homework, get_user_homework_submissions, get_homework_submissions
-from schemas.homeworks import HomeworkCreate, HomeworkOut, HomeworkSubmissionCreate, HomeworkSubmissionOut
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from core.pagination import PageParams, set_next_cursor
+from core.downloads import ZipEntry, safe_filename, stored_file_response, zip_response
+from core.storage import UploadTooLarge, stage_upload, storage
+from crud.blobs import (
+    BlobBeingDeleted,
+    collect_unreferenced_blobs_async,
+    get_blob_storage_report_async,
+    store_blob_async,
+)
+from crud.notifications import notify_homework_created
+from crud.homeworks import (
+    create_homework_async,
+    get_homework_async,
+    get_course_homeworks_async,
+    submit_homework_async,
+    get_user_homework_submissions_async,
+    get_homework_submissions_async,
+    get_submission_file_async,
+    get_homework_submission_files_async,
+)
+from schemas.homeworks import HomeworkCreate, HomeworkOut, HomeworkSubmissionCreate, HomeworkSubmissionOut, BlobStorageReport
 from core.security import get_current_admin, get_current_user
-from models.users import User
+from core.user_cache import UserPrincipal
 
 router = APIRouter(prefix="/homeworks", tags=["Homeworks"])
 
 # Create homework (admin)
 @router.post("/", response_model=HomeworkOut)
-def admin_create_homework(homework_in: HomeworkCreate, db: Session = Depends(get_db)):
-    return create_homework(db, homework_in)
+async def admin_create_homework(
+    homework_in: HomeworkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: UserPrincipal = Depends(get_current_admin)
+):
+    homework = await create_homework_async(db, homework_in)
+    await notify_homework_created(homework)
+    return homework
 
 # List homework for a course
 @router.get("/course/{course_id}", response_model=list[HomeworkOut])
-def list_course_homework(course_id: int, db: Session = Depends(get_db)):
-    return get_course_homeworks(db, course_id)
+async def list_course_homework(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await get_course_homeworks_async(db, course_id)
 
 # Submit homework (upload file)
 @router.post("/{homework_id}/submit", response_model=HomeworkSubmissionOut)
-def submit_homework_file(homework_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # You would save the file to your server or S3 and get `file_url`
-    file_url = f"/uploads/{file.filename}"  # Example placeholder
-    submission_in = HomeworkSubmissionCreate(file_url=file_url)
-    return submit_homework(db, homework_id, current_user.id, submission_in)
+async def submit_homework_file(homework_id: int, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user)):
+    # Streamed to a staging file in chunks while hashing; the whole file is
+    # never held in memory
+    try:
+        staged = await stage_upload(file)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+
+    # Stored by content hash: a file we already have is not written again
+    try:
+        blob = await store_blob_async(db, staged)
+    except BlobBeingDeleted:
+        raise HTTPException(status_code=503, detail="File is busy, please try again")
+
+    submission_in = HomeworkSubmissionCreate(
+        file_url=storage.url(blob.storage_key),
+        filename=(file.filename or "")[:255] or None,
+        blob_sha256=blob.sha256,
+    )
+    return await submit_homework_async(db, homework_id, current_user.id, submission_in)
 
 # List current user's submissions
 @router.get("/me", response_model=list[HomeworkSubmissionOut])
-def my_submissions(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_user_homework_submissions(db, current_user.id)
+async def my_submissions(db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user)):
+    return await get_user_homework_submissions_async(db, current_user.id)
 
 
 # routers/homeworks.py
 @router.get("/{homework_id}/submissions", response_model=list[HomeworkSubmissionOut])
-def list_homework_submissions(
+async def list_homework_submissions(
     homework_id: int,
-    db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin)
+    response: Response,
+    page: PageParams = Depends(),
+    submitted_from: datetime | None = None,
+    submitted_to: datetime | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: UserPrincipal = Depends(get_current_admin)
 ):
     # Call the CRUD function
-    return get_homework_submissions(db, homework_id)
+    submissions, next_cursor = await get_homework_submissions_async(
+        db,
+        homework_id,
+        page,
+        submitted_from=submitted_from,
+        submitted_to=submitted_to,
+    )
+    set_next_cursor(response, next_cursor)
+    return submissions
+
+
+# Storage saved by deduplicating submission files (admin)
+@router.get("/storage/report", response_model=BlobStorageReport)
+async def blob_storage_report(
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: UserPrincipal = Depends(get_current_admin)
+):
+    return await get_blob_storage_report_async(db)
+
+
+# Delete stored files no submission points at any more (admin)
+@router.post("/storage/gc")
+async def collect_blobs(
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: UserPrincipal = Depends(get_current_admin)
+):
+    return {"collected": await collect_unreferenced_blobs_async(db)}
+
+
+# Download a submitted file (admin, or the student who submitted it)
+@router.get("/submissions/{submission_id}/file")
+async def download_submission_file(
+    submission_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    file = await get_submission_file_async(db, submission_id)
+    if file is None or not (current_user.is_admin or file.user_id == current_user.id):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return stored_file_response(
+        request,
+        file.storage_key,
+        # Blobs are addressed by content, so the hash is a strong validator
+        etag=f'"{file.sha256}"',
+        last_modified=file.created_at,
+        filename=safe_filename(file.filename),
+    )
+
+
+# Download every submission for a homework as one ZIP (admin)
+@router.get("/{homework_id}/submissions/archive")
+async def download_homework_submissions(
+    homework_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    admin_user: UserPrincipal = Depends(get_current_admin)
+):
+    if await get_homework_async(db, homework_id) is None:
+        raise HTTPException(status_code=404, detail="Homework not found")
+    files = await get_homework_submission_files_async(db, homework_id)
+    entries = [
+        ZipEntry(
+            name=f"{file.user_id}/{file.id}-{safe_filename(file.filename)}",
+            key=file.storage_key,
+            size=file.size,
+            modified_at=file.submitted_at,
+        )
+        for file in files
+    ]
+    return zip_response(entries, f"homework-{homework_id}-submissions.zip")
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
-from database import get_db
+from database import get_async_db
+from core.pagination import PageParams, set_next_cursor
 from core.security import get_current_user
-from models.users import User
-from crud.live_classes import get_joinable_live_class, create_live_class, get_user_live_classes
-from schemas.live_classes import LiveClassJoin, LiveClassCreate, LiveClassOut
+from core.user_cache import UserPrincipal
+from crud.live_classes import (
+    get_joinable_live_class_async,
+    create_live_class_async,
+    get_user_live_classes_async,
+    get_all_live_classes_async,
+)
+from crud.live_class_schedule import get_live_now_async, get_upcoming_async
+from crud.presence import get_attendance
+from schemas.live_classes import LiveClassAttendance, LiveClassJoin, LiveClassCreate, LiveClassOut
 from core.security import get_current_admin
 from models.live_classes import LiveClass
 
@@ -13,12 +22,12 @@ router = APIRouter(prefix="/live-classes", tags=["Live Classes"])
 
 
 @router.get("/{class_id}/join", response_model=LiveClassJoin)
-def join_live_class(
+async def join_live_class(
     class_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    live_class = get_joinable_live_class(
+    live_class = await get_joinable_live_class_async(
         db,
         class_id=class_id,
         user=current_user,
@@ -29,27 +38,73 @@ def join_live_class(
         starts_at=live_class.starts_at,
     )
 
+@router.get("/{class_id}/attendance", response_model=LiveClassAttendance)
+async def live_class_attendance(
+    class_id: int,
+    admin_user = Depends(get_current_admin),
+):
+    # Straight from Redis presence, no database query
+    try:
+        return await get_attendance(class_id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Attendance is unavailable, please try again")
+
+
 @router.post("/", response_model=LiveClassOut)
-def admin_create_live_class(
+async def admin_create_live_class(
     live_class_in: LiveClassCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin_user = Depends(get_current_admin)
 ):
-    return create_live_class(db, live_class_in)
+    return await create_live_class_async(db, live_class_in)
 
 
 @router.get("/me", response_model=list[LiveClassOut])
-def my_live_classes(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def my_live_classes(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    return await get_user_live_classes_async(db, current_user)
+
+
+# Served from the in-memory schedule index (crud.live_class_schedule);
+# only the user's course ids come from the database, and those are cached
+@router.get("/me/live", response_model=list[LiveClassOut])
+async def my_live_now(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
+):
+    return await get_live_now_async(db, current_user.id)
+
+
+@router.get("/me/upcoming", response_model=list[LiveClassOut])
+async def my_upcoming(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
-    return get_user_live_classes(db, current_user)
+    return await get_upcoming_async(db, current_user.id, limit)
 
 
 @router.get("/", response_model=list[LiveClassOut])
-def list_live_classes(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin),
+async def list_live_classes(
+    response: Response,
+    page: PageParams = Depends(),
+    course_id: int | None = None,
+    starts_from: datetime | None = None,
+    starts_to: datetime | None = None,
+    is_live: bool | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_admin),
 ):
-    return db.query(LiveClass).all()
+    live_classes, next_cursor = await get_all_live_classes_async(
+        db,
+        page,
+        course_id=course_id,
+        starts_from=starts_from,
+        starts_to=starts_to,
+        is_live=is_live,
+    )
+    set_next_cursor(response, next_cursor)
+    return live_classes
 
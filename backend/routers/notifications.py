@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.chat_fanout import ChatConnection
+from core.pubsub import RedisSubscriber
+from core.security import get_current_user_ws
+from crud.live_class_schedule import get_user_course_ids_async
+from crud.notifications import USER_CHANNEL_PREFIX, course_channel, user_channel
+from database import get_async_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+# channel -> sockets listening on it, in this worker
+listeners: dict[str, list["NotificationConnection"]] = {}
+
+
+class NotificationConnection(ChatConnection):
+    """A user's notification socket and the channels it listens on."""
+
+    def __init__(self, websocket: WebSocket, *, user_id: int, is_admin: bool):
+        super().__init__(websocket, user_id=user_id, is_admin=is_admin)
+        self.channels: set[str] = set()
+        # follow() calls started from routed events. Held here so they
+        # aren't garbage collected mid-flight, and awaited on disconnect
+        # so none subscribes after unfollow_all()
+        self._following: set[asyncio.Task] = set()
+
+    def follow_later(self, channel: str):
+        task = asyncio.create_task(self._follow(channel))
+        self._following.add(task)
+        task.add_done_callback(self._following.discard)
+
+    async def _follow(self, channel: str):
+        try:
+            await follow(self, channel)
+        except RedisError:
+            logger.warning("Could not follow %s", channel, exc_info=True)
+
+    async def settle(self):
+        """Wait for follows started by routed events to finish."""
+        while self._following:
+            await asyncio.gather(*self._following, return_exceptions=True)
+
+
+async def follow(conn: NotificationConnection, channel: str):
+    if channel in conn.channels or conn.closed:
+        return
+    conn.channels.add(channel)
+    listeners.setdefault(channel, []).append(conn)
+    await notification_subscriber.subscribe(channel)
+
+
+async def unfollow_all(conn: NotificationConnection):
+    channels = list(conn.channels)
+    conn.channels.clear()
+    for channel in channels:
+        remaining = [c for c in listeners.get(channel, ()) if c is not conn]
+        if remaining:
+            listeners[channel] = remaining
+        else:
+            listeners.pop(channel, None)
+
+    for channel in channels:
+        try:
+            await notification_subscriber.unsubscribe(channel)
+        except RedisError:
+            # Already dropped from the refcount; Redis just keeps sending
+            # a channel nobody listens to until the connection resets
+            logger.warning("Could not unsubscribe from %s", channel, exc_info=True)
+
+
+def route_notification(channel: str, raw: str):
+    # Forward the frame as published; only enrollments need a look inside
+    conns = listeners.get(channel, ())
+    for conn in conns:
+        conn.send(raw)
+
+    if channel.startswith(USER_CHANNEL_PREFIX) and conns:
+        event = json.loads(raw)
+        if event["type"] == "enrolled":
+            # Start hearing about the new course right away
+            for conn in conns:
+                conn.follow_later(course_channel(event["course_id"]))
+
+
+# One shared Redis subscription for every notification socket in this worker
+notification_subscriber = RedisSubscriber(route_notification)
+
+
+@router.websocket("/ws")
+async def notifications(
+    websocket: WebSocket,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Server-pushed events for the signed-in user (see crud.notifications),
+    one JSON object per frame. Clients only listen; anything they send is
+    ignored.
+    """
+    await websocket.accept()
+
+    try:
+        user = await get_current_user_ws(websocket, db)
+    except Exception:
+        await websocket.close(code=1008)
+        return
+
+    course_ids = await get_user_course_ids_async(db, user.id)
+    # Give the pooled connection back; the socket can stay open for hours
+    await db.close()
+
+    conn = NotificationConnection(websocket, user_id=user.id, is_admin=user.is_admin)
+    try:
+        await follow(conn, user_channel(user.id))
+        for course_id in course_ids:
+            await follow(conn, course_channel(course_id))
+
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # However the socket ended (disconnect or Redis error), drop every
+        # channel it holds
+        conn.stop()
+        await conn.settle()
+        await unfollow_all(conn)
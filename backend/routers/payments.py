@@ -1,6 +1,6 @@
 # routers/payments.py
 from fastapi import APIRouter, Depends
-from models.users import User
+from core.user_cache import UserPrincipal
 from core.security import get_current_user
 from crud.payments import create_jazzcash_payment_payload
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/payments", tags=["Payments"])
 @router.post("/jazzcash/initiate/{course_id}")
 def initiate_jazzcash_payment(
     course_id: int,
-    user: User = Depends(get_current_user)
+    user: UserPrincipal = Depends(get_current_user)
 ):
     payment = create_jazzcash_payment_payload(
         course_id=course_id,
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from crud.users import get_all_users
-from database import get_db
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from crud.users import get_all_users_async
+from database import get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.pagination import PageParams, set_next_cursor
+from schemas.users import UserMe
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-@router.get("/", status_code=status.HTTP_200_OK)
-def list_users(db: Session = Depends(get_db)):
-    users = get_all_users(db)
+@router.get("/", status_code=status.HTTP_200_OK, response_model=list[UserMe])
+async def list_users(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+):
+    users, next_cursor = await get_all_users_async(db, page)
+    set_next_cursor(response, next_cursor)
     return users
 
@@ -1,56 +1,61 @@
-from fastapi import WebSocket, WebSocketDisconnect, Depends, APIRouter
-from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import WebSocket, WebSocketDisconnect, Depends, APIRouter, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from core.security import get_current_user_ws, get_current_user
-from models.live_classes import LiveClass
-from crud.live_chat import create_live_chat_message, get_live_chat_messages, chat_channel
-from models.enrollments import Enrollment
-from models.users import User
-from time import time
+from crud.live_chat import get_live_chat_messages_async, chat_channel
+from crud.live_chat_writer import chat_writer
+from crud.live_class_access import authorize_live_class_async
+from crud.presence import join_presence, leave_presence
+from crud.live_chat_cache import (
+    CHAT_HISTORY_SIZE,
+    publish_live_chat_message,
+    get_cached_chat_history,
+    begin_chat_history_warm,
+    warm_chat_history,
+)
+from core.user_cache import UserPrincipal
 from schemas.live_class_messages import LiveChatMessageOut
-from core.redis import redis_client
+from core.pubsub import RedisSubscriber
+from core.chat_fanout import ChatConnection, broadcast, send_attendance
+from core.rate_limit import allow_chat_message
 import json
-import asyncio
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 # live_class_id -> list of connections
-active_connections: dict[int, list[dict]] = {}
-
-# user_id -> last message timestamp
-rate_limit: dict[int, float] = {}
+active_connections: dict[int, list[ChatConnection]] = {}
 
-redis_tasks: dict[int, asyncio.Task] = {}
 
-async def redis_listener(live_class_id: int):
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(chat_channel(live_class_id))
+def route_chat_message(channel: str, raw: str):
+    # Parse once for routing, forward the original frame as-is
+    payload = json.loads(raw)
+    if payload.get("type") == "attendance":
+        send_attendance(active_connections.get(payload["live_class_id"], []), raw)
+        return
+    broadcast(
+        active_connections.get(payload["live_class_id"], []),
+        raw,
+        from_admin=payload["is_admin"],
+    )
 
-    try:
-        async for message in pubsub.listen():
-            if message["type"] != "message":
-                continue
 
-            payload = json.loads(message["data"])
+# One shared Redis subscription for every live class in this worker
+chat_subscriber = RedisSubscriber(route_chat_message)
 
-            for conn in active_connections.get(live_class_id, []):
-                if payload["is_admin"]:
-                    await conn["ws"].send_json(payload)
-                elif conn["is_admin"]:
-                    await conn["ws"].send_json(payload)
-
-    finally:
-        await pubsub.unsubscribe(chat_channel(live_class_id))
-        await pubsub.close()
 
+def local_attendees() -> dict[int, set[int]]:
+    """Students connected to this worker, per live class (for presence heartbeats)."""
+    return {
+        live_class_id: {c.user_id for c in conns if not c.is_admin}
+        for live_class_id, conns in active_connections.items()
+    }
 
 
 @router.websocket("/ws/live-classes/{live_class_id}/chat")
 async def live_class_chat(
     websocket: WebSocket,
     live_class_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # ✅ Always accept FIRST
     await websocket.accept()
@@ -62,58 +67,43 @@ async def live_class_chat(
         await websocket.close(code=1008)
         return
 
-    # ✅ Validate live class
-    live_class = db.query(LiveClass).get(live_class_id)
-    if not live_class:
+    # ✅ Authorization rules: the class must exist; students must be
+    # enrolled and can only join while it is live. One query, cached.
+    try:
+        await authorize_live_class_async(
+            db, class_id=live_class_id, user=user, admin_bypass=True,
+        )
+    except HTTPException:
         await websocket.close(code=1008)
         return
 
-    # ✅ Authorization rules
-    if not user.is_admin:
-        # Students must be enrolled
-        enrollment = db.query(Enrollment).filter(
-            Enrollment.user_id == user.id,
-            Enrollment.course_id == live_class.course_id
-        ).first()
-
-        if not enrollment:
-            await websocket.close(code=1008)
-            return
-
-        # Students can only join when class is live
-        now = datetime.now(timezone.utc)
-        if not (live_class.starts_at <= now <= live_class.ends_at):
-            await websocket.close(code=1008)
-            return
+    # Give the pooled connection back; the socket can stay open for hours
+    await db.close()
 
         # ✅ Register connection
-    if live_class_id not in active_connections:
-        active_connections[live_class_id] = []
-        redis_tasks[live_class_id] = asyncio.create_task(
-            redis_listener(live_class_id)
-        )
-
-    active_connections[live_class_id].append({
-        "ws": websocket,
-        "user_id": user.id,
-        "is_admin": user.is_admin
-    })
-
+    # ?attendance=1 adds {"type": "attendance", "attendees": n} frames
+    conn = ChatConnection(
+        websocket,
+        user_id=user.id,
+        is_admin=user.is_admin,
+        attendance=websocket.query_params.get("attendance") in ("1", "true"),
+    )
+    active_connections.setdefault(live_class_id, []).append(conn)
 
     try:
+        await chat_subscriber.subscribe(chat_channel(live_class_id))
+        if not user.is_admin:
+            await join_presence(live_class_id, user.id)
+
         while True:
             data = await websocket.receive_text()
 
-            # ⏱ Rate limiting: 1 msg/sec per user
-            now_ts = time()
-            last_ts = rate_limit.get(user.id, 0)
-            if now_ts - last_ts < 1.0:
+            # ⏱ Rate limiting: token bucket per user and class, shared by all workers
+            if not await allow_chat_message(live_class_id, user.id, is_admin=user.is_admin):
                 continue
-            rate_limit[user.id] = now_ts
 
             # 💾 Save message
-            msg = create_live_chat_message(
-                db,
+            msg = await chat_writer.write(
                 live_class_id=live_class_id,
                 user_id=user.id,
                 message=data
@@ -121,31 +111,39 @@ async def live_class_chat(
 
             payload = {
                 "id": msg.id,
+                "live_class_id": live_class_id,
                 "user_id": user.id,
-                "message": msg.message,
+                "message": data,
                 "created_at": msg.created_at.isoformat(),
                 "is_admin": user.is_admin,
             }
             
-            await redis_client.publish(
-                chat_channel(live_class_id),
-                json.dumps(payload)
-            )
+            await publish_live_chat_message(live_class_id, payload)
 
 
 
     except WebSocketDisconnect:
+        pass
+
+    finally:
+        # However the socket ended (disconnect, Redis or database error),
+        # drop everything it holds
+        conn.stop()
         active_connections[live_class_id] = [
             c for c in active_connections[live_class_id]
-            if c["ws"] != websocket
+            if c is not conn
         ]
 
         if not active_connections[live_class_id]:
             del active_connections[live_class_id]
 
-            task = redis_tasks.pop(live_class_id, None)
-            if task:
-                task.cancel()
+        # Other tabs of the same student keep them present
+        if not user.is_admin and not any(
+            c.user_id == user.id for c in active_connections.get(live_class_id, ())
+        ):
+            await leave_presence(live_class_id, user.id)
+
+        await chat_subscriber.unsubscribe(chat_channel(live_class_id))
 
 
 # routers/chat.py
@@ -153,10 +151,49 @@ async def live_class_chat(
     "/{live_class_id}/messages",
     response_model=list[LiveChatMessageOut]
 )
-def get_chat_history(
+async def get_chat_history(
     live_class_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    before_id: int | None = None,
+    after_id: int | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserPrincipal = Depends(get_current_user),
 ):
+    """
+    Chat history, oldest → newest.
+
+    Pass `before_id` (the oldest id you have) to scroll back, or `after_id`
+    (the newest id you have) after a reconnect to fetch only the gap.
+    """
     # Optional: reuse same enrollment checks
-    return get_live_chat_messages(db, live_class_id)
+
+    # 🔥 Hot path: recent messages straight from Redis
+    if before_id is None and limit <= CHAT_HISTORY_SIZE:
+        cached = await get_cached_chat_history(live_class_id)
+        if cached is not None:
+            if after_id is None:
+                return cached[-limit:]
+            # The buffer covers the gap if it still holds the client's last
+            # message, or if it holds the class's whole history
+            if len(cached) < CHAT_HISTORY_SIZE or cached[0]["id"] <= after_id:
+                return [m for m in cached if m["id"] > after_id][:limit]
+
+    # 🧊 Cold path: keyset query on (live_class_id, id)
+    if before_id is None and after_id is None:
+        # Warming first: messages published during the query still make it in
+        await begin_chat_history_warm(live_class_id)
+        messages = await get_live_chat_messages_async(
+            db,
+            live_class_id,
+            max(limit, CHAT_HISTORY_SIZE),
+        )
+        await warm_chat_history(live_class_id, messages)
+        return messages[-limit:]
+
+    return await get_live_chat_messages_async(
+        db,
+        live_class_id,
+        limit,
+        before_id=before_id,
+        after_id=after_id,
+    )
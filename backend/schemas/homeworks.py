@@ -19,6 +19,8 @@ class HomeworkOut(HomeworkBase):
 
 class HomeworkSubmissionCreate(BaseModel):
     file_url: str  # Could be uploaded via a file server or S3
+    filename: Optional[str] = None
+    blob_sha256: Optional[str] = None  # Set for files kept in blob storage
 
 class HomeworkSubmissionOut(BaseModel):
     id: int
@@ -26,3 +28,10 @@ class HomeworkSubmissionOut(BaseModel):
     user_id: int
     file_url: str
     submitted_at: datetime
+
+class BlobStorageReport(BaseModel):
+    submissions: int  # Submissions stored as blobs
+    blobs: int
+    logical_bytes: int  # Size if every submission kept its own copy
+    stored_bytes: int
+    saved_bytes: int
@@ -29,3 +29,11 @@ class LiveClassOut(LiveClassBase):
 
     class Config:
         from_attributes = True
+
+
+class LiveClassAttendance(BaseModel):
+    live_class_id: int
+    # Students connected right now, across every worker
+    attendees: int
+    # Distinct students who joined at any point (HyperLogLog estimate)
+    unique_attendees: int
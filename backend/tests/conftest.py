@@ -0,0 +1,143 @@
+# tests/conftest.py
+"""
+Runs the app in-process against a throwaway SQLite database and fake
+Redis, with the same plumbing as the benchmarks. One app (and one event
+loop, through the TestClient portal) is shared by the whole session, so
+tests create their own users, courses and classes instead of relying on
+a clean database.
+"""
+import itertools
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks import harness
+
+# Background jobs would race the tests; tests drive them by hand
+for _job in ("SCHEDULE_REFRESH_INTERVAL", "CLASS_START_NOTIFY_INTERVAL", "PRESENCE_HEARTBEAT_INTERVAL"):
+    os.environ.setdefault(_job, "0")
+
+harness.configure(
+    f"sqlite:///{tempfile.mkdtemp(prefix='cambfordable-tests-')}/test.db",
+    bcrypt_rounds=4,
+)
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class Account:
+    id: int
+    username: str
+    is_admin: bool
+    token: str
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def run(client):
+    """Run a coroutine function on the app's event loop: run(fn, *args)."""
+    return client.portal.call
+
+
+@pytest.fixture
+def db(client):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    from core.hashing import get_password_hash
+    from core.security import create_access_token
+    from models.users import User
+
+    def make_user(*, admin: bool = False) -> Account:
+        n = next(_ids)
+        user = User(
+            username=f"user{n}",
+            email=f"user{n}@example.com",
+            hashed_password=get_password_hash("password"),
+            is_admin=admin,
+        )
+        db.add(user)
+        db.commit()
+        token = create_access_token({"sub": user.username}, timedelta(minutes=30))
+        return Account(user.id, user.username, admin, token)
+
+    return make_user
+
+
+@pytest.fixture
+def make_course(db):
+    from models.courses import Course
+    from models.enrollments import Enrollment
+
+    def make_course(*, students=()):
+        n = next(_ids)
+        course = Course(name=f"Course {n}", code=f"C{n}")
+        db.add(course)
+        db.flush()
+        db.add_all(Enrollment(user_id=student.id, course_id=course.id) for student in students)
+        db.commit()
+        return course
+
+    return make_course
+
+
+@pytest.fixture
+def make_live_class(db):
+    from models.live_classes import LiveClass
+
+    def make_live_class(course, *, starts_in=timedelta(minutes=-5), length=timedelta(hours=1)):
+        starts_at = datetime.now(timezone.utc) + starts_in
+        live_class = LiveClass(
+            course_id=course.id,
+            title=f"Class {next(_ids)}",
+            starts_at=starts_at,
+            ends_at=starts_at + length,
+            meeting_url="https://meet.example.com/class",
+        )
+        db.add(live_class)
+        db.commit()
+        return live_class
+
+    return make_live_class
+
+
+@pytest.fixture
+def make_homework(db):
+    from models.homeworks import Homework
+
+    def make_homework(course):
+        homework = Homework(
+            course_id=course.id,
+            title=f"Homework {next(_ids)}",
+            due_date=datetime.now(timezone.utc) + timedelta(days=7),
+        )
+        db.add(homework)
+        db.commit()
+        return homework
+
+    return make_homework
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import io
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import pytest
+from fastapi import UploadFile
+
+from core.storage import stage_upload, storage
+from crud import blobs
+from database import AsyncSessionLocal, SessionLocal
+from models.blobs import Blob
+
+
+async def _store(content: bytes, **kwargs) -> Blob:
+    """Stage and store `content` like an upload does."""
+    staged = await stage_upload(UploadFile(io.BytesIO(content), filename="upload.bin"))
+    async with AsyncSessionLocal() as db:
+        return await blobs.store_blob_async(db, staged, **kwargs)
+
+
+@pytest.fixture
+def store(run):
+    def store(content: bytes, **kwargs) -> Blob:
+        return run(partial(_store, content, **kwargs))
+
+    return store
+
+
+def _content(label: str) -> bytes:
+    # Unique per test, since blobs are shared across the session database
+    return f"{label} {datetime.now(timezone.utc).isoformat()}".encode()
+
+
+def _object_exists(blob: Blob) -> bool:
+    return storage.local_path(blob.storage_key).exists()
+
+
+def _collect(run, **kwargs) -> int:
+    async def collect():
+        async with AsyncSessionLocal() as db:
+            return await blobs.collect_unreferenced_blobs_async(db, **kwargs)
+
+    return run(collect)
+
+
+def test_same_content_is_stored_once(db, store):
+    content = _content("dedup")
+
+    first = store(content)
+    second = store(content)
+
+    assert first.sha256 == second.sha256 == hashlib.sha256(content).hexdigest()
+    assert first.storage_key == second.storage_key
+    assert db.query(Blob).filter_by(sha256=first.sha256).count() == 1
+
+
+def test_collects_unreferenced_blobs_past_the_grace_period(run, db, store):
+    blob = store(_content("unreferenced"))
+
+    _collect(run, grace_seconds=3600)
+    assert db.get(Blob, blob.sha256) is not None
+
+    assert _collect(run, grace_seconds=0) >= 1
+    db.expire_all()
+    assert db.get(Blob, blob.sha256) is None
+    assert not _object_exists(blob)
+
+
+def test_referenced_blob_survives(run, db, store):
+    blob = store(_content("referenced"))
+    db.execute(blobs.reference_blob_statement(blob.sha256))
+    db.commit()
+
+    _collect(run, grace_seconds=0)
+
+    assert db.get(Blob, blob.sha256) is not None
+    assert _object_exists(blob)
+
+
+def test_upload_during_collection_waits_and_stores_again(run, db, monkeypatch, store):
+    content = _content("racing")
+    blob = store(content)
+    deleting, release = threading.Event(), threading.Event()
+
+    class SlowStorage:
+        def delete(self, key):
+            if key == blob.storage_key:
+                deleting.set()
+                release.wait(10)
+            storage.delete(key)
+
+    monkeypatch.setattr(blobs, "storage", SlowStorage())
+
+    async def scenario():
+        async with AsyncSessionLocal() as gc_db:
+            collection = asyncio.create_task(blobs.collect_unreferenced_blobs_async(gc_db, grace_seconds=0))
+            # The row is tombstoned and its object is being deleted
+            await asyncio.to_thread(deleting.wait, 10)
+            upload = asyncio.create_task(_store(content))
+            await asyncio.sleep(0.3)
+            waited = not upload.done()
+            release.set()
+            await collection
+            return waited, await upload
+
+    waited, stored = run(scenario)
+
+    assert waited
+    assert stored.deleting_at is None
+    db.expire_all()
+    assert db.get(Blob, blob.sha256).deleting_at is None
+    assert _object_exists(stored)
+
+
+def test_upload_gives_up_on_a_tombstone_that_stays(db, store):
+    content = _content("stuck")
+    blob = store(content)
+    db.get(Blob, blob.sha256).deleting_at = datetime.now(timezone.utc)
+    db.commit()
+
+    with pytest.raises(blobs.BlobBeingDeleted):
+        store(content, wait=0.2)
+
+
+def test_unfinished_collection_is_finished_later(run, db, store):
+    stale, fresh = store(_content("stale")), store(_content("fresh"))
+    now = datetime.now(timezone.utc)
+    db.get(Blob, stale.sha256).deleting_at = now - timedelta(hours=1)
+    db.get(Blob, fresh.sha256).deleting_at = now
+    db.commit()
+
+    _collect(run, grace_seconds=3600, tombstone_timeout=600)
+
+    db.expire_all()
+    assert db.get(Blob, stale.sha256) is None
+    assert not _object_exists(stale)
+    # Another collection may still be working on this one
+    assert db.get(Blob, fresh.sha256) is not None
+    assert _object_exists(fresh)
+
+
+def test_concurrent_inserts_of_the_same_content_share_one_blob(run, db, monkeypatch, store):
+    content = _content("concurrent")
+    promoted = []
+    both_promoting = threading.Barrier(2, timeout=10)
+    promote = blobs.promote_staged
+
+    def promote_together(staged, key, **kwargs):
+        promoted.append(staged.key)
+        # Neither upload has inserted its row yet
+        both_promoting.wait()
+        promote(staged, key, **kwargs)
+
+    monkeypatch.setattr(blobs, "promote_staged", promote_together)
+
+    async def scenario():
+        return await asyncio.gather(_store(content), _store(content))
+
+    first, second = run(scenario)
+
+    # Each staged file was promoted once; the loser reused the winner's row
+    assert len(promoted) == 2
+    assert first.sha256 == second.sha256
+    assert db.query(Blob).filter_by(sha256=first.sha256).count() == 1
+    assert storage.local_path(first.storage_key).read_bytes() == content
+
+
+def test_losing_insert_to_a_collected_blob_does_not_promote_again(run, monkeypatch):
+    content = _content("lost race")
+    sha256 = hashlib.sha256(content).hexdigest()
+    promoted = []
+    promote = blobs.promote_staged
+
+    def promote_as_collected(staged, key, **kwargs):
+        promoted.append(staged.key)
+        promote(staged, key, **kwargs)
+        # Meanwhile another upload inserted the row, and a collection
+        # tombstoned it
+        now = datetime.now(timezone.utc)
+        with SessionLocal() as other:
+            other.add(Blob(
+                sha256=sha256, size=len(content), storage_key=key, ref_count=0,
+                created_at=now, last_seen_at=now, deleting_at=now,
+            ))
+            other.commit()
+
+    touch = blobs._touch_blob
+
+    async def touch_after_collection(db, sha, now):
+        if promoted:
+            # ... which has finished by the time the loser looks again
+            storage.delete(blobs.blob_key(sha256))
+            with SessionLocal() as other:
+                other.query(Blob).filter_by(sha256=sha256).delete()
+                other.commit()
+        return await touch(db, sha, now)
+
+    monkeypatch.setattr(blobs, "promote_staged", promote_as_collected)
+    monkeypatch.setattr(blobs, "_touch_blob", touch_after_collection)
+
+    with pytest.raises(blobs.BlobBeingDeleted):
+        run(partial(_store, content, wait=5))
+    assert len(promoted) == 1
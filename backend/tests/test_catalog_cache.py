@@ -0,0 +1,101 @@
+import pytest
+
+import core.redis
+from core.query_counter import QueryCounter
+from crud import course_cache
+from database import async_engine
+
+
+@pytest.fixture(params=[False, True], ids=["local", "redis"])
+def shared(request, monkeypatch):
+    monkeypatch.setattr(course_cache, "CATALOG_CACHE_REDIS", request.param)
+    return request.param
+
+
+def _course_ids(response) -> list[int]:
+    return [course["id"] for course in response.json()]
+
+
+def test_warm_and_revalidated_pages_skip_the_database(client, shared, make_course):
+    make_course()
+    cold = client.get("/courses/")
+
+    with QueryCounter(async_engine) as queries:
+        warm = client.get("/courses/")
+        not_modified = client.get("/courses/", headers={"If-None-Match": cold.headers["ETag"]})
+
+    assert queries.count == 0
+    assert warm.content == cold.content
+    assert warm.headers["Cache-Control"].startswith("public, max-age=")
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_new_course_changes_the_page_and_etag(client, shared, make_course):
+    before = client.get("/courses/")
+
+    course = make_course()
+    after = client.get("/courses/")
+
+    assert course.id in _course_ids(after)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert client.get("/courses/", headers={"If-None-Match": before.headers["ETag"]}).status_code == 200
+
+
+def test_another_workers_commit_retires_local_pages(client, monkeypatch, make_course):
+    monkeypatch.setattr(course_cache, "CATALOG_CACHE_REDIS", True)
+    client.get("/courses/")
+    make_course()
+    before = client.get("/courses/")
+
+    # What invalidate_catalog() does in the worker that committed
+    core.redis.redis_sync_client.incr(course_cache._GENERATION_KEY)
+    with QueryCounter(async_engine) as queries:
+        after = client.get("/courses/")
+
+    assert queries.count == 1
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+
+def test_page_rendered_before_a_commit_is_not_served_after_it(client, db, shared, monkeypatch, make_course):
+    """A slow reader finishes rendering after a course was committed and the cache dropped."""
+    from models.courses import Course
+
+    client.get("/courses/")
+    make_course()  # drop the warm page
+    render = course_cache.get_all_courses_async
+    added = []
+
+    async def slow_render(session, page):
+        result = await render(session, page)
+        if not added:
+            course = Course(name="Late course", code=f"LATE{len(result[0])}")
+            db.add(course)
+            db.commit()
+            added.append(course.id)
+        return result
+
+    monkeypatch.setattr(course_cache, "get_all_courses_async", slow_render)
+    stale = client.get("/courses/")
+    fresh = client.get("/courses/")
+
+    assert added[0] not in _course_ids(stale)
+    assert added[0] in _course_ids(fresh)
+
+
+def test_redis_outage_falls_back_to_local_pages(client, monkeypatch, make_course):
+    from redis.exceptions import ConnectionError
+
+    monkeypatch.setattr(course_cache, "CATALOG_CACHE_REDIS", True)
+
+    async def unreachable(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(core.redis.redis_client, "get", unreachable)
+    monkeypatch.setattr(core.redis.redis_client, "hget", unreachable)
+    course = make_course()
+
+    assert course.id in _course_ids(client.get("/courses/"))
+    with QueryCounter(async_engine) as queries:
+        assert client.get("/courses/").status_code == 200
+    assert queries.count == 0
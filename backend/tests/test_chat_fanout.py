@@ -0,0 +1,145 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from core.chat_fanout import SLOW_CONSUMER_CLOSE_CODE, ChatConnection, broadcast
+
+
+class StalledSocket:
+    """A client that stops reading until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+class FastSocket(StalledSocket):
+    def __init__(self):
+        super().__init__()
+        self.release.set()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slow_socket_does_not_delay_the_others(run):
+    async def scenario():
+        slow, fast = StalledSocket(), FastSocket()
+        conns = [
+            ChatConnection(slow, user_id=1, is_admin=False, max_queue=4),
+            ChatConnection(fast, user_id=2, is_admin=False, max_queue=4),
+        ]
+        for i in range(3):
+            broadcast(conns, f"m{i}", from_admin=True)
+        await _settle()
+        assert fast.sent == ["m0", "m1", "m2"]
+        assert slow.sent == []
+
+        slow.release.set()
+        await _settle()
+        assert slow.sent == ["m0", "m1", "m2"]
+        for conn in conns:
+            conn.stop()
+
+    run(scenario)
+
+
+def test_drop_oldest_keeps_the_newest_frames(run):
+    async def scenario():
+        ws = StalledSocket()
+        conn = ChatConnection(ws, user_id=1, is_admin=False, max_queue=2, policy="drop_oldest")
+        assert conn.send("m0")
+        await _settle()
+        # The writer is stuck on m0; the queue holds two more
+        for i in range(1, 5):
+            assert conn.send(f"m{i}")
+        assert conn.dropped == 2
+
+        ws.release.set()
+        await _settle()
+        assert ws.sent == ["m0", "m3", "m4"]
+        conn.stop()
+
+    run(scenario)
+
+
+def test_disconnect_policy_closes_a_full_socket(run):
+    async def scenario():
+        ws = StalledSocket()
+        conn = ChatConnection(ws, user_id=1, is_admin=False, max_queue=1, policy="disconnect")
+        assert conn.send("m0")
+        await _settle()
+        assert conn.send("m1")
+        assert not conn.send("m2")
+        await _settle()
+        assert conn.closed
+        assert ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+
+    run(scenario)
+
+
+def test_student_messages_only_reach_admins(run):
+    async def scenario():
+        admin, student = FastSocket(), FastSocket()
+        conns = [
+            ChatConnection(admin, user_id=1, is_admin=True),
+            ChatConnection(student, user_id=2, is_admin=False),
+        ]
+        assert broadcast(conns, "from a student", from_admin=False) == 1
+        await _settle()
+        assert admin.sent == ["from a student"]
+        assert student.sent == []
+        for conn in conns:
+            conn.stop()
+
+    run(scenario)
+
+
+def test_close_waits_for_a_slow_consumer_disconnect(run):
+    async def scenario():
+        ws = StalledSocket()
+        conn = ChatConnection(ws, user_id=1, is_admin=False, max_queue=1, policy="disconnect")
+        conn.send("m0")
+        await _settle()
+        conn.send("m1")
+        assert not conn.send("m2")
+        assert conn._closing is not None
+
+        await conn.close()
+        assert conn._closing.done()
+        assert ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+
+    run(scenario)
+
+
+def test_unknown_policy_is_rejected(run):
+    async def scenario():
+        with pytest.raises(ValueError):
+            ChatConnection(FastSocket(), user_id=1, is_admin=False, policy="drop_newest")
+
+    run(scenario)
+
+
+def test_unknown_policy_setting_fails_at_import():
+    env = {**os.environ, "CHAT_SLOW_CONSUMER_POLICY": "drop-oldest"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import core.chat_fanout"],
+        cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True, text=True,
+    )
+
+    assert result.returncode != 0
+    assert "Unknown CHAT_SLOW_CONSUMER_POLICY: drop-oldest" in result.stderr
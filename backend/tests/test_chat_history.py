@@ -0,0 +1,106 @@
+import pytest
+
+from core.query_counter import QueryCounter
+from crud.live_chat import bulk_create_live_chat_messages, get_live_chat_messages
+from crud.live_chat_cache import CHAT_HISTORY_SIZE
+from database import async_engine
+
+
+@pytest.fixture
+def chat(db, make_user, make_course, make_live_class):
+    """A class with `count` messages; returns (student, live_class, message ids)."""
+    def chat(count: int):
+        student = make_user()
+        live_class = make_live_class(make_course(students=[student]))
+        rows = [
+            {"live_class_id": live_class.id, "user_id": student.id, "message": f"m{i}"}
+            for i in range(count)
+        ]
+        ids = [row.id for row in bulk_create_live_chat_messages(db, rows)]
+        return student, live_class, ids
+
+    return chat
+
+
+def _history(client, live_class, student, **params):
+    response = client.get(f"/chat/{live_class.id}/messages", params=params, headers=student.headers)
+    assert response.status_code == 200
+    return [m["id"] for m in response.json()]
+
+
+def test_keyset_pages_walk_back_and_forward(db, chat):
+    _, live_class, ids = chat(8)
+
+    def page(**kwargs):
+        return [m.id for m in get_live_chat_messages(db, live_class.id, 3, **kwargs)]
+
+    assert page() == ids[-3:]
+    assert page(before_id=ids[5]) == ids[2:5]
+    assert page(before_id=ids[2]) == ids[:2]
+    assert page(before_id=ids[0]) == []
+
+    assert page(after_id=ids[1]) == ids[2:5]
+    assert page(after_id=ids[4]) == ids[5:]
+    assert page(after_id=ids[-1]) == []
+
+
+def test_scrolling_back_reads_the_database(client, chat):
+    student, live_class, ids = chat(8)
+    _history(client, live_class, student)
+
+    with QueryCounter(async_engine) as queries:
+        older = _history(client, live_class, student, before_id=ids[4], limit=3)
+
+    assert older == ids[1:4]
+    assert queries.count == 1
+
+
+def test_delta_sync_is_served_from_the_buffer(client, chat):
+    student, live_class, ids = chat(8)
+    # Cold read: warms the buffer from the database
+    assert _history(client, live_class, student) == ids
+
+    with QueryCounter(async_engine) as queries:
+        gap = _history(client, live_class, student, after_id=ids[4])
+        empty = _history(client, live_class, student, after_id=ids[-1])
+        limited = _history(client, live_class, student, after_id=ids[0], limit=2)
+
+    assert gap == ids[5:]
+    assert empty == []
+    assert limited == ids[1:3]
+    assert queries.count == 0
+
+
+def test_delta_older_than_the_buffer_falls_back_to_the_database(client, chat):
+    student, live_class, ids = chat(CHAT_HISTORY_SIZE + 10)
+    assert _history(client, live_class, student, limit=CHAT_HISTORY_SIZE) == ids[-CHAT_HISTORY_SIZE:]
+
+    with QueryCounter(async_engine) as queries:
+        # The buffer no longer holds ids[2], so it can't prove the gap is complete
+        gap = _history(client, live_class, student, after_id=ids[2], limit=20)
+    assert gap == ids[3:23]
+    assert queries.count == 1
+
+    with QueryCounter(async_engine) as queries:
+        recent = _history(client, live_class, student, after_id=ids[-5])
+    assert recent == ids[-4:]
+    assert queries.count == 0
+
+
+def test_redis_outage_reads_history_from_the_database(client, monkeypatch, chat):
+    from redis.exceptions import ConnectionError
+
+    import core.redis
+
+    student, live_class, ids = chat(5)
+    _history(client, live_class, student)
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(core.redis.redis_client, "pipeline", unreachable)
+    with QueryCounter(async_engine) as queries:
+        gap = _history(client, live_class, student, after_id=ids[1])
+
+    assert gap == ids[2:]
+    assert queries.count == 1
@@ -0,0 +1,56 @@
+import pytest
+from redis.exceptions import RedisError
+
+import routers.websocket
+from crud.live_chat import chat_channel
+from crud.presence import get_attendance
+from routers.websocket import active_connections, chat_subscriber
+
+
+def _chat_path(live_class_id: int, user) -> str:
+    return f"/chat/ws/live-classes/{live_class_id}/chat?token={user.token}"
+
+
+def _assert_released(run, live_class_id: int):
+    assert live_class_id not in active_connections
+    assert chat_channel(live_class_id) not in chat_subscriber._refs
+    assert run(get_attendance, live_class_id)["attendees"] == 0
+
+
+def test_admin_sees_student_message(client, make_user, make_course, make_live_class):
+    admin, student = make_user(admin=True), make_user()
+    live_class = make_live_class(make_course(students=[student]))
+
+    with client.websocket_connect(_chat_path(live_class.id, admin)) as admin_ws, \
+            client.websocket_connect(_chat_path(live_class.id, student)) as student_ws:
+        student_ws.send_text("hello")
+        message = admin_ws.receive_json()
+
+    assert message["message"] == "hello"
+    assert message["user_id"] == student.id
+
+
+def test_disconnect_releases_the_socket(client, run, make_user, make_course, make_live_class):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+
+    with client.websocket_connect(_chat_path(live_class.id, student)):
+        pass
+
+    _assert_released(run, live_class.id)
+
+
+def test_server_error_releases_the_socket(client, run, monkeypatch, make_user, make_course, make_live_class):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+
+    async def publish_fails(*args, **kwargs):
+        raise RedisError("connection lost")
+
+    monkeypatch.setattr(routers.websocket, "publish_live_chat_message", publish_fails)
+    with pytest.raises(RedisError):
+        with client.websocket_connect(_chat_path(live_class.id, student)) as ws:
+            ws.send_text("hello")
+            ws.receive_text()
+
+    _assert_released(run, live_class.id)
@@ -0,0 +1,117 @@
+import itertools
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import database
+from database import (
+    InstrumentedQueuePool,
+    db_pool_checked_out,
+    db_pool_checkouts,
+    db_pool_overflow,
+    db_pool_timeouts,
+    db_pool_wait_seconds,
+    instrument_pool,
+    pgbouncer_connect_args,
+)
+
+_pools = itertools.count(1)
+
+
+@pytest.fixture
+def small_pool(tmp_path):
+    """Two connections plus one overflow, giving up after 200ms."""
+    name = f"stress{next(_pools)}"
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.2,
+    )
+    instrument_pool(engine.pool, name)
+    yield engine, name
+    engine.dispose()
+
+
+def _wait_buckets(name: str) -> dict[str, int]:
+    return {
+        labels[-1]: value
+        for sample, labels, value in db_pool_wait_seconds.samples()
+        if sample.endswith("_bucket") and labels[0] == name
+    }
+
+
+def test_saturated_pool_records_waits(small_pool):
+    engine, name = small_pool
+
+    def hold():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            time.sleep(0.05)
+
+    # Twice as many threads as connections: half of them must wait
+    threads = [threading.Thread(target=hold) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert db_pool_checkouts.value(pool=name) == 6
+    assert db_pool_wait_seconds.count(pool=name) == 6
+    buckets = _wait_buckets(name)
+    # Three got a connection at once, the others waited ~50ms for one
+    assert buckets["0.01"] == 3
+    assert buckets["+Inf"] == 6
+    assert db_pool_timeouts.value(pool=name) == 0
+
+
+def test_exhausted_pool_times_out_and_counts_it(small_pool):
+    engine, name = small_pool
+    held = [engine.connect() for _ in range(3)]
+    try:
+        assert db_pool_checked_out.value(pool=name) == 3
+        assert db_pool_overflow.value(pool=name) == 1
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    finally:
+        for conn in held:
+            conn.close()
+
+    assert db_pool_timeouts.value(pool=name) == 1
+    assert db_pool_checked_out.value(pool=name) == 0
+    # The failed attempt's wait is recorded too, in the 250ms bucket
+    assert _wait_buckets(name)["0.25"] == 4
+
+
+def test_pool_histograms_are_exported(client, small_pool):
+    engine, name = small_pool
+    with engine.connect():
+        pass
+
+    body = client.get("/metrics").text
+    assert f'db_pool_wait_seconds_count{{pool="{name}"}} 1' in body
+    assert f'db_pool_checkouts_total{{pool="{name}"}} 1' in body
+
+
+def test_pool_settings_apply_to_server_databases(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(database, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(database, "DB_PGBOUNCER", True)
+
+    options = database._engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert options["connect_args"] == {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+
+    # SQLite keeps SQLAlchemy's own pool
+    assert "pool_size" not in database._engine_options("sqlite:///app.db")
+
+
+def test_pgbouncer_mode_turns_off_prepared_statements():
+    assert pgbouncer_connect_args("postgresql+psycopg://u:p@db/app") == {"prepare_threshold": None}
+    assert pgbouncer_connect_args("postgresql+psycopg2://u:p@db/app") == {}
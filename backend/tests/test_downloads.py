@@ -0,0 +1,120 @@
+import hashlib
+import io
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+
+import pytest
+
+
+@pytest.fixture
+def submit(client):
+    def submit(student, homework, content: bytes, filename: str = "answers.pdf") -> int:
+        response = client.post(
+            f"/homeworks/{homework.id}/submit",
+            headers=student.headers,
+            files={"file": (filename, content)},
+        )
+        assert response.status_code == 200
+        return response.json()["id"]
+
+    return submit
+
+
+@pytest.fixture
+def submission(make_user, make_course, make_homework, submit):
+    """(student, submission id, content) of one uploaded file."""
+    student = make_user()
+    homework = make_homework(make_course(students=[student]))
+    content = b"%PDF-1.7 answers " * 500
+    return student, submit(student, homework, content), content
+
+
+def _file_path(submission_id: int) -> str:
+    return f"/homeworks/submissions/{submission_id}/file"
+
+
+def test_download_carries_validators(client, submission):
+    student, submission_id, content = submission
+
+    response = client.get(_file_path(submission_id), headers=student.headers)
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["ETag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert parsedate_to_datetime(response.headers["Last-Modified"])
+    assert 'filename="answers.pdf"' in response.headers["Content-Disposition"]
+
+
+def test_range_request_gets_partial_content(client, submission):
+    student, submission_id, content = submission
+
+    response = client.get(_file_path(submission_id), headers={**student.headers, "Range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.content == content[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(content)}"
+
+
+def test_conditional_requests_are_not_modified(client, submission):
+    student, submission_id, _ = submission
+    first = client.get(_file_path(submission_id), headers=student.headers)
+
+    by_etag = client.get(
+        _file_path(submission_id), headers={**student.headers, "If-None-Match": first.headers["ETag"]},
+    )
+    by_date = client.get(
+        _file_path(submission_id),
+        headers={**student.headers, "If-Modified-Since": first.headers["Last-Modified"]},
+    )
+    older = client.get(
+        _file_path(submission_id),
+        headers={**student.headers, "If-Modified-Since": formatdate(0, usegmt=True)},
+    )
+
+    assert by_etag.status_code == 304 and by_etag.content == b""
+    assert by_etag.headers["ETag"] == first.headers["ETag"]
+    assert by_date.status_code == 304
+    assert older.status_code == 200
+
+
+def test_only_the_owner_and_admins_can_download(client, make_user, submission):
+    _, submission_id, content = submission
+    other, admin = make_user(), make_user(admin=True)
+
+    assert client.get(_file_path(submission_id), headers=other.headers).status_code == 404
+    assert client.get(_file_path(submission_id), headers=admin.headers).content == content
+    assert client.get(_file_path(10**9), headers=admin.headers).status_code == 404
+
+
+def test_archive_holds_every_submission(client, make_user, make_course, make_homework, submit):
+    first, second, admin = make_user(), make_user(), make_user(admin=True)
+    homework = make_homework(make_course(students=[first, second]))
+    shared = b"same answers " * 100
+    uploads = {
+        submit(first, homework, shared, "a.pdf"): (first, "a.pdf", shared),
+        submit(second, homework, shared, "b.pdf"): (second, "b.pdf", shared),
+        submit(second, homework, b"second try", "../b2.txt"): (second, "b2.txt", b"second try"),
+    }
+
+    response = client.get(f"/homeworks/{homework.id}/submissions/archive", headers=admin.headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.testzip() is None
+    expected = {
+        f"{student.id}/{submission_id}-{name}": content
+        for submission_id, (student, name, content) in uploads.items()
+    }
+    assert {name: archive.read(name) for name in archive.namelist()} == expected
+
+
+def test_archive_is_admin_only_and_needs_the_homework(client, make_user, make_course, make_homework):
+    student, admin = make_user(), make_user(admin=True)
+    homework = make_homework(make_course(students=[student]))
+
+    assert client.get(f"/homeworks/{homework.id}/submissions/archive", headers=student.headers).status_code == 403
+    assert client.get("/homeworks/999999999/submissions/archive", headers=admin.headers).status_code == 404
+    empty = client.get(f"/homeworks/{homework.id}/submissions/archive", headers=admin.headers)
+    assert empty.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(empty.content)).namelist() == []
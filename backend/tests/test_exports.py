@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from core.export import stream_rows
+from crud.exports import submissions_export_statement
+from models.homeworks import Homework, HomeworkSubmission
+
+
+@pytest.fixture
+def homework_with(db, make_user, make_course):
+    """A homework with `count` submissions, bulk inserted."""
+
+    def homework_with(count: int) -> int:
+        student = make_user()
+        homework = Homework(course_id=make_course().id, title="Homework", due_date=datetime.now(timezone.utc))
+        db.add(homework)
+        db.flush()
+        submitted_at = datetime.now(timezone.utc)
+        for start in range(0, count, 20_000):
+            db.execute(insert(HomeworkSubmission), [
+                {
+                    "homework_id": homework.id,
+                    "user_id": student.id,
+                    "file_url": f"/uploads/{homework.id}/{i}",
+                    "submitted_at": submitted_at,
+                }
+                for i in range(start, min(start + 20_000, count))
+            ])
+        db.commit()
+        return homework.id
+
+    return homework_with
+
+
+def _peak_export_memory(run, homework_id: int, fmt: str) -> tuple[int, int]:
+    """Stream one export, dropping each chunk. Returns (rows, peak traced bytes)."""
+
+    async def consume():
+        rows = 0
+        async for chunk in stream_rows(submissions_export_statement(homework_id), fmt):
+            rows += chunk.count("\n")
+        return rows
+
+    tracemalloc.start()
+    try:
+        rows = run(consume)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return rows, peak
+
+
+def test_memory_does_not_grow_with_rows(run, homework_with):
+    small, large = homework_with(5_000), homework_with(50_000)
+
+    for fmt, header_lines in (("ndjson", 0), ("csv", 1)):
+        small_rows, small_peak = _peak_export_memory(run, small, fmt)
+        large_rows, large_peak = _peak_export_memory(run, large, fmt)
+
+        assert (small_rows, large_rows) == (5_000 + header_lines, 50_000 + header_lines)
+        # Ten times the rows, about the same peak: only a batch is ever held
+        assert large_peak < small_peak * 1.5, (fmt, small_peak, large_peak)
+
+
+def test_ndjson_export(client, make_user, homework_with):
+    admin = make_user(admin=True)
+    homework_id = homework_with(3)
+
+    response = client.get("/exports/submissions", headers=admin.headers, params={"homework_id": homework_id})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["file_url"] for row in rows] == [f"/uploads/{homework_id}/{i}" for i in range(3)]
+    assert set(rows[0]) == {"id", "homework_id", "user_id", "file_url", "submitted_at"}
+
+
+def test_csv_export(client, make_user, homework_with):
+    admin = make_user(admin=True)
+    homework_id = homework_with(2)
+
+    response = client.get(
+        "/exports/submissions", headers=admin.headers, params={"homework_id": homework_id, "format": "csv"},
+    )
+
+    assert response.headers["content-disposition"] == 'attachment; filename="submissions.csv"'
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == ["id", "homework_id", "user_id", "file_url", "submitted_at"]
+    assert len(rows) == 2
+
+
+def test_exports_are_admin_only(client, make_user):
+    student = make_user()
+
+    assert client.get("/exports/users", headers=student.headers).status_code == 403
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from core import hashing
+
+
+def test_hashing_runs_on_the_pool():
+    assert hashing._run_hashing(lambda: threading.current_thread().name).startswith("bcrypt")
+
+
+def test_hash_round_trip():
+    hashed = hashing.get_password_hash("s3cret")
+    assert hashing.verify_password("s3cret", hashed)
+    assert not hashing.verify_password("wrong", hashed)
+
+
+@pytest.fixture
+def saturate(monkeypatch):
+    def saturate():
+        # No free slot: every worker busy and the queue full
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        monkeypatch.setattr(hashing, "_hashing_slots", slots)
+
+    return saturate
+
+
+def test_saturated_pool_rejects_login_fast(client, make_user, saturate):
+    user = make_user()
+    saturate()
+    response = client.post("/auth/login", data={"username": user.username, "password": "password"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_saturated_pool_rejects_signup_fast(client, saturate):
+    saturate()
+    response = client.post("/auth/signup", json={
+        "username": "burst-signup",
+        "email": "burst-signup@example.com",
+        "password": "password",
+    })
+
+    assert response.status_code == 503
+
+
+def test_login_works_once_a_slot_frees(client, make_user):
+    user = make_user()
+    response = client.post("/auth/login", data={"username": user.username, "password": "password"})
+
+    assert response.status_code == 200
+    assert response.json()["access_token"]
@@ -0,0 +1,90 @@
+import re
+
+import routers.metrics
+from core.query_counter import QueryCounter
+from database import async_engine
+
+_SAMPLE = re.compile(r"^(?P<series>[^ ]+) (?P<value>[^ ]+)$")
+
+
+def _scrape(client) -> dict[str, float]:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        assert match, f"malformed sample line: {line!r}"
+        samples[match["series"]] = float(match["value"])
+    return samples
+
+
+def _delta(before: dict, after: dict, series: str) -> float:
+    return after.get(series, 0) - before.get(series, 0)
+
+
+def test_request_is_recorded_under_its_route_and_status(client, make_user):
+    user = make_user()
+    before = _scrape(client)
+
+    with QueryCounter(async_engine) as queries:
+        assert client.get("/auth/me", headers=user.headers).status_code == 200
+
+    after = _scrape(client)
+    labels = 'method="GET",route="/auth/me"'
+    assert _delta(before, after, f'http_request_duration_seconds_count{{{labels},status="200"}}') == 1
+    assert _delta(before, after, f'http_request_duration_seconds_sum{{{labels},status="200"}}') > 0
+    assert _delta(before, after, f'http_request_duration_seconds_bucket{{{labels},status="200",le="+Inf"}}') == 1
+    # Every statement the request ran is attributed to it
+    assert queries.count >= 1
+    assert _delta(before, after, f"http_request_db_queries_sum{{{labels}}}") == queries.count
+    assert _delta(before, after, f"http_request_db_queries_count{{{labels}}}") == 1
+    assert _delta(before, after, f"http_request_db_seconds_sum{{{labels}}}") > 0
+    assert _delta(before, after, 'db_queries_total{engine="async"}') >= queries.count
+
+
+def test_request_without_sql_counts_zero_queries(client, make_user):
+    user = make_user()
+    client.get("/auth/me", headers=user.headers)
+    before = _scrape(client)
+
+    # Warm user cache: no SQL
+    client.get("/auth/me", headers=user.headers)
+
+    after = _scrape(client)
+    labels = 'method="GET",route="/auth/me"'
+    assert _delta(before, after, f"http_request_db_queries_sum{{{labels}}}") == 0
+    assert _delta(before, after, f'http_request_db_queries_bucket{{{labels},le="0"}}') == 1
+
+
+def test_route_label_is_the_template(client, make_user, make_course, make_live_class):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+    before = _scrape(client)
+
+    client.get(f"/live-classes/{live_class.id}/join", headers=student.headers)
+    client.get("/no/such/path")
+    client.get("/auth/me")
+
+    after = _scrape(client)
+    assert _delta(
+        before, after,
+        'http_request_duration_seconds_count{method="GET",route="/live-classes/{class_id}/join",status="200"}',
+    ) == 1
+    assert _delta(
+        before, after, 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}',
+    ) == 1
+    assert _delta(
+        before, after, 'http_request_duration_seconds_count{method="GET",route="/auth/me",status="401"}',
+    ) == 1
+    assert not any(f"/live-classes/{live_class.id}/" in series for series in after)
+
+
+def test_metrics_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(routers.metrics, "METRICS_TOKEN", "scrape-secret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
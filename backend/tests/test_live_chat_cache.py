@@ -0,0 +1,140 @@
+import itertools
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import routers.websocket
+from crud.live_chat import create_live_chat_message
+from crud.live_chat_cache import (
+    CHAT_HISTORY_SIZE,
+    begin_chat_history_warm,
+    get_cached_chat_history,
+    publish_live_chat_message,
+    warm_chat_history,
+)
+
+# Buffers only, no rows behind them: ids well clear of the database's
+_class_ids = itertools.count(1_000_000)
+
+
+@pytest.fixture
+def live_class_id():
+    return next(_class_ids)
+
+
+def _row(live_class_id: int, id: int):
+    return SimpleNamespace(
+        id=id,
+        live_class_id=live_class_id,
+        user_id=1,
+        message=f"m{id}",
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def _payload(id: int):
+    return {
+        "id": id,
+        "user_id": 1,
+        "message": f"m{id}",
+        "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc).isoformat(),
+        "is_admin": False,
+    }
+
+
+def _ids(history):
+    return [m["id"] for m in history]
+
+
+def test_cold_buffer_warms_from_the_snapshot(run, live_class_id):
+    async def scenario():
+        assert await get_cached_chat_history(live_class_id) is None
+        await begin_chat_history_warm(live_class_id)
+        # Still cold until the snapshot is in
+        assert await get_cached_chat_history(live_class_id) is None
+        await warm_chat_history(live_class_id, [_row(live_class_id, i) for i in (1, 2, 3)])
+        return await get_cached_chat_history(live_class_id)
+
+    history = run(scenario)
+
+    assert _ids(history) == [1, 2, 3]
+    assert history[0]["message"] == "m1"
+
+
+def test_append_to_a_cold_buffer_is_skipped(run, live_class_id):
+    async def scenario():
+        await publish_live_chat_message(live_class_id, _payload(1))
+        await begin_chat_history_warm(live_class_id)
+        await warm_chat_history(live_class_id, [])
+        return await get_cached_chat_history(live_class_id)
+
+    assert run(scenario) == []
+
+
+def test_messages_published_while_warming_are_kept(run, live_class_id):
+    async def scenario():
+        await begin_chat_history_warm(live_class_id)
+        # Published between the database read and the warm step: 5 is
+        # newer than the snapshot, 3 committed late with an older id,
+        # and 4 is in the snapshot too
+        for id in (5, 3, 4):
+            await publish_live_chat_message(live_class_id, _payload(id))
+        await warm_chat_history(live_class_id, [_row(live_class_id, i) for i in (1, 2, 4)])
+        return await get_cached_chat_history(live_class_id)
+
+    assert _ids(run(scenario)) == [1, 2, 3, 4, 5]
+
+
+def test_buffer_is_trimmed_to_the_newest(run, live_class_id):
+    async def scenario():
+        await begin_chat_history_warm(live_class_id)
+        await warm_chat_history(live_class_id, [_row(live_class_id, i) for i in range(1, 11)])
+        for id in range(11, CHAT_HISTORY_SIZE + 21):
+            await publish_live_chat_message(live_class_id, _payload(id))
+        return await get_cached_chat_history(live_class_id)
+
+    assert _ids(run(scenario)) == list(range(21, CHAT_HISTORY_SIZE + 21))
+
+
+def test_snapshot_is_trimmed_too(run, live_class_id):
+    async def scenario():
+        await begin_chat_history_warm(live_class_id)
+        await publish_live_chat_message(live_class_id, _payload(CHAT_HISTORY_SIZE + 5))
+        await warm_chat_history(
+            live_class_id, [_row(live_class_id, i) for i in range(1, CHAT_HISTORY_SIZE + 5)],
+        )
+        return await get_cached_chat_history(live_class_id)
+
+    assert _ids(run(scenario)) == list(range(6, CHAT_HISTORY_SIZE + 6))
+
+
+def test_history_endpoint_keeps_a_message_sent_during_its_read(
+    client, db, monkeypatch, make_user, make_course, make_live_class,
+):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+    first = create_live_chat_message(db, live_class_id=live_class.id, user_id=student.id, message="first")
+    read_history = routers.websocket.get_live_chat_messages_async
+
+    async def read_then_chat(*args, **kwargs):
+        messages = await read_history(*args, **kwargs)
+        # Another worker saves and publishes a message right after the read
+        late = create_live_chat_message(db, live_class_id=live_class.id, user_id=student.id, message="late")
+        await publish_live_chat_message(live_class.id, {
+            "id": late.id,
+            "user_id": late.user_id,
+            "message": late.message,
+            "created_at": late.created_at.isoformat(),
+            "is_admin": False,
+        })
+        return messages
+
+    monkeypatch.setattr(routers.websocket, "get_live_chat_messages_async", read_then_chat)
+    cold = client.get(f"/chat/{live_class.id}/messages", headers=student.headers)
+    assert [m["message"] for m in cold.json()] == ["first"]
+
+    monkeypatch.setattr(routers.websocket, "get_live_chat_messages_async", read_history)
+    warm = client.get(f"/chat/{live_class.id}/messages", headers=student.headers)
+    assert [m["message"] for m in warm.json()] == ["first", "late"]
+    assert warm.json()[0]["id"] == first.id
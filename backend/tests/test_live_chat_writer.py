@@ -0,0 +1,126 @@
+import asyncio
+
+from crud.live_chat_writer import ChatMessageWriter
+from models.live_class_messages import LiveClassMessage
+
+
+def test_each_writer_gets_its_own_row(run, db, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=10, flush_interval_ms=5)
+        saved = await asyncio.gather(*(
+            writer.write(live_class_id=live_class.id, user_id=user.id, message=f"m{i}")
+            for i in range(25)
+        ))
+        await writer.close()
+        return saved, writer
+
+    saved, writer = run(scenario)
+
+    ids = [row.id for row in saved]
+    assert ids == sorted(ids) and len(set(ids)) == 25
+    assert writer.rows_written == 25
+    assert writer.batches_written == 3
+    stored = {msg.id: msg.message for msg in db.query(LiveClassMessage).filter_by(live_class_id=live_class.id)}
+    assert [stored[i] for i in ids] == [f"m{i}" for i in range(25)]
+
+
+def test_full_batch_does_not_wait_for_the_interval(run, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=3, flush_interval_ms=60_000)
+        await asyncio.wait_for(asyncio.gather(*(
+            writer.write(live_class_id=live_class.id, user_id=user.id, message="hi")
+            for _ in range(3)
+        )), timeout=5)
+        await writer.close()
+
+    run(scenario)
+
+
+def test_close_flushes_what_is_buffered(run, db, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=100, flush_interval_ms=60_000)
+        pending = [
+            asyncio.create_task(writer.write(live_class_id=live_class.id, user_id=user.id, message="bye"))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        assert writer.queue_depth == 5
+        await writer.close()
+        return await asyncio.gather(*pending), writer.queue_depth
+
+    saved, depth = run(scenario)
+
+    assert len(saved) == 5 and depth == 0
+    assert db.query(LiveClassMessage).filter_by(live_class_id=live_class.id).count() == 5
+
+
+def test_failed_batch_fails_every_caller(run, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=2, flush_interval_ms=5)
+        results = await asyncio.gather(
+            writer.write(live_class_id=live_class.id, user_id=user.id, message="ok"),
+            writer.write(live_class_id=live_class.id, user_id=user.id, message=None),
+            return_exceptions=True,
+        )
+        await writer.close()
+        return results, writer.failed_batches
+
+    results, failed = run(scenario)
+
+    assert all(isinstance(result, Exception) for result in results)
+    assert failed == 1
+
+
+def test_write_after_close_is_stored_directly(run, db, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=100, flush_interval_ms=60_000)
+        first = asyncio.create_task(writer.write(live_class_id=live_class.id, user_id=user.id, message="before"))
+        await asyncio.sleep(0)
+        closing = asyncio.create_task(writer.close())
+        await asyncio.sleep(0)
+        # close() has queued its stop marker; this write must not land behind it
+        late = await asyncio.wait_for(
+            writer.write(live_class_id=live_class.id, user_id=user.id, message="after"), timeout=5,
+        )
+        await closing
+        return await first, late
+
+    first, late = run(scenario)
+
+    assert late.id != first.id
+    stored = db.query(LiveClassMessage).filter_by(live_class_id=live_class.id).count()
+    assert stored == 2
+
+
+def test_cancelled_writer_fails_queued_callers(run, make_user, make_course, make_live_class):
+    user = make_user()
+    live_class = make_live_class(make_course(students=[user]))
+
+    async def scenario():
+        writer = ChatMessageWriter(flush_size=100, flush_interval_ms=60_000)
+        pending = [
+            asyncio.create_task(writer.write(live_class_id=live_class.id, user_id=user.id, message="lost"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        writer._task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), timeout=5)
+
+    results = run(scenario)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from redis.exceptions import RedisError
+
+from crud.notifications import course_channel, notify_enrolled, publish_notification, user_channel
+from routers.notifications import listeners, notification_subscriber
+
+PATH = "/notifications/ws"
+
+
+def _eventually(run, condition, message: str):
+    async def wait():
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError(message)
+
+    run(wait)
+
+
+def _wait_for_listener(run, channel: str):
+    _eventually(run, lambda: channel in listeners, f"nobody followed {channel}")
+
+
+def _assert_released(run, *channels: str):
+    # The handler's cleanup may still be running when the client side closes
+    _eventually(
+        run,
+        lambda: not any(c in listeners or c in notification_subscriber._refs for c in channels),
+        f"{channels} still held",
+    )
+
+
+def test_course_event_reaches_enrolled_student(client, run, make_user, make_course):
+    student = make_user()
+    course = make_course(students=[student])
+
+    with client.websocket_connect(f"{PATH}?token={student.token}") as ws:
+        _wait_for_listener(run, course_channel(course.id))
+        run(publish_notification, course_channel(course.id), {"type": "homework_created", "course_id": course.id})
+        event = ws.receive_json()
+
+    assert event == {"type": "homework_created", "course_id": course.id}
+    _assert_released(run, user_channel(student.id), course_channel(course.id))
+
+
+def test_enrollment_follows_the_new_course(client, run, make_user, make_course):
+    student = make_user()
+    course = make_course()
+
+    with client.websocket_connect(f"{PATH}?token={student.token}") as ws:
+        _wait_for_listener(run, user_channel(student.id))
+        run(notify_enrolled, student.id, course.id)
+        assert ws.receive_json() == {"type": "enrolled", "course_id": course.id}
+
+        _wait_for_listener(run, course_channel(course.id))
+        conn = listeners[user_channel(student.id)][0]
+        assert not conn._following
+        run(publish_notification, course_channel(course.id), {"type": "class_starting", "course_id": course.id})
+        assert ws.receive_json()["type"] == "class_starting"
+
+    _assert_released(run, user_channel(student.id), course_channel(course.id))
+
+
+def test_redis_error_while_following_releases_the_socket(client, run, monkeypatch, make_user, make_course):
+    student = make_user()
+    course = make_course(students=[student])
+    subscribe = notification_subscriber.subscribe
+
+    async def course_channels_fail(channel):
+        await subscribe(channel)
+        if channel == course_channel(course.id):
+            raise RedisError("connection lost")
+
+    monkeypatch.setattr(notification_subscriber, "subscribe", course_channels_fail)
+    with pytest.raises(RedisError):
+        with client.websocket_connect(f"{PATH}?token={student.token}") as ws:
+            ws.receive_text()
+
+    _assert_released(run, user_channel(student.id), course_channel(course.id))
+
+
+def test_follow_pending_at_disconnect_is_undone(client, run, monkeypatch, make_user, make_course):
+    student = make_user()
+    course = make_course()
+    subscribe = notification_subscriber.subscribe
+    release = asyncio.Event()
+
+    async def slow_course_subscribe(channel):
+        if channel == course_channel(course.id):
+            await release.wait()
+        await subscribe(channel)
+
+    async def release_soon():
+        await asyncio.sleep(0.2)
+        release.set()
+
+    monkeypatch.setattr(notification_subscriber, "subscribe", slow_course_subscribe)
+    with client.websocket_connect(f"{PATH}?token={student.token}") as ws:
+        _wait_for_listener(run, user_channel(student.id))
+        run(notify_enrolled, student.id, course.id)
+        ws.receive_json()
+        _wait_for_listener(run, course_channel(course.id))
+        assert listeners[user_channel(student.id)][0]._following
+        # Still subscribing when the client goes away
+        client.portal.start_task_soon(release_soon)
+        ws.close()
+
+        _eventually(run, release.is_set, "follow never released")
+        run(asyncio.sleep, 0.05)
+        _assert_released(run, user_channel(student.id), course_channel(course.id))
+
+
+def test_only_admins_create_homework_and_students_hear_of_it(client, run, make_user, make_course):
+    student, admin = make_user(), make_user(admin=True)
+    course = make_course(students=[student])
+    body = {"course_id": course.id, "title": "Essay", "due_date": "2026-12-01T12:00:00Z"}
+
+    assert client.post("/homeworks/", json=body).status_code == 401
+    assert client.post("/homeworks/", json=body, headers=student.headers).status_code == 403
+
+    with client.websocket_connect(f"{PATH}?token={student.token}") as ws:
+        _wait_for_listener(run, course_channel(course.id))
+        response = client.post("/homeworks/", json=body, headers=admin.headers)
+        assert response.status_code == 200
+        event = ws.receive_json()
+
+    assert event["type"] == "homework_created"
+    assert event["homework_id"] == response.json()["id"]
+    assert event["title"] == "Essay"
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core import pagination
+from core.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from models.homeworks import Homework, HomeworkSubmission
+
+
+@pytest.fixture
+def admin(make_user):
+    return make_user(admin=True)
+
+
+@pytest.fixture
+def course_with_classes(make_course, make_live_class):
+    """A course with five finished classes, one live and two upcoming."""
+    course = make_course()
+    classes = [make_live_class(course, starts_in=timedelta(days=-10 + i)) for i in range(5)]
+    classes.append(make_live_class(course))
+    classes += [make_live_class(course, starts_in=timedelta(days=i + 1)) for i in range(2)]
+    return course, classes
+
+
+def _walk(client, path, headers, params) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        query = dict(params) if cursor is None else {**params, "cursor": cursor}
+        response = client.get(path, headers=headers, params=query)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_pages_follow_the_cursor_header(client, admin, course_with_classes):
+    course, classes = course_with_classes
+
+    pages = _walk(client, "/live-classes/", admin.headers, {"course_id": course.id, "limit": 3})
+
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert sum(pages, []) == [live_class.id for live_class in classes]
+
+
+def test_exact_multiple_ends_without_a_cursor(client, admin, course_with_classes):
+    course, classes = course_with_classes
+
+    response = client.get("/live-classes/", headers=admin.headers, params={"course_id": course.id, "limit": 8})
+
+    assert len(response.json()) == len(classes)
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_unpaginated_request_still_gets_everything(client, admin, make_course, make_live_class):
+    course = make_course()
+    classes = [make_live_class(course) for _ in range(pagination.DEFAULT_PAGE_SIZE + 5)]
+
+    response = client.get("/live-classes/", headers=admin.headers, params={"course_id": course.id})
+
+    assert [item["id"] for item in response.json()] == [live_class.id for live_class in classes]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_cursor_alone_uses_the_default_page_size(client, admin, monkeypatch, course_with_classes):
+    monkeypatch.setattr(pagination, "DEFAULT_PAGE_SIZE", 2)
+    course, classes = course_with_classes
+
+    response = client.get(
+        "/live-classes/", headers=admin.headers, params={"course_id": course.id, "cursor": classes[0].id},
+    )
+
+    assert [item["id"] for item in response.json()] == [classes[1].id, classes[2].id]
+    assert response.headers[NEXT_CURSOR_HEADER] == str(classes[2].id)
+
+
+@pytest.mark.parametrize("limit", [0, MAX_PAGE_SIZE + 1])
+def test_limit_is_bounded(client, admin, limit):
+    assert client.get("/live-classes/", headers=admin.headers, params={"limit": limit}).status_code == 422
+
+
+def test_live_class_filters(client, admin, course_with_classes):
+    course, classes = course_with_classes
+    now = datetime.now(timezone.utc)
+
+    def ids(**params):
+        response = client.get("/live-classes/", headers=admin.headers, params={"course_id": course.id, **params})
+        return [item["id"] for item in response.json()]
+
+    assert ids(is_live=True) == [classes[5].id]
+    assert ids(is_live=False) == [c.id for c in classes if c is not classes[5]]
+    assert ids(starts_from=now.isoformat()) == [classes[6].id, classes[7].id]
+    week_ago = dict(starts_from=(now - timedelta(days=8.5)).isoformat(), starts_to=(now - timedelta(days=6.5)).isoformat())
+    assert ids(**week_ago) == [classes[2].id, classes[3].id]
+
+
+def test_submissions_filter_and_page(client, db, admin, make_user, make_course):
+    course = make_course()
+    homework = Homework(course_id=course.id, title="Homework", due_date=datetime.now(timezone.utc))
+    db.add(homework)
+    db.flush()
+    start = datetime.now(timezone.utc) - timedelta(days=5)
+    submissions = [
+        HomeworkSubmission(
+            homework_id=homework.id, user_id=make_user().id, file_url=f"/uploads/{i}",
+            submitted_at=start + timedelta(days=i),
+        )
+        for i in range(5)
+    ]
+    db.add_all(submissions)
+    db.commit()
+    path = f"/homeworks/{homework.id}/submissions"
+
+    assert sum(_walk(client, path, admin.headers, {"limit": 2}), []) == [s.id for s in submissions]
+    recent = client.get(
+        path, headers=admin.headers, params={"submitted_from": (start + timedelta(days=3)).isoformat()},
+    )
+    assert [item["id"] for item in recent.json()] == [submissions[3].id, submissions[4].id]
+
+
+def test_users_page_leaves_out_password_hashes(client, admin, make_user):
+    make_user()
+
+    response = client.get("/users/", headers=admin.headers, params={"limit": 1})
+
+    assert len(response.json()) == 1
+    assert "hashed_password" not in response.json()[0]
+    assert NEXT_CURSOR_HEADER in response.headers
@@ -0,0 +1,62 @@
+import time
+from functools import partial
+
+import core.redis
+from crud import presence
+
+
+def _attendees(run, live_class_id: int, **kwargs) -> int:
+    return run(partial(presence.get_attendance, live_class_id, **kwargs))["attendees"]
+
+
+def test_leaving_one_worker_keeps_the_student_on_another(client, run, make_user, make_course, make_live_class):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+
+    for worker_id in ("worker-a", "worker-b"):
+        run(partial(presence.join_presence, live_class.id, student.id, worker_id=worker_id))
+    assert _attendees(run, live_class.id) == 1
+
+    run(partial(presence.leave_presence, live_class.id, student.id, worker_id="worker-a"))
+    assert _attendees(run, live_class.id) == 1
+
+    run(partial(presence.leave_presence, live_class.id, student.id, worker_id="worker-b"))
+    assert _attendees(run, live_class.id) == 0
+
+
+def test_heartbeat_counts_distinct_students_across_workers(client, run, make_user, make_course, make_live_class):
+    first, second = make_user(), make_user()
+    live_class = make_live_class(make_course(students=[first, second]))
+    now = time.time()
+
+    run(partial(presence.heartbeat, {live_class.id: {first.id, second.id}}, now=now, worker_id="worker-a"))
+    reported = run(partial(presence.heartbeat, {live_class.id: {first.id}}, now=now, worker_id="worker-b"))
+    assert reported == {}
+    assert _attendees(run, live_class.id, now=now) == 2
+
+    # worker-a dies; worker-b keeps heartbeating its one student
+    later = now + presence.PRESENCE_TTL + 1
+    reported = run(partial(presence.heartbeat, {live_class.id: {first.id}}, now=later, worker_id="worker-b"))
+    assert reported == {live_class.id: 1}
+    assert _attendees(run, live_class.id, now=later) == 1
+
+
+def test_keys_of_a_class_share_a_hash_slot():
+    keys = [presence.presence_key(7), presence._reported_key(7), presence.unique_attendees_key(7)]
+
+    assert {key[key.index("{"):] for key in keys} == {"{7}"}
+
+
+def test_attendance_is_503_while_redis_is_down(client, monkeypatch, make_user, make_course, make_live_class):
+    from redis.exceptions import ConnectionError
+
+    admin = make_user(admin=True)
+    live_class = make_live_class(make_course())
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(core.redis.redis_client, "pipeline", unreachable)
+
+    response = client.get(f"/live-classes/{live_class.id}/attendance", headers=admin.headers)
+    assert response.status_code == 503
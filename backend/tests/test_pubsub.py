@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from core.pubsub import RedisSubscriber
+from core.redis import redis_client
+
+
+def test_failed_subscribe_is_not_counted(run):
+    received = []
+
+    async def scenario():
+        subscriber = RedisSubscriber(lambda channel, data: received.append((channel, data)))
+        subscriber._pubsub = redis_client.pubsub()
+        subscribe = subscriber._pubsub.subscribe
+
+        async def unreachable(*channels):
+            raise ConnectionError("down")
+
+        subscriber._pubsub.subscribe = unreachable
+        with pytest.raises(ConnectionError):
+            await subscriber.subscribe("pubsub_test")
+        assert subscriber.channels == 0
+
+        # Redis is back: the next subscriber really subscribes
+        subscriber._pubsub.subscribe = subscribe
+        await subscriber.subscribe("pubsub_test")
+        try:
+            for _ in range(50):
+                await redis_client.publish("pubsub_test", "hello")
+                await asyncio.sleep(0.05)
+                if received:
+                    break
+        finally:
+            await subscriber.close()
+
+    run(scenario)
+
+    assert received[0] == ("pubsub_test", "hello")
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core.query_counter import assert_num_queries
+from database import async_engine
+from models.homeworks import Homework, HomeworkSubmission
+
+
+@pytest.fixture
+def student_in(db, make_user, make_course, make_live_class):
+    """A student enrolled in `courses` courses, each with a class and a submitted homework."""
+
+    def student_in(courses: int):
+        student = make_user()
+        for _ in range(courses):
+            course = make_course(students=[student])
+            make_live_class(course)
+            homework = Homework(course_id=course.id, title="Homework", due_date=datetime.now(timezone.utc))
+            db.add(homework)
+            db.flush()
+            db.add(HomeworkSubmission(homework_id=homework.id, user_id=student.id, file_url="/uploads/x"))
+        db.commit()
+        return student
+
+    return student_in
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("/courses/me", 1),
+    ("/live-classes/me", 1),
+    ("/homeworks/me", 1),
+])
+@pytest.mark.parametrize("courses", [1, 8])
+def test_my_lists_take_one_query_however_many_courses(client, student_in, path, expected, courses):
+    student = student_in(courses)
+    # Load the principal first so only the endpoint's own queries count
+    client.get("/auth/me", headers=student.headers)
+
+    with assert_num_queries(async_engine, expected):
+        response = client.get(path, headers=student.headers)
+
+    assert response.status_code == 200
+    assert len(response.json()) == courses
+
+
+def test_join_is_one_query_then_cached(client, make_user, make_course, make_live_class):
+    student = make_user()
+    live_class = make_live_class(make_course(students=[student]))
+    client.get("/auth/me", headers=student.headers)
+
+    with assert_num_queries(async_engine, 1):
+        assert client.get(f"/live-classes/{live_class.id}/join", headers=student.headers).status_code == 200
+    with assert_num_queries(async_engine, 0):
+        assert client.get(f"/live-classes/{live_class.id}/join", headers=student.headers).status_code == 200
@@ -0,0 +1,101 @@
+import asyncio
+import importlib.util
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from redis.exceptions import RedisError
+
+import core.redis
+from core.rate_limit import RateLimit
+
+
+@pytest.mark.parametrize("value", ["0:1", "-1:5", "nan:5", "1:0", "2:-3"])
+def test_parse_rejects_limits_that_never_allow(value):
+    with pytest.raises(ValueError):
+        RateLimit.parse(value)
+
+
+def test_parse():
+    limit = RateLimit.parse("0.5:3")
+    assert limit == RateLimit(rate=0.5, burst=3)
+    assert limit.ttl == 7
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """
+    Two copies of core.rate_limit, each with its own module state and
+    Redis connection like two uvicorn workers, sharing one Redis.
+    """
+    server = fakeredis.FakeServer()
+
+    def worker():
+        spec = importlib.util.find_spec("core.rate_limit")
+        module = importlib.util.module_from_spec(spec)
+        with monkeypatch.context() as patch:
+            patch.setattr(
+                core.redis, "redis_client",
+                fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+            )
+            spec.loader.exec_module(module)
+        # Refills too slowly to matter within a test
+        module.CHAT_RATE_LIMIT_STUDENT = RateLimit(rate=0.001, burst=3)
+        return module
+
+    return worker(), worker()
+
+
+def test_bucket_is_shared_across_workers(run, workers):
+    a, b = workers
+
+    async def scenario():
+        return [
+            await a.allow_chat_message(7, 42, is_admin=False),
+            await b.allow_chat_message(7, 42, is_admin=False),
+            await a.allow_chat_message(7, 42, is_admin=False),
+            await b.allow_chat_message(7, 42, is_admin=False),
+            await a.allow_chat_message(7, 42, is_admin=False),
+        ]
+
+    assert run(scenario) == [True, True, True, False, False]
+
+
+def test_concurrent_checks_across_workers_never_exceed_the_burst(run, workers):
+    async def scenario():
+        return await asyncio.gather(*(
+            worker.allow_chat_message(8, 42, is_admin=False)
+            for _ in range(25)
+            for worker in workers
+        ))
+
+    assert sum(run(scenario)) == 3
+
+
+def test_buckets_are_per_user_and_class(run, workers):
+    a, b = workers
+
+    async def scenario():
+        for _ in range(3):
+            await a.allow_chat_message(9, 1, is_admin=False)
+        return (
+            await b.allow_chat_message(9, 1, is_admin=False),
+            await b.allow_chat_message(9, 2, is_admin=False),
+            await b.allow_chat_message(10, 1, is_admin=False),
+        )
+
+    assert run(scenario) == (False, True, True)
+
+
+def test_local_fallback_while_redis_is_down(run, workers, monkeypatch):
+    a, _ = workers
+
+    async def unreachable(*args, **kwargs):
+        raise RedisError("connection refused")
+
+    monkeypatch.setattr(a, "_token_bucket", unreachable)
+
+    async def scenario():
+        return [await a.allow_chat_message(11, 42, is_admin=False) for _ in range(4)]
+
+    assert run(scenario) == [True, True, True, False]
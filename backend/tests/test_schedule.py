@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+from core.query_counter import QueryCounter
+from core.schedule_index import ScheduledClass, ScheduleIndex
+from crud import live_class_schedule
+from database import async_engine
+
+NOW = datetime(2026, 1, 5, 12, tzinfo=timezone.utc)
+
+
+def _entry(class_id: int, course_id: int, starts_in: int, length: int = 60) -> ScheduledClass:
+    starts_at = NOW + timedelta(minutes=starts_in)
+    return ScheduledClass(
+        starts_at=starts_at,
+        id=class_id,
+        course_id=course_id,
+        title=f"Class {class_id}",
+        ends_at=starts_at + timedelta(minutes=length),
+        meeting_url="https://meet.example.com/class",
+    )
+
+
+def _ids(entries) -> list[int]:
+    return [entry.id for entry in entries]
+
+
+def test_index_answers_live_and_upcoming_per_course():
+    index = ScheduleIndex()
+    index.replace_all([
+        _entry(1, 10, starts_in=-30),
+        _entry(2, 10, starts_in=-120),  # already over
+        _entry(3, 20, starts_in=-5),
+        _entry(4, 10, starts_in=30),
+        _entry(5, 20, starts_in=10),
+        _entry(6, 20, starts_in=90),
+        _entry(7, 30, starts_in=20),
+    ])
+
+    assert len(index) == 7
+    assert _ids(index.live_now([10, 20], NOW)) == [1, 3]
+    assert _ids(index.live_now([30, 99], NOW)) == []
+    assert _ids(index.upcoming([10, 20], NOW, limit=10)) == [5, 4, 6]
+    assert _ids(index.upcoming([10, 20, 30], NOW, limit=2)) == [5, 7]
+    assert _ids(index.starting_between(NOW, NOW + timedelta(minutes=30))) == [5, 7, 4]
+
+
+def test_index_moves_rescheduled_classes_and_removes():
+    index = ScheduleIndex()
+    index.replace_all([_entry(1, 10, starts_in=10), _entry(2, 10, starts_in=20)])
+
+    # Moved to another course and a later slot
+    index.add(_entry(1, 20, starts_in=40))
+    assert _ids(index.upcoming([10], NOW, limit=10)) == [2]
+    assert _ids(index.upcoming([10, 20], NOW, limit=10)) == [2, 1]
+    assert index.get(1).course_id == 20
+
+    index.remove(2)
+    index.remove(2)
+    assert index.get(2) is None
+    assert _ids(index.upcoming([10, 20], NOW, limit=10)) == [1]
+    assert _ids(index.starting_between(NOW, NOW + timedelta(hours=1))) == [1]
+
+    index.replace_all([_entry(3, 30, starts_in=5)])
+    assert len(index) == 1
+    assert index.get(1) is None
+
+
+def _mine(client, student, which: str, **params) -> list[int]:
+    response = client.get(f"/live-classes/me/{which}", params=params, headers=student.headers)
+    assert response.status_code == 200
+    return [live_class["id"] for live_class in response.json()]
+
+
+def test_my_classes_follow_commits(client, db, make_user, make_course, make_live_class):
+    student = make_user()
+    course, other = make_course(students=[student]), make_course()
+    live = make_live_class(course)
+    later = make_live_class(course, starts_in=timedelta(days=400))
+    soon = make_live_class(course, starts_in=timedelta(days=300))
+    make_live_class(course, starts_in=timedelta(hours=-3))  # ended
+    make_live_class(other)
+
+    assert _mine(client, student, "live") == [live.id]
+    assert _mine(client, student, "upcoming") == [soon.id, later.id]
+    assert _mine(client, student, "upcoming", limit=1) == [soon.id]
+    assert client.get("/live-classes/me/upcoming", params={"limit": 0}, headers=student.headers).status_code == 422
+
+    db.delete(live)
+    db.commit()
+    assert _mine(client, student, "live") == []
+
+
+def test_warm_lookups_skip_the_database(client, make_user, make_course, make_live_class):
+    student = make_user()
+    live = make_live_class(make_course(students=[student]))
+    assert _mine(client, student, "live") == [live.id]
+
+    with QueryCounter(async_engine) as queries:
+        assert _mine(client, student, "live") == [live.id]
+    assert queries.count == 0
+
+
+def test_enrolling_refreshes_course_ids_on_every_worker(client, run, make_user, make_course, make_live_class):
+    student = make_user()
+    course = make_course()
+    live = make_live_class(course)
+    assert _mine(client, student, "live") == []
+    stale = live_class_schedule._user_courses.get(student.id)
+    assert stale is not None
+
+    assert client.post(f"/courses/{course.id}/enroll", headers=student.headers).status_code == 200
+    run(live_class_schedule.settle_user_courses_invalidations)
+    # Another worker still holds the entry it cached before the enrollment
+    live_class_schedule._user_courses.set(student.id, stale)
+
+    assert _mine(client, student, "live") == [live.id]
+
+
+def test_course_ids_are_read_from_the_database_without_redis(client, run, monkeypatch, make_user, make_course):
+    from redis.exceptions import ConnectionError
+
+    import core.redis
+
+    student = make_user()
+    course = make_course(students=[student])
+
+    async def unreachable(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(core.redis.redis_client, "get", unreachable)
+
+    async def course_ids():
+        async with live_class_schedule.AsyncSessionLocal() as db:
+            return await live_class_schedule.get_user_course_ids_async(db, student.id)
+
+    assert run(course_ids) == [course.id]
+    # Cached without a generation: other workers catch up on the TTL
+    assert live_class_schedule._user_courses.get(student.id) == (None, [course.id])
@@ -0,0 +1,82 @@
+import importlib.util
+import time
+from datetime import timedelta
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import JWTError
+
+from core import security
+
+
+def test_verified_token_is_served_from_the_cache(monkeypatch):
+    token = security.create_access_token({"sub": "cached"}, timedelta(minutes=5))
+    calls = []
+    verify = security.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return verify(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+
+    assert security.decode_token(token)["sub"] == "cached"
+    assert security.decode_token(token)["sub"] == "cached"
+    assert calls == [token]
+
+
+def test_cached_token_still_expires():
+    token = security.create_access_token({"sub": "short"}, timedelta(seconds=1))
+    assert security.decode_token(token)["sub"] == "short"
+
+    # jose compares whole seconds
+    time.sleep(2.1)
+    with pytest.raises(JWTError):
+        security.decode_token(token)
+
+
+def test_tampered_token_is_rejected():
+    token = security.create_access_token({"sub": "victim"}, timedelta(minutes=5))
+    header, claims, signature = token.split(".")
+    forged = security.create_access_token({"sub": "attacker"}, timedelta(minutes=5)).split(".")[1]
+
+    with pytest.raises(JWTError):
+        security.decode_token(f"{header}.{forged}.{signature}")
+
+
+def _security_with(monkeypatch, **env):
+    # A fresh copy of core.security configured from `env`
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    spec = importlib.util.find_spec("core.security")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_asymmetric_mode_verifies_with_the_public_key_only(tmp_path, monkeypatch):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = tmp_path / "jwt.pem"
+    public_pem = tmp_path / "jwt.pub.pem"
+    private_pem.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    public_pem.write_bytes(key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ))
+
+    issuer = _security_with(monkeypatch, JWT_PRIVATE_KEY_FILE=private_pem, JWT_ALGORITHM="RS256")
+    monkeypatch.delenv("JWT_PRIVATE_KEY_FILE")
+    verifier = _security_with(monkeypatch, JWT_PUBLIC_KEY_FILE=public_pem)
+
+    token = issuer.create_access_token({"sub": "rsa"}, timedelta(minutes=5))
+    assert verifier.decode_token(token)["sub"] == "rsa"
+    with pytest.raises(RuntimeError):
+        verifier.create_access_token({"sub": "rsa"}, timedelta(minutes=5))
+    # An HMAC token signed with the shared secret is not accepted
+    with pytest.raises(JWTError):
+        verifier.decode_token(security.create_access_token({"sub": "rsa"}, timedelta(minutes=5)))
@@ -0,0 +1,159 @@
+import hashlib
+import tracemalloc
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from core import storage
+
+BOUNDARY = "test-upload-boundary"
+
+
+@pytest.fixture
+def homework_id(db, make_course):
+    from models.homeworks import Homework
+
+    homework = Homework(course_id=make_course().id, title="Upload", due_date=datetime.now(timezone.utc))
+    db.add(homework)
+    db.commit()
+    return homework.id
+
+
+@pytest.fixture
+def staged_files():
+    def staged_files() -> set[str]:
+        if not storage.UPLOAD_STAGING_DIR.exists():
+            return set()
+        return {path.name for path in storage.UPLOAD_STAGING_DIR.iterdir()}
+
+    return staged_files
+
+
+async def _multipart(chunks, filename: str = "upload.bin"):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    for chunk in chunks:
+        yield chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _post_streamed(run, path: str, headers: dict, chunks) -> httpx.Response:
+    """POST a multipart body chunk by chunk, without a Content-Length."""
+    from main import app
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                path,
+                headers={**headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+                content=_multipart(chunks),
+            )
+
+    return run(post)
+
+
+def _submitted_sha256(db, response) -> str:
+    from models.homeworks import HomeworkSubmission
+
+    return db.get(HomeworkSubmission, response.json()["id"]).blob_sha256
+
+
+def test_upload_is_stored_by_content_hash(client, db, make_user, homework_id):
+    student = make_user()
+    content = b"homework answers\n" * 1000
+
+    response = client.post(
+        f"/homeworks/{homework_id}/submit",
+        headers=student.headers,
+        files={"file": ("answers.txt", content)},
+    )
+
+    assert response.status_code == 200
+    assert _submitted_sha256(db, response) == hashlib.sha256(content).hexdigest()
+    key = response.json()["file_url"].removeprefix(storage.UPLOAD_URL_PREFIX + "/")
+    assert storage.storage.local_path(key).read_bytes() == content
+
+
+def test_oversized_content_length_is_rejected_before_reading(client, monkeypatch, make_user, homework_id, staged_files):
+    monkeypatch.setattr(storage, "UPLOAD_MAX_BYTES", 1000)
+    student = make_user()
+    before = staged_files()
+
+    response = client.post(
+        f"/homeworks/{homework_id}/submit",
+        headers=student.headers,
+        files={"file": ("big.bin", b"x" * (storage.UPLOAD_FORM_OVERHEAD + 2000))},
+    )
+
+    assert response.status_code == 413
+    assert staged_files() == before
+
+
+def test_oversized_chunked_body_is_cut_off(run, monkeypatch, make_user, homework_id, staged_files):
+    monkeypatch.setattr(storage, "UPLOAD_MAX_BYTES", 1000)
+    student = make_user()
+    before = staged_files()
+    sent = []
+
+    def chunks():
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 64 * 1024
+
+    response = _post_streamed(run, f"/homeworks/{homework_id}/submit", student.headers, chunks())
+
+    assert response.status_code == 413
+    # Stopped reading a couple of chunks past the limit, not at the end
+    assert len(sent) < 5
+    assert staged_files() == before
+
+
+def test_file_over_the_limit_inside_the_form_overhead(client, monkeypatch, make_user, homework_id, staged_files):
+    monkeypatch.setattr(storage, "UPLOAD_MAX_BYTES", 1000)
+    student = make_user()
+    before = staged_files()
+
+    response = client.post(
+        f"/homeworks/{homework_id}/submit",
+        headers=student.headers,
+        files={"file": ("big.bin", b"x" * 1001)},
+    )
+
+    assert response.status_code == 413
+    assert staged_files() == before
+
+
+def test_500mb_upload_memory_stays_bounded(run, db, monkeypatch, make_user, homework_id):
+    size = 500 * 1024 * 1024
+    chunk = bytes(range(256)) * 4096  # 1 MiB
+    monkeypatch.setattr(storage, "UPLOAD_MAX_BYTES", size)
+    student = make_user()
+
+    def chunks():
+        for _ in range(size // len(chunk)):
+            yield chunk
+
+    expected = hashlib.sha256()
+    for _ in range(size // len(chunk)):
+        expected.update(chunk)
+
+    tracemalloc.start()
+    try:
+        response = _post_streamed(run, f"/homeworks/{homework_id}/submit", student.headers, chunks())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert response.status_code == 200
+    assert _submitted_sha256(db, response) == expected.hexdigest()
+    # A few chunks in flight at most, never the file
+    assert peak < 32 * 1024 * 1024, peak
+
+    key = response.json()["file_url"].removeprefix(storage.UPLOAD_URL_PREFIX + "/")
+    assert storage.storage.local_path(key).stat().st_size == size
+    storage.storage.delete(key)
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+from core import user_cache
+from core.query_counter import QueryCounter
+from core.redis import redis_sync_client
+from database import AsyncSessionLocal, async_engine
+from models.users import User
+
+
+def _user_queries(queries: QueryCounter) -> int:
+    return sum("FROM users" in sql for sql in queries.statements)
+
+
+def test_warm_request_skips_the_user_query(client, make_user):
+    user = make_user()
+
+    with QueryCounter(async_engine) as cold:
+        assert client.get("/auth/me", headers=user.headers).status_code == 200
+    with QueryCounter(async_engine) as warm:
+        assert client.get("/auth/me", headers=user.headers).status_code == 200
+
+    assert _user_queries(cold) == 1
+    assert warm.count == 0
+
+
+def test_admin_flag_change_is_seen_on_the_next_request(client, db, make_user):
+    user = make_user()
+    assert client.get("/auth/me", headers=user.headers).json()["is_admin"] is False
+
+    db.get(User, user.id).is_admin = True
+    db.commit()
+
+    assert client.get("/auth/me", headers=user.headers).json()["is_admin"] is True
+
+
+def test_rename_drops_the_old_name(client, db, make_user):
+    user = make_user()
+    assert client.get("/auth/me", headers=user.headers).status_code == 200
+
+    db.get(User, user.id).username = f"{user.username}-renamed"
+    db.commit()
+
+    # The token's subject no longer exists
+    assert client.get("/auth/me", headers=user.headers).status_code == 401
+
+
+def test_rolled_back_change_keeps_the_cache(client, db, make_user):
+    user = make_user()
+    client.get("/auth/me", headers=user.headers)
+
+    db.get(User, user.id).is_admin = True
+    db.flush()
+    db.rollback()
+
+    with QueryCounter(async_engine) as queries:
+        assert client.get("/auth/me", headers=user.headers).json()["is_admin"] is False
+    assert queries.count == 0
+
+
+def test_redis_tier_is_shared_between_workers(client, monkeypatch, make_user):
+    monkeypatch.setattr(user_cache, "USER_CACHE_REDIS", True)
+    user = make_user()
+    client.get("/auth/me", headers=user.headers)
+
+    # Another worker: nothing cached locally, but Redis has it
+    user_cache._principals.pop(user.username)
+    with QueryCounter(async_engine) as queries:
+        assert client.get("/auth/me", headers=user.headers).status_code == 200
+    assert queries.count == 0
+
+    user_cache.invalidate_user(user.username)
+    with QueryCounter(async_engine) as queries:
+        client.get("/auth/me", headers=user.headers)
+    assert _user_queries(queries) == 1
+
+
+def _eventually(run, condition, message: str):
+    async def wait():
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError(message)
+
+    run(wait)
+
+
+def test_invalidation_from_another_worker_drops_the_local_entry(client, run, make_user):
+    user = make_user()
+    client.get("/auth/me", headers=user.headers)
+    assert user_cache._principals.get(user.username) is not None
+
+    # What another worker's commit broadcasts
+    redis_sync_client.publish(user_cache.INVALIDATION_CHANNEL, json.dumps([user.username]))
+
+    _eventually(
+        run, lambda: user_cache._principals.get(user.username) is None,
+        "the broadcast invalidation was not applied",
+    )
+
+
+def test_async_commit_invalidates_without_blocking_the_loop(client, run, monkeypatch, make_user):
+    monkeypatch.setattr(user_cache, "USER_CACHE_REDIS", True)
+    user = make_user()
+    client.get("/auth/me", headers=user.headers)
+    assert redis_sync_client.exists(user_cache._redis_key(user.username))
+
+    def blocking(*args, **kwargs):
+        raise AssertionError("blocking Redis call on the event loop")
+
+    monkeypatch.setattr(redis_sync_client, "delete", blocking)
+    monkeypatch.setattr(redis_sync_client, "publish", blocking)
+    published = []
+    monkeypatch.setattr(
+        user_cache.invalidation_subscriber, "handler",
+        lambda channel, data: published.extend(json.loads(data)),
+    )
+
+    async def promote():
+        async with AsyncSessionLocal() as db:
+            (await db.get(User, user.id)).is_admin = True
+            await db.commit()
+        await user_cache.settle_invalidations()
+
+    run(promote)
+
+    assert not redis_sync_client.exists(user_cache._redis_key(user.username))
+    _eventually(run, lambda: user.username in published, "the invalidation was not broadcast")
+    assert client.get("/auth/me", headers=user.headers).json()["is_admin"] is True